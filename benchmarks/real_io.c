@@ -0,0 +1,138 @@
+// Throughput of the fast input/output of reals against the libc functions.
+//
+// Usage (from the root of the repository):
+//     gcc -O2 benchmarks/real_io.c -o real_io && ./real_io [number_of_reals]
+//
+// It also checks that fast_read_real returns exactly what fscanf returns and
+// that fast_write_real writes exactly what "%lf" writes, both for the reals of
+// the benchmark and for doubles of any magnitude (random bit patterns, the
+// extremes, infinities and NaNs).
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+static FILE *fr, *fw;
+
+#include "../gradergen/languages/fast_io.c"
+
+static double elapsed(struct timespec start) {
+	struct timespec end;
+	clock_gettime(CLOCK_MONOTONIC, &end);
+	return (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) * 1e-9;
+}
+
+static double random_real(int kind) {
+	double x = (double)rand() / RAND_MAX * 2 - 1;
+	switch (kind % 4) {
+		case 0: return x;
+		case 1: return x * 1e6;
+		case 2: return (double)(rand() % 2000000 - 1000000) / 1000;
+		default: return x * 1e12;
+	}
+}
+
+// Counts the doubles (n with random bits and the special ones) that
+// fast_format_real writes differently from "%lf".
+static void check_whole_range(int n) {
+	double special[] = {0.0, -0.0, 0.5, 2.5, 1e15, 1e15 + 0.5, 4503599627370495.5,
+		9007199254740993.0, 9223372036854774784.0, 9223372036854775808.0,
+		18446744073709551616.0, 1e20, -1e20, 1e300, 1.7976931348623157e308,
+		-1.7976931348623157e308, 4.9406564584124654e-324, 0.0000005, 0.0000015,
+		1.0 / 0.0, -1.0 / 0.0, 0.0 / 0.0, -(0.0 / 0.0)};
+	int specials = sizeof(special) / sizeof(special[0]);
+	char expected[FAST_OUT_MAX_TOKEN], written[FAST_OUT_MAX_TOKEN];
+	int wrong = 0;
+	for (int i = 0; i < specials + n; i++) {
+		double x = special[i % specials];
+		if (i >= specials) {
+			unsigned long long int bits = 0;
+			for (int k = 0; k < 4; k++) bits = bits << 16 ^ (rand() & 0xffff);
+			memcpy(&x, &bits, sizeof(x));
+		}
+		snprintf(expected, sizeof(expected), "%lf", x);
+		*fast_format_real(written, x) = '\0';
+		if (strcmp(expected, written) != 0) {
+			if (wrong++ < 10) printf("%s written as %s\n", expected, written);
+		}
+	}
+	printf("output  fast:    %d of %d random and special doubles differ from \"%%lf\"\n", wrong, specials + n);
+}
+
+int main(int argc, char** argv) {
+	int n = argc > 1 ? atoi(argv[1]) : 5000000;
+	const char* formats[] = {"%.6f", "%.17g", "%g", "%.3f"};
+	double* values = (double*)malloc(n * sizeof(double));
+	double* parsed = (double*)malloc(n * sizeof(double));
+
+	// Writing the input file.
+	srand(42);
+	FILE* f = tmpfile();
+	for (int i = 0; i < n; i++) {
+		fprintf(f, formats[i % 4], random_real(i));
+		fputc(i % 10 == 9 ? '\n' : ' ', f);
+	}
+	long bytes = ftell(f);
+	double mb = bytes / 1e6;
+	printf("%d reals, %.1f MB of input\n\n", n, mb);
+
+	struct timespec start;
+
+	// Input
+	rewind(f);
+	fr = f;
+	clock_gettime(CLOCK_MONOTONIC, &start);
+	for (int i = 0; i < n; i++) {
+		if (fscanf(fr, "%lf", &values[i]) != 1) return 1;
+	}
+	double t_libc = elapsed(start);
+
+	rewind(f);
+	clock_gettime(CLOCK_MONOTONIC, &start);
+	fast_input_init();
+	for (int i = 0; i < n; i++) parsed[i] = fast_read_real();
+	double t_fast = elapsed(start);
+
+	int wrong = 0;
+	for (int i = 0; i < n; i++) wrong += memcmp(&values[i], &parsed[i], sizeof(double)) != 0;
+	printf("input   fscanf: %7.3f s (%7.1f MB/s)\n", t_libc, mb / t_libc);
+	printf("input   fast:   %7.3f s (%7.1f MB/s), %d values differ from fscanf\n\n", t_fast, mb / t_fast, wrong);
+
+	// Output
+	char* libc_out = NULL;
+	size_t libc_size = 0;
+	fw = open_memstream(&libc_out, &libc_size);
+	clock_gettime(CLOCK_MONOTONIC, &start);
+	for (int i = 0; i < n; i++) fprintf(fw, "%lf\n", values[i]);
+	fflush(fw);
+	t_libc = elapsed(start);
+	fclose(fw);
+
+	char* fast_out = NULL;
+	size_t fast_size = 0;
+	fw = open_memstream(&fast_out, &fast_size);
+	clock_gettime(CLOCK_MONOTONIC, &start);
+	for (int i = 0; i < n; i++) {
+		fast_write_real(values[i]);
+		fast_write_char('\n');
+	}
+	fast_output_close();
+	fflush(fw);
+	t_fast = elapsed(start);
+	fclose(fw);
+
+	wrong = 0;
+	char *a = libc_out, *b = fast_out;
+	for (int i = 0; i < n && a && b; i++) {
+		char *na = strchr(a, '\n'), *nb = strchr(b, '\n');
+		if (!na || !nb) break;
+		wrong += (na - a != nb - b) || memcmp(a, b, na - a) != 0;
+		a = na + 1, b = nb + 1;
+	}
+	mb = libc_size / 1e6;
+	printf("output  fprintf: %7.3f s (%7.1f MB/s)\n", t_libc, mb / t_libc);
+	printf("output  fast:    %7.3f s (%7.1f MB/s), %d values differ from \"%%lf\"\n", t_fast, mb / t_fast, wrong);
+	check_whole_range(n / 10);
+	return 0;
+}
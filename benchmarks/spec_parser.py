@@ -0,0 +1,50 @@
+# Time needed to parse task.spec files of growing size.
+#
+# Usage (from the root of the repository):
+#     python3 benchmarks/spec_parser.py [max_number_of_functions]
+#
+# Each function of the generated task.spec adds a variable, an array, a
+# prototype, an input line, a call and an output line. If the parser is
+# linear the time per line stays (roughly) constant as the size doubles.
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from gradergen.grader_generator import parse_task_spec
+
+def make_task_spec(n):
+    variables = ["int N"]
+    prototypes, input_, calls, output = [], ["N"], [], []
+    for i in range(n):
+        variables.append("longint res{0}".format(i))
+        variables.append("int A{0}[2*N + {1}][N - 1]".format(i, i % 10))
+        prototypes.append("longint f{0}(int N, int A[][], longint &total)".format(i))
+        input_.append("A{0}[][]".format(i))
+        calls.append("res{0} = f{0}(N, A{0}, res{0})".format(i))
+        output.append("res{0}".format(i))
+    sections = [("variables", variables), ("prototypes", prototypes),
+                ("input", input_), ("calls", calls), ("output", output)]
+    return "\n".join("***{0}***\n{1}\n".format(name, "\n".join(lines)) for name, lines in sections)
+
+def main():
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 32000
+    print("{0:>8} {1:>8} {2:>10} {3:>14}".format("functions", "lines", "seconds", "us per line"))
+    n = 1000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "task.spec")
+        while n <= max_n:
+            with open(path, "w") as f:
+                f.write(make_task_spec(n))
+            lines = 6 * n + 2
+            start = time.perf_counter()
+            parse_task_spec(path, False)
+            elapsed = time.perf_counter() - start
+            print("{0:>8} {1:>8} {2:>10.3f} {3:>14.2f}".format(n, lines, elapsed, elapsed / lines * 1e6))
+            n *= 2
+
+if __name__ == "__main__":
+    main()
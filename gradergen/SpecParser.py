@@ -0,0 +1,330 @@
+import re
+import sys
+import string
+import collections
+from gradergen.structures import PrimitiveType, Location
+
+# A token of a line of task.spec. kind is "name", "number", "location" or,
+# for symbols, the symbol itself; space_before is True if the token is
+# preceded by spaces. Each line ends with two "end" tokens, so that the
+# parser can look one token ahead without checking the length of the line.
+Token = collections.namedtuple("Token", ["kind", "value", "space_before"])
+END = Token("end", "", False)
+
+class ParseError(Exception):
+    pass
+
+# Parses the lines of task.spec with a single pass: each line is split in
+# tokens by one precompiled regex and then parsed by a recursive descent parser
+# (a method parse_<rule> for each rule), without backtracking.
+# The match trees are dictionaries with the names of the parts of the rule as
+# keys (the repeated parts are lists of subtrees, or of names); they are the
+# ones the constructors of gradergen.structures expect.
+class SpecParser:
+    # Each match is a pair (spaces, token); the kind of the token is given by
+    # its first char. Anything else is a single char which is not a symbol.
+    TOKEN_REGEX = re.compile(
+        r"( *)([a-zA-Z_][a-zA-Z_0-9]*|[0-9]+|"
+        r"\{(?:" + Location.SOLUTION.value + "|" + Location.GRADER.value + r")\}|"
+        r"\[\]|[^ ])"
+    )
+    TOKEN_KINDS = {
+        **{char: "name" for char in string.ascii_letters + "_"},
+        **{char: "number" for char in string.digits},
+        "{": "location",
+    }
+    SYMBOLS = {"[]", "[", "]", "(", ")", ",", "&", "*", "+", "-", "=", ":"}
+
+    def __init__(self):
+        # This is the list of type specifiers (int, char,...).
+        self.type_specifiers = [enum_element.value for enum_element in PrimitiveType]
+        self.non_void_types = set(self.type_specifiers[1:])
+        self.tokens = []
+        self.position = 0
+
+    def tokenize(self, line):
+        tokens = []
+        for spaces, value in self.TOKEN_REGEX.findall(line):
+            kind = self.TOKEN_KINDS.get(value[0])
+            if kind is None:
+                if value not in self.SYMBOLS:
+                    raise ParseError()
+                kind = value
+            elif kind == "location" and len(value) == 1:
+                raise ParseError()
+            tokens.append(Token(kind, value, spaces != ""))
+        tokens += [END, END]
+        return tokens
+
+    # Parses the whole string with the given rule. Returns the match tree (a
+    # string for the rules without groups) or None if the string does not
+    # match the rule.
+    def match_tree(self, rule, string):
+        try:
+            self.tokens = self.tokenize(string)
+            self.position = 0
+            tree = getattr(self, "parse_" + rule)()
+            if self.tokens[self.position].kind != "end":
+                raise ParseError()
+        except ParseError:
+            return None
+        return tree
+
+    # Helpers used by the rules.
+
+    def peek(self, offset = 0):
+        return self.tokens[self.position + offset]
+
+    def is_next(self, kind, offset = 0):
+        return self.tokens[self.position + offset].kind == kind
+
+    def expect(self, kind):
+        token = self.tokens[self.position]
+        if token.kind != kind:
+            raise ParseError()
+        self.position += 1
+        return token.value
+
+    # Rules
+
+    def parse_name(self):
+        return self.expect("name")
+
+    def parse_type_non_void(self):
+        if not self.is_next("name") or self.peek().value not in self.non_void_types:
+            raise ParseError()
+        return self.expect("name")
+
+    def parse_type_(self):
+        if self.is_next("name") and self.peek().value in self.non_void_types:
+            return self.expect("name")
+        return PrimitiveType.VOID.value
+
+    # type name, with at least a space between type and name.
+    def parse_variable(self):
+        tree = {"type": self.parse_type_non_void()}
+        if not self.is_next("name") or not self.peek().space_before:
+            raise ParseError()
+        tree["name"] = self.parse_name()
+        return tree
+
+    # [size1][size2]...
+    def parse_sizes(self):
+        sizes = []
+        self.expect("[")
+        sizes.append(self.parse_expression())
+        self.expect("]")
+        while self.is_next("["):
+            self.expect("[")
+            sizes.append(self.parse_expression())
+            self.expect("]")
+        return sizes
+
+    def parse_array(self):
+        tree = self.parse_variable()
+        tree["sizes"] = self.parse_sizes()
+        return tree
+
+    # A line of the variables section, either a variable or an array.
+    def parse_declaration(self):
+        tree = self.parse_variable()
+        if not self.is_next("end"):
+            tree["sizes"] = self.parse_sizes()
+        return tree
+
+    # An optionally signed number, without spaces.
+    def parse_number(self, signed):
+        sign = ""
+        if self.is_next("+") or self.is_next("-"):
+            sign = self.peek().kind
+            self.position += 1
+        elif signed:
+            raise ParseError()
+        return sign + self.expect("number")
+
+    # const1 or [coef *] variable [const2], where const2 has a sign.
+    def parse_expression(self):
+        tree = {}
+        if self.is_next("number") or self.is_next("+") or self.is_next("-"):
+            number = self.parse_number(False)
+            if not self.is_next("*"):
+                return {"const1": number}
+            self.expect("*")
+            tree["coef"] = number
+        tree["variable"] = self.parse_name()
+        if self.is_next("+") or self.is_next("-"):
+            tree["const2"] = self.parse_number(True)
+        return tree
+
+    # type &name[][], the & is optional and there must be a space between
+    # the type and the name.
+    def parse_proto_param(self):
+        tree = {"type": self.parse_type_non_void(), "by_ref": ""}
+        spaced = False
+        if self.is_next("&"):
+            spaced = self.peek().space_before
+            tree["by_ref"] = self.expect("&")
+        if not self.is_next("name"):
+            raise ParseError()
+        if not spaced and not self.peek().space_before:
+            raise ParseError()
+        tree["name"] = self.parse_name()
+        tree["dim"] = self.parse_dim(True)
+        return tree
+
+    # The "[]" of an array without sizes, not separated by spaces.
+    def parse_dim(self, space_allowed):
+        dim = ""
+        while self.is_next("[]") and (not self.peek().space_before or (not dim and space_allowed)):
+            dim += self.expect("[]")
+        return dim
+
+    # item, item, ... (possibly empty)
+    def parse_list(self, parse_item):
+        items = []
+        if self.is_next(")"):
+            return items
+        items.append(parse_item())
+        while self.is_next(","):
+            self.expect(",")
+            items.append(parse_item())
+        return items
+
+    def parse_prototype(self):
+        tree = {}
+        if self.is_next("name", offset = 1):
+            tree["return_type"] = self.parse_type_non_void()
+        else:
+            tree["return_type"] = PrimitiveType.VOID.value
+        tree["name"] = self.parse_name()
+        self.expect("(")
+        tree["params"] = self.parse_list(self.parse_proto_param)
+        self.expect(")")
+        if self.is_next("location"):
+            tree["location"] = self.expect("location")[1:-1]
+        return tree
+
+    # name[i0][i1]..., the indexes (loop variables of repeat) are optional.
+    def parse_indexed_name(self):
+        tree = {"name": self.parse_name(), "indexes": []}
+        while self.is_next("["):
+            self.expect("[")
+            tree["indexes"].append(self.parse_name())
+            self.expect("]")
+        return tree
+
+    # [repeat count1, count2, ...:] [return_var =] name(params), where the
+    # counts are expressions (the loop variables are i0, i1, ...).
+    def parse_call(self):
+        tree = {}
+        # A call of a function named repeat is followed by ( or =.
+        if self.is_next("name") and self.peek().value == "repeat" and self.peek(1).kind in ("name", "number", "+", "-"):
+            self.expect("name")
+            tree["repeat"] = [self.parse_expression()]
+            while self.is_next(","):
+                self.expect(",")
+                tree["repeat"].append(self.parse_expression())
+            self.expect(":")
+        if not self.is_next("(", offset = 1):
+            tree["return_var"] = self.parse_indexed_name()
+            self.expect("=")
+        tree["name"] = self.parse_name()
+        self.expect("(")
+        tree["params"] = self.parse_list(self.parse_indexed_name)
+        self.expect(")")
+        return tree
+
+    def parse_IO_variables(self):
+        variables = [self.parse_name()]
+        while not self.is_next("end"):
+            variables.append(self.parse_name())
+        return {"variables": variables}
+
+    def parse_array_no_sizes(self):
+        tree = {"name": self.parse_name(), "dim": self.parse_dim(False)}
+        if not tree["dim"]:
+            raise ParseError()
+        return tree
+
+    # Arrays are separated by spaces.
+    def parse_IO_arrays(self):
+        arrays = [self.parse_array_no_sizes()]
+        while not self.is_next("end"):
+            if not self.peek().space_before:
+                raise ParseError()
+            arrays.append(self.parse_array_no_sizes())
+        return {"arrays": arrays}
+
+    # A line of the input or output section, either variables or arrays.
+    def parse_IO_line(self):
+        if self.is_next("[]", offset = 1):
+            return self.parse_IO_arrays()
+        return self.parse_IO_variables()
+
+    # Testing for the rules
+    def test(self):
+        import pprint
+
+        tests = {
+            "name": {
+                "valid": ["foo", "_foo_231bar123"],
+                "invalid": ["", "foo 123", "1foo", "foo'foo"]
+            },
+
+            "type_non_void": {
+                "valid": self.type_specifiers[1:],
+                "invalid": ["", " ", "foo", "int1", "1"]
+            },
+
+            "type_": {
+                "valid": self.type_specifiers,
+                "invalid": ["foo", "int1", "1"]
+            },
+
+            "proto_param": {
+                "valid": ["int foo", "longint foo123[][][]", "char & int[][]", "int int", "real& foo", "real &bar[]"],
+                "invalid": ["int_foo", " int_foo", "  ", "int&foo[]", "int foo bar", "int& &foo", "int []foo", "int foo()", "foo int", "int foo[] []"]
+            },
+
+            "variable": {
+                "valid": ["int N", "real int"],
+                "invalid": ["intN", "int N[]", "foo N"]
+            },
+
+            "expression": {
+                "valid": ["bar  ", " +  150   ", "150", " foo", "2 * foo", "-5 * foo", "foo + 15", "5*f123-10"],
+                "invalid": ["15*15", "-foo", "123*foo -", "", "14 14", "foo + foo", "15 + foo", "foo * 15"]
+            },
+
+            "array": {
+                "valid": ["  int    foo[N]", "   longint bar[N_  ]", "real foo [123][  2*N + 1][A - 123]"],
+                "invalid": ["foo[N]", "int [N]", "int foo", "int foo[?]", "int foo[foo[N]]", "int foo(N)", "int foo[-bar+15]", "int foo[]"]
+            },
+
+            "prototype": {
+                "valid": ["  f () ", "int()", " real longint123_name_123(int &a[][][], longint& b, char &    _c32132 , longint d[]) {grader}"],
+                "invalid": ["()", "int f(", "int f(int, &int)", "int f() {}", "int f() {grader", "int f() { grader}", "f(int a,)"]
+            },
+
+            "call": {
+                "valid": ["f()", "x = f(a, b)", "x=f(a)", "repeat N: B[i0] = f(A[i0], i0)", "repeat 2*N+1, 5: f(A[i0][i1], B[i1])", "repeat = f()", "repeat(x)"],
+                "invalid": ["f(,)", "x = f", "x = y = f()", "f(a b)", "repeat: f()", "repeat N f()", "repeat N: x = f", "f(A[])", "f(A[2])"]
+            },
+
+            "IO_line": {
+                "valid": ["N", "N  M K", "A[] B[][]", "A[]"],
+                "invalid": ["", "A []", "A[]B[]", "A[] B", "N, M", "A[][ ]"]
+            },
+        }
+
+        for rule in tests:
+            for string in tests[rule]["valid"]:
+                if self.match_tree(rule, string) is None:
+                    sys.exit("(ERROR) Should match: " + rule + " " + string)
+            for string in tests[rule]["invalid"]:
+                if self.match_tree(rule, string) is not None:
+                    sys.exit("(ERROR) Should not match: " + rule + " " + string)
+
+        pprint.PrettyPrinter(indent=4, width=150).pprint(self.match_tree("prototype", tests["prototype"]["valid"][2]))
+        print("\n\n\n")
+        pprint.PrettyPrinter(indent=4, width=150).pprint(self.match_tree("array", tests["array"]["valid"][2]))
@@ -0,0 +1,54 @@
+# In-memory interface, to use gradergen as a library (e.g. inside the worker
+# of a service): nothing is read from or written to the disk (apart from the
+# runtime libraries of gradergen), nothing is printed and errors are raised as
+# exceptions.
+
+import functools
+
+from gradergen import grader_generator
+
+# The parsed task.spec is immutable, so the same one can be used for many
+# generations (e.g. by gradergen serve, when only task.yaml or the languages
+# change) and by many threads.
+@functools.lru_cache(maxsize=256)
+def parse_task_spec_text(spec_text, using_include_grader):
+    return grader_generator.parse_task_spec_text(spec_text, using_include_grader)
+
+# Generates graders and templates and returns them as a dictionary
+# filename: source.
+#  - spec_text is the content of task.spec;
+#  - task_yaml is the dictionary parsed from task.yaml (only name, infile and
+#    outfile are used);
+#  - languages is a list whose elements are either the name of a language
+#    (e.g. "fast_C") or a list [lang, grader_name, template_name] as given to
+#    --lang (the names of grader and template may be omitted);
+#  - includes is a dictionary filename: content containing the
+#    include_grader.<extension> and include_callable.<extension> files.
+# The other arguments are the homonymous options of the command line.
+def generate(spec_text, task_yaml, languages, includes = None,
+             restrict = False, binary_input = False, binary_output = False,
+             instrument = False):
+    if includes is None:
+        includes = {}
+
+    task = grader_generator.read_task_yaml(task_yaml)
+    chosen_languages = grader_generator.choose_languages(
+        [[lang] if isinstance(lang, str) else lang for lang in languages])
+    include_grader, include_callable = grader_generator.find_includes(chosen_languages, includes.get)
+
+    data_manager = parse_task_spec_text(spec_text, bool(include_grader))
+    if restrict:
+        grader_generator.check_restrict(data_manager)
+
+    options = {
+        "restrict": restrict,
+        "binary_input": binary_input,
+        "binary_output": binary_output,
+        "instrument": instrument,
+        "force": False,
+    }
+    files = {}
+    for job in grader_generator.make_jobs(data_manager, chosen_languages, task,
+                                          include_grader, include_callable, options):
+        files.update(grader_generator.render_language(*job))
+    return files
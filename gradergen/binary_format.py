@@ -0,0 +1,185 @@
+import os
+import argparse # to parse command line arguments
+import struct
+
+from gradergen.structures import PrimitiveType, IOVariables, IOArrays
+
+# The binary format of the input (and of the output) of a grader.
+# The values are stored in the order in which the lines of the input (output)
+# section of task.spec list them, each one as a little-endian value of fixed
+# width. All the arrays of a line are stored one after the other, each one
+# as a whole and in row-major order (i.e. as the C graders keep it in memory),
+# while strings (arrays of chars) are stored without newlines.
+# E.g. with the input section
+#     N
+#     A[] B[]
+# the input is the int N, then the N values of A and then the N values of B.
+# If the input contains many testcases, their number comes first and then
+# each testcase, stored in the same way.
+BINARY_FORMATS = {
+    PrimitiveType.INT: "i",     # 32 bit integer
+    PrimitiveType.LONGINT: "q", # 64 bit integer
+    PrimitiveType.CHAR: "c",    # 1 byte
+    PrimitiveType.REAL: "d",    # IEEE 754 double
+}
+
+# Used to read the text format one token (or one char) at a time without
+# loading the whole file.
+class TokenReader:
+    BLOCK = 1 << 16
+    WHITESPACES = b" \t\n\v\f\r"
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = b""
+        self.position = 0
+
+    # Skips the whitespaces, returns False at the end of the file.
+    def skip_whitespaces(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in self.WHITESPACES:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return True
+            self.buffer = self.stream.read(self.BLOCK)
+            self.position = 0
+            if not self.buffer:
+                return False
+
+    def next_char(self):
+        if not self.skip_whitespaces():
+            raise EOFError("The input ended before all the values were read.")
+        self.position += 1
+        return self.buffer[self.position-1:self.position]
+
+    def next_token(self):
+        if not self.skip_whitespaces():
+            raise EOFError("The input ended before all the values were read.")
+        token = b""
+        while True:
+            end = self.position
+            while end < len(self.buffer) and self.buffer[end] not in self.WHITESPACES:
+                end += 1
+            token += self.buffer[self.position:end]
+            self.position = end
+            if end < len(self.buffer):
+                return token
+            self.buffer = self.stream.read(self.BLOCK)
+            self.position = 0
+            if not self.buffer:
+                return token
+
+    def next_value(self, type):
+        if type == PrimitiveType.CHAR:
+            return self.next_char()
+        elif type == PrimitiveType.REAL:
+            return float(self.next_token())
+        else:
+            return int(self.next_token())
+
+def evaluate(expression, values):
+    if expression.var is None:
+        return expression.const
+    if expression.var.name not in values:
+        raise ValueError("The value of {0} is not known, so the size of an "
+                         "array cannot be computed.".format(expression.var.name))
+    return expression.coef * values[expression.var.name] + expression.const
+
+# Converts the text format of the IO lines (data_manager.input_ or
+# data_manager.output) read by reader (a TokenReader) to the binary format,
+# written to destination. The values of the variables read are stored in
+# values (a dictionary name: value), as they are needed to know the sizes of
+# the arrays. The text is parsed one IO line at a time, so only the arrays of
+# a line are kept in memory.
+def convert_to_binary(io_lines, reader, destination, values):
+    for io_line in io_lines:
+        if type(io_line) == IOVariables:
+            for var in io_line.variables:
+                value = reader.next_value(var.type)
+                if var.type in [PrimitiveType.INT, PrimitiveType.LONGINT]:
+                    values[var.name] = value
+                destination.write(struct.pack("<" + BINARY_FORMATS[var.type], value))
+        elif type(io_line) == IOArrays:
+            count = 1
+            for size in io_line.sizes:
+                count *= evaluate(size, values)
+            # In the text format the values of the arrays are interleaved.
+            arrays = [[] for arr in io_line.arrays]
+            for i in range(count):
+                for j, arr in enumerate(io_line.arrays):
+                    arrays[j].append(reader.next_value(arr.type))
+            for j, arr in enumerate(io_line.arrays):
+                if arr.type == PrimitiveType.CHAR:
+                    destination.write(b"".join(arrays[j]))
+                else:
+                    destination.write(struct.pack("<{0}{1}".format(count, BINARY_FORMATS[arr.type]), *arrays[j]))
+
+# Converts the testcases described by data_manager: for each testcase the IO
+# lines of each triple (io_lines, reader, destination) in conversions are
+# converted in turn. If there are many testcases, their number is read first
+# by the reader of the first triple.
+def convert_testcases(data_manager, conversions, values):
+    count = 1
+    if data_manager.testcases is not None:
+        io_lines, reader, destination = conversions[0]
+        convert_to_binary([data_manager.testcases], reader, destination, values)
+        count = values[data_manager.testcases.variables[0].name]
+    for testcase in range(count):
+        for io_lines, reader, destination in conversions:
+            convert_to_binary(io_lines, reader, destination, values)
+
+# gradergen convert
+def convert_main(argv):
+    from gradergen.grader_generator import DESCRIPTION_FILE, parse_task_spec, search_file, set_exception_hook
+
+    parser = argparse.ArgumentParser(
+        prog = "gradergen convert",
+        description = "Convert an input (or output) file from the text format "
+                      "to the binary format of the graders generated with "
+                      "--binary_input (--binary_output)")
+    parser.add_argument(\
+        "source",
+        help = "the file in text format"
+    )
+    parser.add_argument(\
+        "destination",
+        help = "the file in binary format to be created"
+    )
+    parser.add_argument(\
+        "--task_spec",
+        metavar = "task_spec", action = "store", nargs = "?",
+        help = "the file describing the grader"
+    )
+    parser.add_argument(\
+        "--output",
+        metavar = "input_file", action = "store", nargs = "?",
+        help = "convert an output file, the sizes of its arrays are computed "
+               "from input_file (the input in text format)"
+    )
+    parser.add_argument(\
+        "--debug",
+        action = "store_true", default = False,
+        help = "whether to show the backtrace when an exception is raised"
+    )
+    args = parser.parse_args(argv)
+
+    set_exception_hook(args.debug)
+
+    if args.task_spec is None:
+        args.task_spec = search_file(DESCRIPTION_FILE)
+
+    # Prototypes defined in the grader are irrelevant for the conversion.
+    data_manager = parse_task_spec(args.task_spec, True)
+
+    # The output of each testcase is converted after its input, which gives
+    # the sizes of the arrays.
+    values = {}
+    with open(args.source, "rb") as source, open(args.destination, "wb") as destination:
+        if args.output is None:
+            convert_testcases(data_manager, [(data_manager.input_, TokenReader(source), destination)], values)
+            return
+        with open(args.output, "rb") as input_source, open(os.devnull, "wb") as devnull:
+            convert_testcases(data_manager, [
+                (data_manager.input_, TokenReader(input_source), devnull),
+                (data_manager.output, TokenReader(source), destination),
+            ], values)
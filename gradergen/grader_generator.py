@@ -3,37 +3,60 @@
 import sys
 import os
 import re # regexp, used to check variables and functions names
+import io
+import time
+import contextlib
 import argparse # to parse command line arguments
-import copy # to avoid making too many / too few "array allocations" in the grader
+import hashlib # to hash the files describing the task (see CACHE_FILE)
+import json
+import importlib # to import only the backends of the chosen languages
 import yaml # parse task.yaml
 
-from gradergen.RegexParser import RegexParser
-from gradergen.structures import Variable, Array, Parameter, Prototype, Call, IOVariables, IOArrays, Expression
-from gradergen.languages.C import LanguageC
-from gradergen.languages.CPP import LanguageCPP
-from gradergen.languages.pascal import LanguagePascal
+from gradergen import __version__
+from gradergen.SpecParser import SpecParser
+from gradergen.structures import PrimitiveType, Variable, Array, Access, Parameter, Prototype, Call, IOVariables, IOArrays, Expression
+from gradergen.binary_format import convert_main
+from gradergen.lowering import lower, ArrayPass, Allocate
+from gradergen.io_cost import text_volume, io_time
+from gradergen.languages import read_runtime_file
 
-LANGUAGES_LIST = ["C", "fast_C", "CPP", "fast_CPP", "pascal", "fast_pascal"]
+LANGUAGES_LIST = ["C", "fast_C", "mmap_C", "CPP", "fast_CPP", "mmap_CPP", "pascal", "fast_pascal"]
+# The module (in gradergen.languages) and the class of each language, which are
+# imported only if the language is chosen (see load_language), and fast_io.
 CLASSES_LIST = \
 {
-    "C": (LanguageC, 0),
-    "fast_C": (LanguageC, 1),
-    "CPP": (LanguageCPP, 0),
-    "fast_CPP": (LanguageCPP, 1),
-    "pascal": (LanguagePascal, 0),
-    "fast_pascal": (LanguagePascal, 1),
+    "C": ("C", "LanguageC", 0),
+    "fast_C": ("C", "LanguageC", 1),
+    "mmap_C": ("C", "LanguageC", 2),
+    "CPP": ("CPP", "LanguageCPP", 0),
+    "fast_CPP": ("CPP", "LanguageCPP", 1),
+    "mmap_CPP": ("CPP", "LanguageCPP", 2),
+    "pascal": ("pascal", "LanguagePascal", 0),
+    "fast_pascal": ("pascal", "LanguagePascal", 1),
 }
 EXTENSIONS_LIST = \
 {
     "C": "c",
     "fast_C": "c",
+    "mmap_C": "c",
     "CPP": "cpp",
     "fast_CPP": "cpp",
+    "mmap_CPP": "cpp",
     "pascal": "pas",
     "fast_pascal": "pas",
 }
 DESCRIPTION_FILE = "task.spec"
 TASK_YAML = "task.yaml"
+# The cache, saved in the folder of task.spec, holds the hash of everything
+# used in the last generation and the hashes of the generated files.
+CACHE_FILE = ".gradergen_cache"
+# How often (in seconds) --watch checks whether the files of the task changed.
+WATCH_INTERVAL = 0.3
+# The share of the time limit that the input and output of a grader may take,
+# according to the estimate of --auto, before fast input/output is chosen.
+AUTO_SHARE = 0.1
+# The parser written in C is much faster, but it might not be installed.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 class DataManager:
     def __init__(self):
@@ -44,7 +67,13 @@ class DataManager:
         self.input_ = [] 
         self.calls = []
         self.output = []
+        # The line (IOVariables) reading the number of testcases, if the input
+        # contains many testcases (the testcases section).
+        self.testcases = None
         self.used_names = set()
+        # The names of the variables (and arrays) whose value is known, i.e.
+        # read from the input or assigned by a call.
+        self.known = set()
 
     def add_new_name(self, name):
         if name in self.used_names:
@@ -69,24 +98,35 @@ class DataManager:
                                 .format(name))
         return self.variables[name]
     
+    def set_known(self, var):
+        self.known.add(var.name)
+
+    def is_known(self, var):
+        return var.name in self.known
+
     def get_prototype(self, name):
         if name not in self.prototypes:
             raise NameError("The function {0} was used without being declared."
                                 .format(name))
         return self.prototypes[name]
     
-    def make_copy(self):
-        return copy.deepcopy({
-            "variables": list(self.variables.values()),
-            "prototypes": list(self.prototypes.values()),
+    # The data is not copied, the languages must not modify it.
+    def make_data(self):
+        variables = list(self.variables.values())
+        prototypes = list(self.prototypes.values())
+        return {
+            "variables": variables,
+            "prototypes": prototypes,
             "input": self.input_,
             "calls": self.calls,
-            "output": self.output,        
-        })
+            "output": self.output,
+            # The steps emitted by the languages (see gradergen/lowering.py).
+            "lowered": lower(variables, prototypes, self.input_, self.calls, self.output, self.testcases),
+        }
 
 # Parsing grader description file
 def parse_specification_file(lines):
-    sections = {"variables": [], "prototypes": [], "calls": [], "input": [], "output": []}
+    sections = {"variables": [], "prototypes": [], "testcases": [], "calls": [], "input": [], "output": []}
     section_lines = {}
     act_section = None
     for line_number in range(len(lines)):
@@ -120,144 +160,332 @@ def raise_parsing_error(section, line_number, line):
     raise SyntaxError("The line {1}, in the {0} section, could not be parsed: {2}"
                           .format(section, line_number, line))
 
-def main():
-    global languages_serializer
-    global DESCRIPTION_FILE
-    global variables
-    global prototypes
-
-    parser = argparse.ArgumentParser(description = "Automatically generate graders and templates in various languages")
-    parser.add_argument(\
-        "--task_spec",
-        metavar = "task_spec", action = "store", nargs = "?",
-        help = "the file describing the grader"
-    )
-    parser.add_argument(\
-        "--task_yaml",
-        metavar = "task_yaml", action = "store", nargs = "?",
-        help = "the yaml file describing the task"
-    )
-    parser.add_argument(\
-        "--include_dir",
-        metavar = "include_dir", action = "store", nargs="?",
-        help = "the folder containing include_callable and include_grader"
-    )
-    parser.add_argument(\
-        "--debug",
-        action = "store_true", default = False,
-        help = "whether to show the backtrace when an exception is raised"
-    )
-
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument(\
-        "-l", "--lang",
-        nargs = "+",
-        metavar = ("lang", "filename"),
-        dest = "languages",
-        action = "append",
-        help = "programming language, grader and template"
-    )
-    group.add_argument(\
-        "-a", "--all",
-        action = "store_true",
-        default = False,
-        help = "create graders and templates in all supported languages (with standard names)"
-    )
-    group.add_argument(\
-        "--oii",
-        action = "store_true",
-        default = False,
-        help = "create graders and templates in all supported languages following "
-               "oii's standard (sol/ and att/)"
-    )
-    group.add_argument(\
-        "--stage",
-        nargs = "?",
-        metavar = "IO_type",
-        const = "normal",
-        default = False,
-        help = "create graders and templates in C++ following stages' standard "
-               "(sol/ and att/), IO_type (can be 'normal' or 'fast') decides "
-               "whether graders in sol/ must have fastIO or not"
-    )
-
-    args = parser.parse_args()
-
-    # Hiding backtrace if --debug is not set
-    if not args.debug:
+# Hiding backtrace if --debug is not set
+def set_exception_hook(debug):
+    if not debug:
         def NoBacktraceExpectionHandler(exception_type, exception, traceback):
             print("{0}: {1}".format(exception_type.__name__, exception),
                   file=sys.stderr)
         sys.excepthook = NoBacktraceExpectionHandler
-    
-    if args.task_spec is None:
-        # Search for a DESCRIPTION_FILE
-        directory = os.getcwd()
-        while True:
-            description = os.path.join(directory, DESCRIPTION_FILE)
 
-            if os.path.isfile(description):
-                args.task_spec = description
-                break
+# Search for the file in the current directory and in its ancestors
+def search_file(file_name):
+    directory = os.getcwd()
+    while True:
+        path = os.path.join(directory, file_name)
 
-            if os.path.dirname(directory) == directory:
-                break
-            else:
-                directory = os.path.dirname(directory)
+        if os.path.isfile(path):
+            return path
 
-    if args.task_spec is None:
-        raise FileNotFoundError("The {0} file cannot be found."
-                                    .format(DESCRIPTION_FILE))
+        if os.path.dirname(directory) == directory:
+            break
+        else:
+            directory = os.path.dirname(directory)
 
-    if args.task_yaml is None:
-        # Search for a TASK_YAML
-        directory = os.getcwd()
-        while True:
-            task_yaml = os.path.join(directory, TASK_YAML)
+    raise FileNotFoundError("The {0} file cannot be found."
+                                .format(file_name))
 
-            if os.path.isfile(task_yaml):
-                args.task_yaml = task_yaml
-                break
+def hash_file(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
-            if os.path.dirname(directory) == directory:
-                break
+# The key of the cache, it depends on everything the generated files depend on:
+# the files describing the task, the include files, the runtime libraries
+# inserted in the graders, the options and the version of gradergen.
+def cache_key(args, chosen_languages, include_grader, include_callable):
+    options = {
+        "version": __version__,
+        "task_spec": hash_file(args.task_spec),
+        "task_yaml": hash_file(args.task_yaml),
+        "languages": [(lang, os.path.abspath(grader_name), os.path.abspath(template_name))
+                      for lang, grader_name, template_name in chosen_languages],
+        "include_grader": include_grader,
+        "include_callable": include_callable,
+        "runtime": {name: hashlib.sha256(read_runtime_file(name).encode()).hexdigest()
+                    for lang, grader_name, template_name in chosen_languages
+                    for name in runtime_files(lang)},
+        "restrict": args.restrict,
+        "binary_input": args.binary_input,
+        "binary_output": args.binary_output,
+        "instrument": args.instrument,
+        "auto": args.auto,
+    }
+    return hashlib.sha256(json.dumps(options, sort_keys=True).encode()).hexdigest()
+
+# The cache is a hit if the key is the same of the last generation and the
+# generated files were not modified (or deleted) since then.
+def cache_hit(cache_path, key):
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+        if cache["key"] != key:
+            return False
+        for path, digest in cache["files"].items():
+            if hash_file(path) != digest:
+                return False
+    except (OSError, ValueError, KeyError):
+        return False
+    return True
+
+def write_cache(cache_path, key, written_files):
+    cache = {
+        "key": key,
+        "files": {os.path.abspath(path): hash_file(path) for path in written_files},
+    }
+    # The cache is only an optimization, it does not matter if it cannot be
+    # written (e.g. the folder of the task is read-only).
+    try:
+        with open(cache_path, "w") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
+
+# Parsing specication file (task.spec)
+# using_include_grader is needed only to know whether prototypes can be
+# defined in the grader.
+def parse_task_spec(task_spec_path, using_include_grader):
+    with open(task_spec_path, "r") as task_spec:
+        return parse_task_spec_text(task_spec.read(), using_include_grader)
+
+# As parse_task_spec, but the content of task.spec is given.
+def parse_task_spec_text(task_spec_text, using_include_grader):
+    section_lines = parse_specification_file(task_spec_text.splitlines())
+
+    # Here all the data is parsed from task.spec using spec_parser and inserted
+    # in data_manager. All compilation-like checks are done by the constructor
+    # of each object so as to not have to check anything here.
+    spec_parser = SpecParser()
+    data_manager = DataManager()    
+
+    try:
+        # Parsing variables
+        for line_number, line in section_lines["variables"]:
+            match_tree = spec_parser.match_tree("declaration", line)
+            if match_tree is None:
+                raise_parsing_error("variables", line_number, line)
+            elif "sizes" in match_tree:
+                new_array = Array(match_tree, data_manager)
+                data_manager.add_variable(new_array)
             else:
-                directory = os.path.dirname(directory)
+                new_variable = Variable(match_tree)
+                data_manager.add_variable(new_variable)
 
-    if args.task_yaml is None:
-        raise FileNotFoundError("The {0} file cannot be found."
-                                    .format(TASK_YAML))
+        # Parsing prototypes
+        for line_number, line in section_lines["prototypes"]:
+            match_tree = spec_parser.match_tree("prototype", line)
+            if match_tree is None:
+                raise_parsing_error("prototypes", line_number, line)
+            new_proto = Prototype(match_tree, using_include_grader)
+            data_manager.add_prototype(new_proto)
 
+        # Parsing testcases (optional): the variable read at the beginning of
+        # the input with the number of testcases, each one made of input,
+        # calls and output.
+        for line_number, line in section_lines.get("testcases", []):
+            match_tree = spec_parser.match_tree("IO_line", line)
+            if match_tree is None or "arrays" in match_tree:
+                raise_parsing_error("testcases", line_number, line)
+            testcases = IOVariables(match_tree, data_manager, "input")
+            if data_manager.testcases is not None or len(testcases.variables) != 1 \
+                    or testcases.variables[0].type not in [PrimitiveType.INT, PrimitiveType.LONGINT]:
+                raise ValueError("The testcases section must contain only the "
+                                 "variable (int or longint) with the number of "
+                                 "testcases.")
+            data_manager.testcases = testcases
+            data_manager.set_known(testcases.variables[0])
 
-    # Parsing task.yaml
-    task_yaml = yaml.safe_load(open(task_yaml, "rt", encoding="utf-8"))
+        # Parsing input
+        for line_number, line in section_lines["input"]:
+            match_tree = spec_parser.match_tree("IO_line", line)
+            if match_tree is None:
+                raise_parsing_error("input", line_number, line)
+            elif "arrays" in match_tree:
+                new_input = IOArrays(match_tree, data_manager, "input")
+                data_manager.input_.append(new_input)
+                for arr in new_input.arrays:
+                    data_manager.set_known(arr)
+            else:
+                new_input = IOVariables(match_tree, data_manager, "input")
+                data_manager.input_.append(new_input)
+                for var in new_input.variables:
+                    data_manager.set_known(var)
+
+        # Parsing calls
+        for line_number, line in section_lines["calls"]:
+            match_tree = spec_parser.match_tree("call", line)
+            if match_tree is None:
+                raise_parsing_error("calls", line_number, line)
+            new_call = Call(match_tree, data_manager)
+            data_manager.calls.append(new_call)
+            for param, by_ref in new_call.parameters:
+                if by_ref:
+                    data_manager.set_known(param)
+            if new_call.return_var is not None:
+                data_manager.set_known(new_call.return_var)
+
+        # Parsing output
+        for line_number, line in section_lines["output"]:
+            match_tree = spec_parser.match_tree("IO_line", line)
+            if match_tree is None:
+                raise_parsing_error("output", line_number, line)
+            elif "arrays" in match_tree:
+                new_output = IOArrays(match_tree, data_manager, "output")
+                data_manager.output.append(new_output)
+            else:
+                new_output = IOVariables(match_tree, data_manager, "output")
+                data_manager.output.append(new_output)
+    except Exception as e:
+        error_message = \
+            "{2}\nError at line {0}: {1}".format(line_number, line, str(e))
+        raise type(e)(error_message).with_traceback(sys.exc_info()[2])
+
+    return data_manager
+
+# Returns name, infile and outfile of the task described by task_yaml (the
+# dictionary parsed from task.yaml).
+def read_task_yaml(task_yaml):
     try:
-        task_name = task_yaml["name"]
-        input_file = task_yaml["infile"]
-        output_file = task_yaml["outfile"]
+        return task_yaml["name"], task_yaml["infile"], task_yaml["outfile"]
     except KeyError:
         raise KeyError("The task.yaml file must contain name, infile and outfile.")
 
-    # End of parsing task.yaml
+# Returns the upper bounds of the variables (bounds in task.yaml, a mapping
+# name: value) and the time limit (None if not given).
+def read_task_limits(task_yaml):
+    bounds = task_yaml.get("bounds") or {}
+    if not isinstance(bounds, dict) or not all(isinstance(value, int) for value in bounds.values()):
+        raise ValueError("The bounds in task.yaml must map the names of the "
+                         "variables to integers.")
+    return {str(name): value for name, value in bounds.items()}, task_yaml.get("time_limit")
 
-    # --all, --stage, --oii
-    if args.all:
-        args.languages = [[lang] for lang in LANGUAGES_LIST]
+# Returns a list of triples (lang, grader_name, template_name) given a list
+# of lists [lang, grader_name, template_name] (as given to --lang), where the
+# names of the files may be omitted.
+def choose_languages(languages):
+    chosen_languages = []
+    for lang_options in languages:
+        lang_options = list(lang_options)
+        lang = lang_options[0]
+        if lang not in LANGUAGES_LIST:
+            raise NotImplementedError("One of the specified languages is not "
+                                      "currently supported.")
+
+        # grader.extension is the standard name for graders
+        if len(lang_options) <= 1:
+            io_prefix = lang.split("_")[0] + "_" if "_" in lang else ""
+            grader_name = "{0}grader.{1}".format(io_prefix, EXTENSIONS_LIST[lang])
+            lang_options.append(grader_name)
+
+        # template_lang.extension is the standard name for templates
+        if len(lang_options) <= 2:
+            template_name = "template_{0}.{1}".format(lang, EXTENSIONS_LIST[lang])
+            lang_options.append(template_name)
+
+        if len(lang_options) > 3:
+            raise ValueError("For each language you can specify, at most, the "
+                             "names of grader and template.")
+
+        chosen_languages.append((lang, lang_options[1], lang_options[2]))
+    return chosen_languages
+
+# Returns the dictionaries (lang: content) of include_grader and
+# include_callable. read_include(filename) returns the content of the file or
+# None if it does not exist.
+def find_includes(chosen_languages, read_include):
+    include_grader = {}
+    include_callable = {}
+    for lang, grader_name, template_name in chosen_languages:
+        ext = EXTENSIONS_LIST[lang]
+        content = read_include("include_grader." + ext)
+        if content is not None:
+            include_grader[lang] = content
+        content = read_include("include_callable." + ext)
+        if content is not None:
+            include_callable[lang] = content
+
+    if include_grader and len(include_grader) != len(chosen_languages):
+        raise FileNotFoundError("The include_grader file has to exist for "
+                                "all or for none of the chosen languages.")
 
+    if include_callable and len(include_callable) != len(chosen_languages):
+        raise FileNotFoundError("The include_callable file has to exist for "
+                                "all or for none of the chosen languages.")
+
+    return include_grader, include_callable
+
+# --restrict
+def check_restrict(data_manager):
+    for call in data_manager.calls:
+        arrays = [var.name for (var, by_ref) in call.parameters
+                  if type(var) == Array or type(var) == Access and var.dim > 0]
+        if len(arrays) != len(set(arrays)):
+            raise ValueError("--restrict cannot be used if the same array "
+                             "is passed twice to {0}.".format(call.name))
+
+# Returns the arguments of emit_language (or render_language) for each one of
+# the chosen languages. task is the triple returned by read_task_yaml, options
+# contains restrict, binary_input, binary_output, instrument and force.
+def make_jobs(data_manager, chosen_languages, task, include_grader, include_callable, options):
+    task_name, input_file, output_file = task
+    shared_data = data_manager.make_data()
+    jobs = []
+    for lang, grader_name, template_name in chosen_languages:
+        data = {
+            **shared_data,
+            **options,
+            "task_name": task_name,
+            "input_file": input_file,
+            "output_file": output_file,
+        }
+        if lang in include_grader:
+            data["include_grader"] = include_grader[lang]
+        if lang in include_callable:
+            data["include_callable"] = include_callable[lang]
+
+        jobs.append((lang, grader_name, template_name, data))
+    return jobs
+
+# Returns the class of lang and its fast_io.
+def load_language(lang):
+    module_name, class_name, fast_io = CLASSES_LIST[lang]
+    module = importlib.import_module("gradergen.languages." + module_name)
+    return getattr(module, class_name), fast_io
+
+# The runtime libraries inserted in the graders of lang.
+def runtime_files(lang):
+    LangClass, fast_io = load_language(lang)
+    return LangClass.runtime_files(fast_io)
+
+# Writes grader and template of lang, returning the names of the files written.
+def emit_language(lang, grader_name, template_name, data):
+    LangClass, fast_io = load_language(lang)
+    return LangClass(fast_io, data).write_files(grader_name, template_name)
+
+# As emit_language, but returns the files (filename: source) without writing.
+def render_language(lang, grader_name, template_name, data):
+    LangClass, fast_io = load_language(lang)
+    return LangClass(fast_io, data).generate_files(grader_name, template_name)
+
+# Returns the languages (as given to --lang) chosen by --lang, --all, --stage,
+# --oii or --auto.
+def layout_languages(args, task_name):
     if args.stage or args.oii:
         if args.include_dir is not None:
             raise ValueError("--include_dir is not supported with --stage or "
                              "--oii, use gradergen/.")
 
+    languages = args.languages
+    if args.all:
+        languages = [[lang] for lang in LANGUAGES_LIST]
+
     if args.stage:
-        args.include_dir = "gradergen"
         if args.stage == "fast":
-            args.languages = [
+            languages = [
                 ["CPP", "att/grader.cpp", "att/"+task_name+".cpp"],
                 ["fast_CPP", "sol/grader.cpp", "sol/template_cpp.cpp"]
             ]
         elif args.stage == "normal":
-            args.languages = [
+            languages = [
                 ["CPP", "att/grader.cpp", "att/"+task_name+".cpp"],
                 ["CPP", "sol/grader.cpp", "sol/template_cpp.cpp"]
             ]
@@ -265,9 +493,15 @@ def main():
             raise ValueError("The argument of --stage must be `normal`, "
                              "`fast` or empty.")
     
+    # The graders get the standard names, whether fast input/output is chosen
+    # (see auto_languages) or not. The cost model covers only C and C++ (see
+    # io_costs), so pascal is left out.
+    if args.auto is not None:
+        languages = [[lang, "grader." + EXTENSIONS_LIST[lang], "template_{0}.{1}".format(lang, EXTENSIONS_LIST[lang])]
+                     for lang in ("C", "CPP")]
+
     if args.oii:
-        args.include_dir = "gradergen"
-        args.languages = [
+        languages = [
             ["CPP", "att/grader.cpp", "att/"+task_name+".cpp"],
             ["fast_CPP", "sol/grader.cpp", "sol/template_cpp.cpp"],
             ["C", "att/grader.c", "att/"+task_name+".c"],
@@ -279,159 +513,577 @@ def main():
     if args.stage or args.oii:
         if not os.path.isdir("att/"):
             raise IOError("Please create the folder att/.")
-    
-    chosen_languages = []
-    for lang_options in args.languages:
-        lang = lang_options[0]
-        if lang not in LANGUAGES_LIST:
-            raise NotImplementedError("One of the specified languages is not "
-                                      "currently supported.")
 
-        # grader.extension is the standard name for graders
-        if len(lang_options) <= 1:
-            grader_name = "{0}grader.{1}".format("fast_" if ("fast" in lang) else "", EXTENSIONS_LIST[lang])
-            lang_options.append(grader_name)
+    return languages
 
-        # template_lang.extension is the standard name for templates
-        if len(lang_options) <= 2:
-            template_name = "template_{0}.{1}".format(lang, EXTENSIONS_LIST[lang])
-            lang_options.append(template_name)
+# The folder containing include_grader and include_callable.
+def include_directory(args):
+    if args.stage or args.oii:
+        return "gradergen"
+    if args.include_dir is not None:
+        return args.include_dir
+    return os.path.dirname(args.task_spec)
 
-        if len(lang_options) > 3:
-            raise ValueError("For each language you can specify, at most, the "
-                             "names of grader and template.")
+# Returns the read_include function (see find_includes) reading the include
+# files from include_dir.
+def include_reader(include_dir):
+    def read_include(filename):
+        try:
+            with open(os.path.join(include_dir, filename)) as f:
+                return f.read()
+        except IOError:
+            return None
+    return read_include
+
+# The options of make_jobs given by the command line.
+def generation_options(args):
+    return {
+        "restrict": args.restrict,
+        "binary_input": args.binary_input,
+        "binary_output": args.binary_output,
+        "instrument": args.instrument,
+        "force": args.force,
+    }
+
+# Emits the jobs returned by make_jobs, returning the list of the names of the
+# files written for each one.
+def emit_jobs(jobs, parallel):
+    # The languages are independent, so they are emitted in parallel.
+    if parallel and len(jobs) > 1:
+        import concurrent.futures
+        with concurrent.futures.ProcessPoolExecutor(len(jobs)) as pool:
+            futures = [pool.submit(emit_language, *job) for job in jobs]
+            return [future.result() for future in futures]
+    return [emit_language(*job) for job in jobs]
+
+# The estimated time (in seconds) spent reading the input and writing the
+# output by the graders of lang, given the upper bounds of the variables (see
+# gradergen/io_cost.py).
+def estimate_io_time(lang, data_manager, bounds, options):
+    LangClass, fast_io = load_language(lang)
+    input_volume = text_volume(data_manager.input_, bounds)
+    output_volume = text_volume(data_manager.output, bounds)
+    # Each testcase is assumed to be as large as the bounds allow.
+    if data_manager.testcases is not None:
+        testcases = data_manager.testcases.variables[0]
+        if testcases.name not in bounds:
+            raise ValueError("The value of {0} is needed to know the number of "
+                             "testcases.".format(testcases.name))
+        input_volume = [amount * bounds[testcases.name] for amount in input_volume]
+        output_volume = [amount * bounds[testcases.name] for amount in output_volume]
+    return io_time(LangClass, fast_io, input_volume, output_volume,
+                   options["binary_input"], options["binary_output"])
+
+# --auto
+# Returns the chosen languages where the ones whose input and output would
+# take more than share of the time limit are replaced by their version with
+# fast input/output.
+def auto_languages(data_manager, chosen_languages, limits, share, options):
+    bounds, time_limit = limits
+    if time_limit is None:
+        raise ValueError("--auto needs the time_limit in task.yaml.")
+    if share <= 0:
+        raise ValueError("The argument of --auto must be positive.")
+
+    languages = []
+    for lang, grader_name, template_name in chosen_languages:
+        if estimate_io_time(lang, data_manager, bounds, options) > share * time_limit:
+            lang = "fast_" + lang
+        languages.append((lang, grader_name, template_name))
+    return languages
+
+# The estimate of the time spent in input and output by the graders of lang,
+# printed next to their names (empty if the bounds of the variables or the
+# costs of lang are not known). The graders with fast input/output are
+# compared to the standard ones.
+def io_time_note(lang, data_manager, bounds, options):
+    if not bounds or load_language(lang)[0].io_costs is None:
+        return ""
+    try:
+        note = "(estimated I/O time: {0:.2f} s".format(estimate_io_time(lang, data_manager, bounds, options))
+        if "_" in lang:
+            standard_lang = lang.split("_")[1]
+            note += ", {0:.2f} s without fast I/O".format(estimate_io_time(standard_lang, data_manager, bounds, options))
+    except ValueError: # Some bounds are missing
+        return ""
+    return note + ")"
+
+# Generates graders and templates of the task described by args, the files
+# not given explicitly are searched starting from the current directory.
+# If parallel is True the languages are emitted by a pool of processes.
+def generate(args, parallel=True):
+    if args.task_spec is None:
+        args.task_spec = search_file(DESCRIPTION_FILE)
+
+    if args.task_yaml is None:
+        args.task_yaml = search_file(TASK_YAML)
+
+
+    # Parsing task.yaml
+    with open(args.task_yaml, "rt", encoding="utf-8") as f:
+        task_yaml = yaml.load(f, Loader=YAML_LOADER)
+    task = read_task_yaml(task_yaml)
+    limits = read_task_limits(task_yaml)
+    task_name = task[0]
+
+    # End of parsing task.yaml
+
+    chosen_languages = choose_languages(layout_languages(args, task_name))
 
-        chosen_languages.append((lang, lang_options[1], lang_options[2]))
-    
     # Searching for include_grader and include_callable
-    include_dir = os.path.dirname(args.task_spec)
-    if args.include_dir is not None:
-        include_dir = args.include_dir
+    read_include = include_reader(include_directory(args))
+    include_grader, include_callable = find_includes(chosen_languages, read_include)
+
+    options = generation_options(args)
+    data_manager = None
+    # The languages chosen by --auto depend on task.spec, so it is parsed
+    # before checking the cache.
+    if args.auto is not None:
+        data_manager = parse_task_spec(args.task_spec, include_grader)
+        chosen_languages = auto_languages(data_manager, chosen_languages, limits, args.auto, options)
+        include_grader, include_callable = find_includes(chosen_languages, read_include)
+
+    # If nothing changed since the last generation there is nothing to do.
+    cache_path = os.path.join(os.path.dirname(args.task_spec), CACHE_FILE)
+    key = cache_key(args, chosen_languages, include_grader, include_callable)
+    if not args.force and cache_hit(cache_path, key):
+        print("Graders and templates are up to date (use --force to generate "
+              "them anyway).")
+        return
+
+    if data_manager is None:
+        data_manager = parse_task_spec(args.task_spec, include_grader)
+
+    if args.restrict:
+        check_restrict(data_manager)
 
-    include_grader = {}
     for lang, grader_name, template_name in chosen_languages:
-        ext = EXTENSIONS_LIST[lang]
+        note = io_time_note(lang, data_manager, limits[0], options)
+        if note:
+            print(grader_name, template_name, note)
+        else:
+            print(grader_name, template_name)
+
+    jobs = make_jobs(data_manager, chosen_languages, task, include_grader,
+                     include_callable, options)
+    written_files = [name for files in emit_jobs(jobs, parallel) for name in files]
+
+    write_cache(cache_path, key, written_files)
+
+# --estimate-memory
+# Returns the values (name: value) of the variables given as name=value.
+def parse_bounds(assignments):
+    bounds = {}
+    for assignment in assignments:
+        name, equal, value = assignment.partition("=")
         try:
-            with open(os.path.join(include_dir, "include_grader." + ext)) as f:
-                include_grader[lang] = f.read()
-        except IOError:
-            pass
-        
-        
-    if include_grader and len(include_grader) != len(chosen_languages):
-        raise FileNotFoundError("The include_grader file has to exist for "
-                                "all or for none of the chosen languages.")
-    
-    include_callable = {}
+            bounds[name.strip()] = int(value)
+        except ValueError:
+            equal = ""
+        if not equal:
+            raise ValueError("The values of the variables must be given as "
+                             "name=value (with an integer value), not {0}."
+                                 .format(assignment))
+    return bounds
+
+# Returns the memory allocated for the arrays by the graders of the chosen
+# languages when the variables have the given values (name: value), as a list
+# with a triple (languages, arrays, total) for each backend, where the
+# languages share the same layout and arrays is a list of triples (name, bytes
+# of the elements, bytes of the overhead of the layout, e.g. the row pointers).
+def estimate_memory(data_manager, chosen_languages, bounds):
+    lowered = data_manager.make_data()["lowered"]
+    allocated = []
+    for step in lowered.input + lowered.calls:
+        if type(step) == ArrayPass:
+            allocated.extend(step.allocate)
+        elif type(step) == Allocate:
+            allocated.extend(step.arrays)
+
+    sizes = {arr.name: arr.evaluate_sizes(bounds) for arr in allocated}
+
+    estimates = []
+    classes = []
     for lang, grader_name, template_name in chosen_languages:
-        ext = EXTENSIONS_LIST[lang]
-        try:
-            with open(os.path.join(include_dir, "include_callable." + ext)) as f:
-                include_callable[lang] = f.read()
-        except IOError:
-            pass
-    
-    if include_callable and len(include_callable) != len(chosen_languages):
-        raise FileNotFoundError("The include_callable file has to exist for "
-                                "all or for none of the chosen languages.")
-    
+        LangClass, fast_io = load_language(lang)
+        if LangClass in classes:
+            if lang not in estimates[classes.index(LangClass)][0]:
+                estimates[classes.index(LangClass)][0].append(lang)
+            continue
+        arrays = [(arr.name,) + LangClass.array_bytes(arr.type, sizes[arr.name]) for arr in allocated]
+        total = sum(elements + overhead for name, elements, overhead in arrays)
+        classes.append(LangClass)
+        estimates.append(([lang], arrays, total))
+    return estimates
 
-    # Parsing specication file (task.spec)
-    with open(args.task_spec, "r") as task_spec:
-        lines = task_spec.read().splitlines()
-        section_lines = parse_specification_file(lines)
-        
-    # Here all the data is parsed from task.spec using regex_parser and inserted
-    # in data_manager. All compilation-like checks are done by the constructor
-    # of each object so as to not have to check anything here.
-    regex_parser = RegexParser()
-    data_manager = DataManager()    
+def estimate(args):
+    if args.task_spec is None:
+        args.task_spec = search_file(DESCRIPTION_FILE)
 
+    if args.task_yaml is None:
+        args.task_yaml = search_file(TASK_YAML)
+
+    with open(args.task_yaml, "rt", encoding="utf-8") as f:
+        task_yaml = yaml.load(f, Loader=YAML_LOADER)
+    task = read_task_yaml(task_yaml)
+    chosen_languages = choose_languages(layout_languages(args, task[0]))
+    read_include = include_reader(include_directory(args))
+    include_grader, include_callable = find_includes(chosen_languages, read_include)
+    data_manager = parse_task_spec(args.task_spec, include_grader)
+
+    # The values given override the bounds in task.yaml.
+    bounds = read_task_limits(task_yaml)[0]
+    bounds.update(parse_bounds(args.estimate_memory))
+    for languages, arrays, total in estimate_memory(data_manager, chosen_languages, bounds):
+        print(", ".join(languages))
+        width = max([len(name) for name, elements, overhead in arrays] + [len("total")])
+        for name, elements, overhead in arrays:
+            line = "    {0} {1:>15} bytes".format(name.ljust(width), elements + overhead)
+            if overhead > 0:
+                line += " ({0} of overhead)".format(overhead)
+            print(line)
+        print("    {0} {1:>15} bytes ({2:.1f} MiB)".format("total".ljust(width), total, total / 2**20))
+
+# The modification time and the size of the file (None if it does not exist),
+# --watch compares them to notice cheaply that a file changed.
+def file_state(path):
     try:
-        # Parsing variables
-        for line_number, line in section_lines["variables"]:
-            if regex_parser.FullMatch("variable", line):
-                match_tree = regex_parser.MatchTree("variable", line)
-                new_variable = Variable(match_tree)
-                data_manager.add_variable(new_variable)
-            elif regex_parser.FullMatch("array", line):
-                match_tree = regex_parser.MatchTree("array", line)
-                new_array = Array(match_tree, data_manager)
-                data_manager.add_variable(new_array)
-            else:
-                raise_parsing_error("variables", line_number, line)
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
 
-        # Parsing prototypes
-        for line_number, line in section_lines["prototypes"]:
-            if regex_parser.FullMatch("prototype", line):
-                match_tree = regex_parser.MatchTree("prototype", line)
-                new_proto = Prototype(match_tree, include_grader)
-                data_manager.add_prototype(new_proto)
-            else:
-                raise_parsing_error("prototypes", line_number, line)
+# --watch
+# Generates graders and templates and then, whenever task.spec, task.yaml or an
+# include file changes, generates again those of the languages whose inputs
+# changed (e.g. only the pascal ones if include_callable.pas changed).
+# task.spec is parsed again only if it changed.
+def watch(args):
+    if args.task_spec is None:
+        args.task_spec = search_file(DESCRIPTION_FILE)
 
-        # Parsing input
-        for line_number, line in section_lines["input"]:
-            if regex_parser.FullMatch("IO_variables", line):
-                match_tree = regex_parser.MatchTree("IO_variables", line)
-                new_input = IOVariables(match_tree, data_manager, "input")
-                data_manager.input_.append(new_input)
-                for var in new_input.variables:
-                    var.known = True
-            elif regex_parser.FullMatch("IO_arrays", line):
-                match_tree = regex_parser.MatchTree("IO_arrays", line)
-                new_input = IOArrays(match_tree, data_manager, "input")
-                data_manager.input_.append(new_input)
-                for arr in new_input.arrays:
-                    arr.known = True
-            else:
-                raise_parsing_error("input", line_number, line)
+    if args.task_yaml is None:
+        args.task_yaml = search_file(TASK_YAML)
 
-        # Parsing calls
-        for line_number, line in section_lines["calls"]:
-            if regex_parser.FullMatch("call", line):
-                match_tree = regex_parser.MatchTree("call", line)
-                new_call = Call(match_tree, data_manager)
-                data_manager.calls.append(new_call)
-                for param, by_ref in new_call.parameters:
-                    if by_ref:
-                        param.known = True
-                if new_call.return_var is not None:
-                    new_call.return_var.known = True
-            else:
-                raise_parsing_error("calls", line_number, line)
+    include_dir = include_directory(args)
+    read_include = include_reader(include_dir)
+    watched_files = [args.task_spec, args.task_yaml]
+    for ext in sorted(set(EXTENSIONS_LIST.values())):
+        watched_files.append(os.path.join(include_dir, "include_grader." + ext))
+        watched_files.append(os.path.join(include_dir, "include_callable." + ext))
+    cache_path = os.path.join(os.path.dirname(args.task_spec), CACHE_FILE)
+    options = generation_options(args)
 
-        # Parsing output
-        for line_number, line in section_lines["output"]:
-            if regex_parser.FullMatch("IO_variables", line):
-                match_tree = regex_parser.MatchTree("IO_variables", line)
-                new_output = IOVariables(match_tree, data_manager, "output")
-                data_manager.output.append(new_output)
-            elif regex_parser.FullMatch("IO_arrays", line):
-                match_tree = regex_parser.MatchTree("IO_arrays", line)
-                new_output = IOArrays(match_tree, data_manager, "output")
-                data_manager.output.append(new_output)
+    parsed = None # task.spec, using_include_grader and the data_manager parsed
+    generated = {} # (lang, grader_name, template_name): (inputs, written files)
+
+    def generate_changed(states):
+        nonlocal parsed, generated
+
+        with open(args.task_yaml, "rt", encoding="utf-8") as f:
+            task = read_task_yaml(yaml.load(f, Loader=YAML_LOADER))
+        chosen_languages = choose_languages(layout_languages(args, task[0]))
+        include_grader, include_callable = find_includes(chosen_languages, read_include)
+        with open(args.task_spec, "r") as f:
+            task_spec = f.read()
+
+        if parsed is None or parsed[:2] != (task_spec, bool(include_grader)):
+            data_manager = parse_task_spec_text(task_spec, bool(include_grader))
+            if args.restrict:
+                check_restrict(data_manager)
+            parsed = (task_spec, bool(include_grader), data_manager)
+
+        # The inputs of each language, it is generated again if they changed.
+        inputs = {}
+        for lang, grader_name, template_name in chosen_languages:
+            inputs[(lang, grader_name, template_name)] = \
+                (task_spec, task, bool(include_grader),
+                 include_grader.get(lang), include_callable.get(lang))
+
+        key = cache_key(args, chosen_languages, include_grader, include_callable)
+        if not generated and not args.force and cache_hit(cache_path, key):
+            with open(cache_path, "r") as f:
+                files = list(json.load(f)["files"])
+            generated = {language: (inputs[language], files) for language in inputs}
+            print("Graders and templates are up to date.")
+            return
+
+        jobs = [job for job in make_jobs(parsed[2], chosen_languages, task,
+                                         include_grader, include_callable, options)
+                if generated.get(tuple(job[:3]), (None,))[0] != inputs[tuple(job[:3])]]
+        # Usually few languages change, so they are emitted here rather than
+        # paying for a pool of processes.
+        results = emit_jobs(jobs, parallel=False)
+        generated = {language: generated[language] for language in inputs
+                     if language in generated}
+        for job, files in zip(jobs, results):
+            generated[tuple(job[:3])] = (inputs[tuple(job[:3])], files)
+            print(job[1], job[2])
+        if not jobs:
+            print("Nothing to generate again.")
+
+        # If a file changed meanwhile it is generated again, so the cache is
+        # written only if the generated files are up to date.
+        if [file_state(path) for path in watched_files] == states:
+            written_files = sorted(set(name for language in generated
+                                            for name in generated[language][1]))
+            write_cache(cache_path, key, written_files)
+
+    print("Watching {0} (press Ctrl-C to stop).".format(", ".join(
+        os.path.relpath(path) for path in watched_files[:2])))
+    states = None
+    try:
+        while True:
+            new_states = [file_state(path) for path in watched_files]
+            if new_states != states:
+                states = new_states
+                # While the task is being written, an error must not stop it.
+                try:
+                    generate_changed(states)
+                except Exception as e:
+                    if args.debug:
+                        import traceback
+                        traceback.print_exc()
+                    else:
+                        print("{0}: {1}".format(type(e).__name__, e), file=sys.stderr)
+            time.sleep(WATCH_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+
+# Searches the task directories (the ones containing task.spec) among the given
+# directories and their subdirectories. Tasks are not nested, so the
+# subdirectories of a task are not searched.
+def find_tasks(directories):
+    tasks = []
+    for root in directories:
+        if not os.path.isdir(root):
+            raise FileNotFoundError("The directory {0} does not exist."
+                                        .format(root))
+        for directory, subdirectories, files in os.walk(root):
+            if DESCRIPTION_FILE in files:
+                tasks.append(os.path.abspath(directory))
+                subdirectories.clear()
             else:
-                raise_parsing_error("output", line_number, line)
+                subdirectories.sort()
+    return sorted(set(tasks))
+
+# Generates the task in directory, returning the error message (None if there
+# was no error) and the time taken. It runs in a process of the pool, so it can
+# change the working directory.
+def generate_task(directory, args):
+    start = time.perf_counter()
+    try:
+        os.chdir(directory)
+        # The tasks are already generated in parallel.
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate(args, parallel=False)
     except Exception as e:
-        error_message = \
-            "{2}\nError at line {0}: {1}".format(line_number, line, str(e))
-        raise type(e)(error_message).with_traceback(sys.exc_info()[2])
-    # End of parsing specification file
+        error = "{0}: {1}".format(type(e).__name__, e)
+    else:
+        error = None
+    return error, time.perf_counter() - start
 
-    for lang, grader_name, template_name in chosen_languages:
-        print(grader_name, template_name)
+# --tasks
+def generate_tasks(args):
+    if args.task_spec is not None or args.task_yaml is not None:
+        raise ValueError("--task_spec and --task_yaml cannot be used with "
+                         "--tasks, each task uses its own files.")
+    if args.jobs is not None and args.jobs < 1:
+        raise ValueError("The argument of --jobs must be positive.")
 
-        data = {
-            **data_manager.make_copy(),
-            "task_name": task_name,
-            "input_file": input_file,
-            "output_file": output_file,
-        }
-        if lang in include_grader:
-            data["include_grader"] = include_grader[lang]
-        if lang in include_callable:
-            data["include_callable"] = include_callable[lang]
+    tasks = find_tasks(args.tasks)
+    if not tasks:
+        raise FileNotFoundError("No {0} file was found in the given directories."
+                                    .format(DESCRIPTION_FILE))
+
+    # Imported here as it is slow to import (and needed only here and to
+    # emit many languages).
+    import concurrent.futures
+
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(args.jobs) as pool:
+        futures = [pool.submit(generate_task, task, args) for task in tasks]
+        results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for task, (error, task_elapsed) in zip(tasks, results):
+        status = "ok" if error is None else "FAILED"
+        print("{0:<6} {1:7.2f}s  {2}".format(status, task_elapsed, os.path.relpath(task)))
+        if error is not None:
+            failed += 1
+            for line in error.splitlines():
+                print("        " + line)
+    print("{0} tasks, {1} failed, {2:.2f}s".format(len(tasks), failed, elapsed))
+
+    if failed:
+        sys.exit(1)
+
+def main():
+    global languages_serializer
+    global DESCRIPTION_FILE
+    global variables
+    global prototypes
+
+    # gradergen convert ... converts testcases to the binary format
+    if len(sys.argv) > 1 and sys.argv[1] == "convert":
+        convert_main(sys.argv[2:])
+        return
+
+    # gradergen serve ... generates the jobs received on stdin or on a socket
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        from gradergen.server import serve_main
+        serve_main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description = "Automatically generate graders and templates in various languages")
+    parser.add_argument(\
+        "--task_spec",
+        metavar = "task_spec", action = "store", nargs = "?",
+        help = "the file describing the grader"
+    )
+    parser.add_argument(\
+        "--task_yaml",
+        metavar = "task_yaml", action = "store", nargs = "?",
+        help = "the yaml file describing the task"
+    )
+    parser.add_argument(\
+        "--include_dir",
+        metavar = "include_dir", action = "store", nargs="?",
+        help = "the folder containing include_callable and include_grader"
+    )
+    parser.add_argument(\
+        "--debug",
+        action = "store_true", default = False,
+        help = "whether to show the backtrace when an exception is raised"
+    )
+
+    parser.add_argument(\
+        "--binary_input",
+        action = "store_true", default = False,
+        help = "the graders read the input in binary format (see gradergen convert)"
+    )
+    parser.add_argument(\
+        "--binary_output",
+        action = "store_true", default = False,
+        help = "the graders write the output in binary format"
+    )
+    parser.add_argument(\
+        "--restrict",
+        action = "store_true", default = False,
+        help = "declare the array parameters of the C/C++ functions as restrict "
+               "(i.e. not aliased), no call may pass the same array twice"
+    )
+
+    parser.add_argument(\
+        "--instrument",
+        action = "store_true", default = False,
+        help = "time the phases of the graders (input, each call, output) and "
+               "count the calls of the functions of include_callable, when "
+               "they are compiled with GRADERGEN_INSTRUMENT defined"
+    )
+
+    parser.add_argument(\
+        "--force",
+        action = "store_true", default = False,
+        help = "generate graders and templates even if nothing changed since "
+               "the last generation, rewriting all of them"
+    )
+    parser.add_argument(\
+        "--tasks",
+        nargs = "+",
+        metavar = "dir",
+        help = "generate all the tasks (folders containing task.spec) found in "
+               "the given folders, each one with its own task.yaml"
+    )
+    parser.add_argument(\
+        "-j", "--jobs",
+        type = int,
+        metavar = "jobs",
+        help = "the number of tasks generated in parallel with --tasks "
+               "(default: the number of processors)"
+    )
+
+    parser.add_argument(\
+        "--watch",
+        action = "store_true", default = False,
+        help = "keep running and, whenever task.spec, task.yaml or an include "
+               "file changes, generate again the graders and templates affected"
+    )
+
+    parser.add_argument(\
+        "--estimate-memory",
+        nargs = "*",
+        metavar = "var=value",
+        dest = "estimate_memory",
+        help = "instead of generating the graders, print the memory they "
+               "allocate for the arrays when the variables have the given "
+               "values (e.g. N=200000) or, if not given, the bounds in task.yaml"
+    )
+
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument(\
+        "-l", "--lang",
+        nargs = "+",
+        metavar = ("lang", "filename"),
+        dest = "languages",
+        action = "append",
+        help = "programming language, grader and template"
+    )
+    group.add_argument(\
+        "-a", "--all",
+        action = "store_true",
+        default = False,
+        help = "create graders and templates in all supported languages (with standard names)"
+    )
+    group.add_argument(\
+        "--oii",
+        action = "store_true",
+        default = False,
+        help = "create graders and templates in all supported languages following "
+               "oii's standard (sol/ and att/)"
+    )
+    group.add_argument(\
+        "--stage",
+        nargs = "?",
+        metavar = "IO_type",
+        const = "normal",
+        default = False,
+        help = "create graders and templates in C++ following stages' standard "
+               "(sol/ and att/), IO_type (can be 'normal' or 'fast') decides "
+               "whether graders in sol/ must have fastIO or not"
+    )
+    group.add_argument(\
+        "--auto",
+        nargs = "?",
+        metavar = "share",
+        type = float,
+        const = AUTO_SHARE,
+        help = "create graders and templates in C and C++ (with standard "
+               "names), with fastIO if the input and output would "
+               "take more than share (default {0}) of the time_limit, "
+               "estimated from the bounds of the variables in task.yaml "
+               "(the cost model covers only C and C++, so no pascal "
+               "grader is created)"
+                   .format(AUTO_SHARE)
+    )
+
+    args = parser.parse_args()
+
+    set_exception_hook(args.debug)
 
-        LangClass, fast_io = CLASSES_LIST[lang]
-        LangClass(fast_io, data).write_files(grader_name, template_name)
+    if args.estimate_memory is not None:
+        if args.tasks is not None or args.watch:
+            raise ValueError("--estimate-memory cannot be used with --tasks "
+                             "or --watch.")
+        estimate(args)
+    elif args.tasks is not None:
+        if args.watch:
+            raise ValueError("--watch cannot be used with --tasks.")
+        generate_tasks(args)
+    elif args.watch:
+        if args.auto is not None:
+            raise ValueError("--auto cannot be used with --watch.")
+        watch(args)
+    else:
+        generate(args)
@@ -0,0 +1,60 @@
+from gradergen.structures import PrimitiveType, IOVariables
+
+# The cost model used by --auto, which chooses the graders with fast input and
+# output when the graders with standard input and output would spend a
+# significant share of the time limit reading the input and writing the
+# output. The time is estimated from the worst-case input and output, given the
+# upper bounds of the variables, and from the costs measured for each language
+# (io_costs of the languages).
+
+# The widest text of a value of each type, e.g. -2147483648.
+TEXT_WIDTHS = {
+    PrimitiveType.INT: 11,
+    PrimitiveType.LONGINT: 20,
+    PrimitiveType.CHAR: 1,
+    PrimitiveType.REAL: 24,
+}
+
+# Returns the worst-case volume of the lines (of the input or of the output) in
+# text format, given the upper bounds (name: value) of the variables, as a
+# triple: the number of values read (written) one by one, the bytes of these
+# values (with their separators) and the bytes of the rows of chars (with
+# their newlines), which are read (written) at once.
+def text_volume(lines, bounds):
+    values = 0
+    value_bytes = 0
+    row_bytes = 0
+    for line in lines:
+        if type(line) == IOVariables:
+            values += len(line.variables)
+            for var in line.variables:
+                if var.name in bounds:
+                    value_bytes += len(str(bounds[var.name])) + 1
+                else:
+                    value_bytes += TEXT_WIDTHS[var.type] + 1
+            continue
+
+        sizes = line.arrays[0].evaluate_sizes(bounds)
+        rows = 1
+        for size in sizes[:-1]:
+            rows *= size
+        count = rows * sizes[-1]
+        if len(line.arrays) == 1 and line.arrays[0].type == PrimitiveType.CHAR:
+            row_bytes += count + rows
+        else:
+            values += count * len(line.arrays)
+            value_bytes += count * sum(TEXT_WIDTHS[arr.type] + 1 for arr in line.arrays)
+    return values, value_bytes, row_bytes
+
+# The time (in seconds) spent by the graders of LangClass with the given fast_io
+# reading the input and writing the output, whose volumes are given (see
+# text_volume). The binary format is read and written in bulk, so its cost is
+# neglected.
+def io_time(LangClass, fast_io, input_volume, output_volume, binary_input, binary_output):
+    costs = LangClass.io_costs[fast_io]
+    nanoseconds = 0
+    if not binary_input:
+        nanoseconds += sum(cost * amount for cost, amount in zip(costs["input"], input_volume))
+    if not binary_output:
+        nanoseconds += sum(cost * amount for cost, amount in zip(costs["output"], output_volume))
+    return nanoseconds * 1e-9
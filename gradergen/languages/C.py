@@ -1,22 +1,31 @@
-import pkg_resources
+import re
 from os import unlink
+from gradergen.languages import read_runtime_file
 from gradergen import structures
-from gradergen.structures import PrimitiveType, Location, Variable, Array, Parameter, Prototype, Call, IOVariables, IOArrays, Expression
+from gradergen.structures import PrimitiveType, Location, Variable, Array, Access, LoopIndex, Parameter, Prototype, Call, IOVariables, IOArrays, Expression
+from gradergen.lowering import SetSizes, Allocate, ArrayPass, RepeatCall
 
 
 class LanguageC(object):
     def __init__(self, fast_io, data):
         self.data = data
 
-        self.grader = ""
-        self.template = ""
-        if fast_io == 1:
-            self.fast_io = True
-        else:
-            self.fast_io = False
+        # The grader and the template are lists of fragments, joined only once
+        # at the end (see generate_files).
+        self.grader = []
+        self.template = []
+        # fast_io is 0 for stdio, 1 for fast IO and 2 for fast IO on memory
+        # mapped files (which uses the same parsing functions of fast IO).
+        self.fast_io = fast_io in (1, 2)
+        self.mmap_io = fast_io == 2
 
     extension = "c"
 
+    # The runtime libraries inserted in the graders.
+    @staticmethod
+    def runtime_files(fast_io):
+        return ["fast_io.c", "mmap_io.c"][:fast_io]
+
     types_names = {
         PrimitiveType.VOID: 'void', 
         PrimitiveType.INT: 'int', 
@@ -40,12 +49,72 @@ class LanguageC(object):
         PrimitiveType.REAL: 'lf'
     }
 
+    # Number of bytes (separator included) usually needed to write a value.
+    output_widths = {
+        PrimitiveType.INT: 12,
+        PrimitiveType.LONGINT: 21,
+        PrimitiveType.CHAR: 2,
+        PrimitiveType.REAL: 16
+    }
+
     headers = """\
 #include <stdio.h>
 #include <assert.h>
 #include <stdlib.h>
 
 static FILE *fr, *fw;
+"""
+
+    # Used by graders without fast IO to read rows of chars.
+    read_char_row_function = """\
+
+// Reads a row of n chars (e.g. a string), skipping whitespaces.
+static void read_char_row(char* row, int n) {
+	int k = 0;
+	while (k < n) {
+		// The space in the format string is used to ignore all whitespaces
+		if (fscanf(fr, " ") == EOF) break;
+		int got = fread(row + k, 1, n - k, fr);
+		if (got == 0) break;
+		for (int end = k + got, i = k; i < end; i++) {
+			char c = row[i];
+			row[k] = c;
+			k += !(c == ' ' || ('\\t' <= c && c <= '\\r'));
+		}
+	}
+}
+"""
+
+    # Used by graders without fast IO for the binary format.
+    read_bytes_function = """\
+
+#include <string.h>
+
+// Reads n bytes of the input, the missing ones (if any) are zeroed.
+static void read_bytes(void* dst, size_t n) {
+	size_t got = fread(dst, 1, n, fr);
+	memset((char*)dst + got, 0, n - got);
+}
+"""
+
+    write_bytes_function = """\
+
+static void write_bytes(const void* src, size_t n) {
+	fwrite(src, 1, n, fw);
+}
+"""
+
+    # With many testcases the arrays are allocated once and grown (only) when a
+    # testcase needs more memory: capacity is the size of the block, which is
+    # not valid until capacity is positive.
+    reserve_function = """\
+
+static void* gradergen_reserve(void* block, size_t* capacity, size_t bytes) {
+	if (bytes <= *capacity) return block;
+	block = realloc(*capacity > 0 ? block : NULL, bytes);
+%(allocated)s	*capacity = bytes;
+	return block;
+}
 """
 
     main_function = """\
@@ -59,19 +128,75 @@ int main() {
 
     fclose(fr);
     fclose(fw);
+"""
+
+    main_end = """\
     return 0;
 }
 """
 
+    # With --instrument the grader times its phases (the input, each call and
+    # the output), counts the calls of the functions of include_callable and
+    # the bytes allocated for the arrays and measures the peak RSS, but only if
+    # compiled with GRADERGEN_INSTRUMENT defined: otherwise the macros are
+    # empty.
+    instrumentation = """\
+
+#ifdef GRADERGEN_INSTRUMENT
+#include <time.h>
+#include <sys/resource.h>
+
+static double gradergen_times[%(phases)d];
+%(counts)sstatic long long gradergen_allocated; // The bytes of the arrays
+
+static double gradergen_now(void) {
+	struct timespec t;
+	clock_gettime(CLOCK_MONOTONIC, &t);
+	return t.tv_sec + t.tv_nsec * 1e-9;
+}
+
+// The report (in JSON) is written at exit to the file GRADERGEN_REPORT
+// (gradergen_report.json if not set), so the output is not touched.
+static void gradergen_report(void) {
+	const char* path = getenv("GRADERGEN_REPORT");
+	FILE* report = fopen(path != NULL ? path : "gradergen_report.json", "w");
+	if (report == NULL) return;
+	struct rusage usage; // ru_maxrss is the peak RSS in kilobytes
+	getrusage(RUSAGE_SELF, &usage);
+%(report)s	fclose(report);
+}
+
+#define GRADERGEN_INIT() atexit(gradergen_report)
+#define GRADERGEN_START(phase) double gradergen_start_##phase = gradergen_now()
+#define GRADERGEN_STOP(phase) gradergen_times[phase] += gradergen_now() - gradergen_start_##phase
+#define GRADERGEN_COUNT(function) gradergen_counts[function]++
+#define GRADERGEN_ALLOCATED(bytes) gradergen_allocated += (bytes)
+#else
+#define GRADERGEN_INIT()
+#define GRADERGEN_START(phase)
+#define GRADERGEN_STOP(phase)
+#define GRADERGEN_COUNT(function)
+#define GRADERGEN_ALLOCATED(bytes)
+#endif
+"""
+
+    # Comments, strings and chars (skipped while searching the functions
+    # of include_callable) and braces.
+    source_tokens = re.compile(r"//[^\n]*|/\*.*?\*/|\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|[{};]", re.S)
+    comments_and_directives = re.compile(r"//[^\n]*|/\*.*?\*/|^\s*#[^\n]*", re.S | re.M)
+    function_head = re.compile(r"^[^=]*?\b(\w+)\s*\(.*\)\s*(?:const\s*)?$", re.S)
+
     byref_symbol = "* "
     byref_call = "&"
     byref_access = "*"
+    restrict_keyword = "restrict"
 
     comments = {
         "dec_var": "Declaring variables",
         "prototypes": "Declaring functions",
         "include_grader": "Functions ad-hoc for this grader",
         "include_callable": "Functions called by the contestant solution",
+        "testcases": "Reading the number of testcases, each one is read, solved and written in turn",
         "input": "Reading input",
         "call_fun": "Calling functions",
         "output": "Writing output",
@@ -82,69 +207,237 @@ int main() {
         parameters_string = []
         
         for param in params:
-            if param.dim == 1:
-                parameters_string.append(self.types_names[param.type] + " " + param.name + "[]")
+            if param.dim == 0:
+                parameters_string.append(self.types_names[param.type] + (self.byref_symbol if param.by_ref else " ") + param.name)
+            elif self.data["restrict"]:
+                parameters_string.append(self.array_parameter_type(param.type, param.dim, param.by_ref) + " " + self.restrict_keyword + " " + param.name)
+            elif param.dim == 1:
+                parameters_string.append(self.array_parameter_type(param.type, param.dim, param.by_ref)[:-1] + " " + param.name + "[]")
             else:
-                parameters_string.append(self.types_names[param.type] + ("*" * param.dim) + (self.byref_symbol if param.by_ref and param.dim == 0 else " ") + param.name)
+                parameters_string.append(self.array_parameter_type(param.type, param.dim, param.by_ref) + " " + param.name)
         
         return ", ".join(parameters_string)
 
+    # The type of an array parameter. Arrays not passed by reference are
+    # read-only, so they are passed as pointers to const (at every level).
+    def array_parameter_type(self, type, dim, by_ref):
+        if by_ref:
+            return self.types_names[type] + "*" * dim
+        return "const " + self.types_names[type] + "* const" * (dim - 1) + "*"
+
+    # The sizes in bytes of the types and of the pointers (on 64 bits), used
+    # to estimate the memory of the arrays (see array_bytes).
+    types_bytes = {
+        PrimitiveType.INT: 4,
+        PrimitiveType.LONGINT: 8,
+        PrimitiveType.CHAR: 1,
+        PrimitiveType.REAL: 8,
+    }
+    pointer_bytes = 8
+
+    # The cost in nanoseconds of the input (output) in text format, for each
+    # fast_io: of each value read (written) one by one, of each byte of such
+    # values and of each byte of the rows of chars, which are read (written)
+    # at once. Measured on x86-64 with gcc -O2, used by --auto.
+    io_costs = {
+        0: {"input": (53, 10, 3.5), "output": (62, 2.5, 1)},
+        1: {"input": (3, 1.6, 4.2), "output": (3.5, 1.5, 0.9)},
+        2: {"input": (5, 0.9, 3.5), "output": (5.5, 1.1, 0.5)},
+    }
+
+    # Returns the bytes allocated by allocate_arrays for an array of type with
+    # the given sizes (numbers), as a pair: the bytes of the elements and the
+    # bytes of the row pointers.
+    @classmethod
+    def array_bytes(cls, type, sizes):
+        elements = cls.types_bytes[type]
+        rows = 0
+        count = 1
+        for i, size in enumerate(sizes):
+            count *= size
+            if i < len(sizes) - 1:
+                rows += (count + 1) * cls.pointer_bytes
+        return elements * count, rows
+
     # array type
     def at(self, type, dim):
         return self.types_names[type] + "*"*dim
 
     # write line
     def write_line(self, line = "", tabulation = 0):
-        self.grader += "\t"*tabulation + line + "\n"
+        self.grader.append("\t"*tabulation + line + "\n")
 
     # write comment
     def write_comment(self, short_description, tabulation = 0):
         if len(self.comments[short_description]) > 0:
-            self.grader += "\n" + ("\t"*tabulation) + "// " + self.comments[short_description] +"\n"
+            self.grader.append("\n" + ("\t"*tabulation) + "// " + self.comments[short_description] +"\n")
 
     def declare_variable(self, var):
         self.write_line("static {0} {1};".format(self.types_names[var.type], var.name))
 
     def declare_array(self, arr):
         self.write_line("static {0} {1};".format(self.at(arr.type, arr.dim), arr.name) )
+        capacities = self.data["lowered"].capacities
+        if arr.name in capacities:
+            self.write_line("static size_t {0}[{1}];".format(capacities[arr.name], arr.dim))
 
     def declare_prototype(self, fun):
         printed_parameters = self.print_parameters(fun.parameters)
 
         self.write_line("{0} {1}({2});".format(self.types_names[fun.type], fun.name, printed_parameters))
 
-    def allocate_array(self, arr):
-        for i in range(arr.dim):
-            if i != 0:
-                self.write_line("for (int {0} = 0; {0} < {1}; {0}++) {{".format("i" + str(i-1), arr.sizes[i-1].to_string()), i)
+    # The product of the sizes (which are constants, see gradergen/lowering.py).
+    def product(self, sizes):
+        return " * ".join(size.to_string() for size in sizes)
+
+    # The hoisted sizes are constants local to main.
+    def set_sizes(self, sizes):
+        for size in sizes:
+            self.write_line("const {0} {1} = {2};".format(self.types_names[size.type], size.name, size.expression.to_string()), 1)
+
+    # All the elements of a multi-dimensional array are allocated as a single
+    # block, and so is every level of row pointers (which point inside the
+    # level below). E.g. for int A[N][M]:
+    #     A = (int**)malloc(sizeof(int*) * (size0 + 1));
+    #     A[0] = (int*)malloc(sizeof(int) * size0 * size1);
+    #     for (int i0 = 1; i0 < size0; i0++) {
+    #         A[i0] = A[0] + (size_t)i0 * size1;
+    #     }
+    # The tables of row pointers have one more (unused) entry, so that
+    # A[0]...[0] is the first element even if some of the sizes are 0.
+    # The arrays (all with the given sizes) are allocated together. If
+    # set_rows is False the row pointers are set by the loops filling the
+    # arrays (see open_loops).
+    def allocate_arrays(self, arrs, sizes, set_rows = True):
+        dim = len(sizes)
+        capacities = self.data["lowered"].capacities
+        for arr in arrs:
+            for i in range(dim):
+                block = arr.name + "[0]" * i
+                elements = self.product(sizes[:i+1])
+                if i < dim - 1:
+                    elements = "({0} + 1)".format(elements)
+                if capacities:
+                    self.write_line("{0} = ({1}*)gradergen_reserve({0}, &{2}[{3}], sizeof({1}) * {4});".format(block, self.at(arr.type, dim-i-1), capacities[arr.name], i, elements), 1)
+                    continue
+                self.write_line("{0} = ({1}*)malloc(sizeof({1}) * {2});".format(block, self.at(arr.type, dim-i-1), elements), 1)
+                self.instrument("ALLOCATED", "sizeof({0}) * {1}".format(self.at(arr.type, dim-i-1), elements))
+
+        if not set_rows or not arrs:
+            return
+        for i in range(1, dim):
+            self.write_line("for (int i0 = 1; i0 < {0}; i0++) {{".format(self.product(sizes[:i])), 1)
+            for arr in arrs:
+                previous = arr.name + "[0]" * (i-1)
+                block = arr.name + "[0]" * i
+                self.write_line("{0}[i0] = {1} + (size_t)i0 * {2};".format(previous, block, sizes[i].to_string()), 2)
+            self.write_line("}", 1)
+
+    # Opens levels loops over the arrays (with the given sizes). At each level
+    # but the last the row pointers of the arrays are kept in local variables
+    # (named in lowered.rows), so that each element is not reached through all
+    # the levels; the row pointers of the arrays in allocate (see
+    # allocate_arrays) are set here, while they are filled. E.g.
+    #     for (int i0 = 0; i0 < size0; i0++) {
+    #         int* A_row0 = A[i0] = A[0] + (size_t)i0 * size1;
+    #         for (int i1 = 0; i1 < size1; i1++) {
+    # Returns the name: expression of the innermost row of each one of the
+    # arrays (the array itself if no row pointer is used).
+    def open_loops(self, arrays, sizes, levels, allocate = ()):
+        dim = len(sizes)
+        rows = self.data["lowered"].rows
+        names = set(arr.name for arr in arrays)
+        arrays = tuple(arrays) + tuple(arr for arr in allocate if arr.name not in names)
+        allocate = set(arr.name for arr in allocate)
+
+        access = {arr.name: arr.name for arr in arrays}
+        flat = None
+        for i in range(levels):
+            self.write_line("for (int {0} = 0; {0} < {1}; {0}++) {{".format("i" + str(i), sizes[i].to_string()), i+1)
+            if i == dim - 1:
+                break
+
+            # The index of the row among the ones of the same level
+            flat = "(size_t)i0" if i == 0 else "({0} * {1} + i{2})".format(flat, sizes[i].to_string(), i)
+            for arr in arrays:
+                row = access[arr.name] + "[i" + str(i) + "]"
+                if arr.name in allocate:
+                    row = "{0} = {1} + {2} * {3}".format(row, arr.name + "[0]" * (i+1), flat, sizes[i+1].to_string())
+                # The last row pointer of an array only allocated is not used.
+                if arr.name in names or i < dim - 2:
+                    access[arr.name] = rows[arr.name][i]
+                    row = "{0} {1} = {2}".format(self.at(arr.type, dim-i-1), access[arr.name], row)
+                self.write_line(row + ";", i+2)
+        return access
+
+    def close_loops(self, levels):
+        for i in range(levels):
+            self.write_line("}", levels - i)
+
+    # In the binary format (see gradergen/binary_format.py) every value is
+    # read and written as it is stored in memory, and the arrays as a whole.
+    def binary_io(self, operation, arr, sizes = None):
+        prefix = "fast_" if self.fast_io else ""
+        if type(arr) == Variable:
+            self.write_line("{0}{1}_bytes(&{2}, sizeof({2}));".format(prefix, operation, arr.name), 1)
+        else:
+            block = arr.name + "[0]" * (arr.dim - 1)
+            self.write_line("{0}{1}_bytes({2}, sizeof({3}) * {4});".format(prefix, operation, block, self.types_names[arr.type], self.product(sizes)), 1)
+
+    # A single array of chars is read one row (i.e. one string) at a time.
+    def read_char_rows(self, step):
+        arr = step.arrays[0]
+        dim = len(step.sizes)
+        access = self.open_loops(step.arrays, step.sizes, dim - 1, step.allocate)
+
+        row = access[arr.name]
+        row_size = step.sizes[dim-1].to_string()
+        if self.fast_io:
+            self.write_line("fast_read_char_row({0}, {1});".format(row, row_size), dim)
+        else:
+            self.write_line("read_char_row({0}, {1});".format(row, row_size), dim)
+
+        self.close_loops(dim - 1)
+
+    # Whether the IO line contains only an array of chars, which is read
+    # and written as a sequence of strings.
+    def is_char_rows(self, io_line):
+        return len(io_line.arrays) == 1 and io_line.arrays[0].type == PrimitiveType.CHAR
 
-            indexes = "".join("[i" + str(x) + "]" for x in range(i))
-            self.write_line("{0}{1} = ({2}*)malloc(({3}) * sizeof({2}));".format(arr.name, indexes, self.at(arr.type, arr.dim-i-1), arr.sizes[i].to_string()), i+1)
+    # Allocates and reads the arrays of an input line (see ArrayPass).
+    def read_arrays(self, step):
+        all_arrs = step.arrays
+        if self.data["binary_input"]:
+            self.allocate_arrays(step.allocate, step.sizes)
+            for arr in all_arrs:
+                self.binary_io("read", arr, step.sizes)
+            return
 
-        for i in range(arr.dim - 1):
-            self.write_line("}", arr.dim - i - 1)
+        self.allocate_arrays(step.allocate, step.sizes, set_rows = False)
+        if len(all_arrs) == 1 and all_arrs[0].type == PrimitiveType.CHAR:
+            self.read_char_rows(step)
+            return
 
-    def read_arrays(self, all_arrs):
-        all_dim = all_arrs[0].dim
-        all_sizes = all_arrs[0].sizes
-        for i in range(all_dim):
-            self.write_line("for (int {0} = 0; {0} < {1}; {0}++) {{".format("i" + str(i), all_sizes[i].to_string()), i+1)
+        all_dim = len(step.sizes)
+        access = self.open_loops(all_arrs, step.sizes, all_dim, step.allocate)
 
-        indexes = "".join("[i" + str(x) + "]" for x in range(0, all_dim))
+        index = "[i" + str(all_dim - 1) + "]"
         if self.fast_io:
             for arr in all_arrs:
-                self.write_line("{0} = fast_read_{1}();".format(arr.name + indexes, arr.type.value), all_dim+1)
+                self.write_line("{0} = fast_read_{1}();".format(access[arr.name] + index, arr.type.value), all_dim+1)
         else:
             format_string = " ".join("%" + self.stdio_types[arr.type] for arr in all_arrs)
-            pointers = ", ".join("&" + arr.name + indexes for arr in all_arrs)
+            pointers = ", ".join("&" + access[arr.name] + index for arr in all_arrs)
             # The space after the format_string is used to ignore all whitespaces
             self.write_line("fscanf(fr, \" {0}\", {1});".format(format_string, pointers), all_dim+1)
 
-        for i in range(all_dim):
-            self.write_line("}", all_dim - i)
+        self.close_loops(all_dim)
 
     def read_variables(self, all_vars):
-        if self.fast_io:
+        if self.data["binary_input"]:
+            for var in all_vars:
+                self.binary_io("read", var)
+        elif self.fast_io:
             for var in all_vars:
                 self.write_line("{0} = fast_read_{1}();".format(var.name, var.type.value), 1)
         else:
@@ -153,65 +446,89 @@ int main() {
             # The space after the format_string is used to ignore all whitespaces
             self.write_line("fscanf(fr, \" {0}\", {1});".format(format_string, pointers), 1)
 
-    def call_function(self, fun):
-        parameter_names = [(self.byref_call if (by_ref and type(var) is not Array) else "") + var.name for (var, by_ref) in fun.parameters]
+    # The argument of a call: a variable, an array, an element (or a row) of
+    # an array or a loop variable.
+    def argument(self, var):
+        if type(var) in (Access, LoopIndex):
+            return var.to_string()
+        return var.name
+
+    def call_function(self, fun, tabulation = 1):
+        parameter_names = []
+        for (var, by_ref) in fun.parameters:
+            dim = getattr(var, "dim", 0)
+            if dim == 0:
+                parameter_names.append((self.byref_call if by_ref else "") + self.argument(var))
+            elif not by_ref and dim > 1:
+                # In C T** is not implicitly converted to const T* const*.
+                parameter_names.append("(" + self.array_parameter_type(var.type, dim, by_ref) + ")" + self.argument(var))
+            else:
+                parameter_names.append(self.argument(var))
         parameters = ', '.join(parameter_names)
 
         if fun.return_var is None:
-            self.write_line("{0}({1});".format(fun.name, parameters), 1)
+            self.write_line("{0}({1});".format(fun.name, parameters), tabulation)
         else:
-            self.write_line("{2} = {0}({1});".format(fun.name, parameters, fun.return_var.name), 1)
-
-    def write_single_array(self, arr):
-        dim = arr.dim
-
-        for i in range(dim):
-            self.write_line("for (int {0} = 0; {0} < {1}; {0}++) {{".format("i" + str(i), arr.sizes[i].to_string()), i+1)
-
-        indexes = "".join("[i" + str(x) + "]" for x in range(dim))
+            self.write_line("{2} = {0}({1});".format(fun.name, parameters, self.argument(fun.return_var)), tabulation)
+
+    # A repeated call is made by a loop nest, whose variables index the
+    # arguments directly, e.g.
+    #     for (int i0 = 0; i0 < size0; i0++) {
+    #         B[i0] = f(A[i0], i0);
+    #     }
+    def repeat_call(self, step):
+        levels = len(step.counts)
+        for i in range(levels):
+            self.write_line("for (int {0} = 0; {0} < {1}; {0}++) {{".format("i" + str(i), step.counts[i].to_string()), i+1)
+        self.call_function(step.call, levels + 1)
+        self.close_loops(levels)
+
+    def write_single_array(self, step):
+        arr = step.arrays[0]
+        dim = len(step.sizes)
+        access = self.open_loops(step.arrays, step.sizes, dim - 1)
+
+        # Each innermost row is written at once, if possible.
+        row = access[arr.name]
+        row_size = step.sizes[dim-1].to_string()
         if self.fast_io:
-            self.write_line("fast_write_{0}({1});".format(arr.type.value, arr.name + indexes), dim + 1)
-            if arr.type != PrimitiveType.CHAR:
-                self.write_line("fast_write_char(' ');", dim + 1)
-            self.write_line("}", dim)
-            self.write_line("fast_write_char('\\n');", dim)
+            self.write_line("fast_write_{0}_row({1}, {2});".format(arr.type.value, row, row_size), dim)
+        elif arr.type == PrimitiveType.CHAR:
+            self.write_line("fwrite({0}, 1, {1}, fw);".format(row, row_size), dim)
+            self.write_line("fprintf(fw, \"\\n\");", dim)
         else:
+            self.write_line("for (int {0} = 0; {0} < {1}; {0}++) {{".format("i" + str(dim-1), row_size), dim)
             format_string = "%" + self.stdio_types[arr.type]
-            antipointers = arr.name + indexes
-            if arr.type != PrimitiveType.CHAR:
-                self.write_line("fprintf(fw, \"{0} \", {1});".format(format_string, antipointers), dim+1)
-            else:
-                self.write_line("fprintf(fw, \"{0}\", {1});".format(format_string, antipointers), dim+1)
+            self.write_line("fprintf(fw, \"{0} \", {1}[{2}]);".format(format_string, row, "i" + str(dim-1)), dim+1)
             self.write_line("}", dim)
             self.write_line("fprintf(fw, \"\\n\");", dim)
-            
-        for i in range(1, dim):
-            self.write_line("}", dim - i)
-        
-    def write_many_arrays(self, all_arrs):
-        all_dim = all_arrs[0].dim
-        all_sizes = all_arrs[0].sizes
 
-        for i in range(all_dim):
-            self.write_line("for (int {0} = 0; {0} < {1}; {0}++) {{".format("i" + str(i), all_sizes[i].to_string()), i+1)
+        self.close_loops(dim - 1)
 
-        indexes = "".join("[i" + str(x) + "]" for x in range(all_dim))
+    def write_many_arrays(self, step):
+        all_arrs = step.arrays
+        all_dim = len(step.sizes)
+        access = self.open_loops(all_arrs, step.sizes, all_dim)
+
+        index = "[i" + str(all_dim - 1) + "]"
         if self.fast_io:
             for arr in all_arrs:
-                self.write_line("fast_write_{0}({1});".format(arr.type.value, arr.name + indexes), all_dim + 1)
+                self.write_line("fast_write_{0}({1});".format(arr.type.value, access[arr.name] + index), all_dim + 1)
                 if arr != all_arrs[-1]:
                     self.write_line("fast_write_char(' ');", all_dim + 1)
             self.write_line("fast_write_char('\\n');", all_dim + 1)
         else:
             format_string = " ".join("%" + self.stdio_types[arr.type] for arr in all_arrs)
-            antipointers = ", ".join(arr.name + indexes for arr in all_arrs)
+            antipointers = ", ".join(access[arr.name] + index for arr in all_arrs)
             self.write_line("fprintf(fw, \"{0}\\n\", {1});".format(format_string, antipointers), all_dim+1)
 
-        for i in range(all_dim):
-            self.write_line("}", all_dim - i)
+        self.close_loops(all_dim)
 
     def write_variables(self, all_vars):
-        if self.fast_io:
+        if self.data["binary_output"]:
+            for var in all_vars:
+                self.binary_io("write", var)
+        elif self.fast_io:
             for var in all_vars:
                 self.write_line("fast_write_{0}({1});".format(var.type.value, var.name), 1)
                 if var != all_vars[-1]:
@@ -222,32 +539,149 @@ int main() {
             antipointers = ", ".join(var.name for var in all_vars)
             self.write_line("fprintf(fw, \"{0}\\n\", {1});".format(format_string, antipointers), 1)
 
+    # Upper bound (for reasonable values) of the number of bytes of the
+    # output, used to size the output buffer of fast IO.
+    def output_size_hint(self):
+        terms = []
+        for output_line in self.data["output"]:
+            if type(output_line) == IOArrays:
+                sizes = "".join("*(size_t)({0})".format(size.to_string()) for size in output_line.sizes)
+                width = sum(self.output_widths[arr.type] for arr in output_line.arrays)
+                terms.append("{0}{1}".format(width, sizes))
+            elif type(output_line) == IOVariables:
+                terms.append(str(sum(self.output_widths[var.type] for var in output_line.variables)))
+        return " + ".join(terms)
+
     def insert_headers(self):
-        self.grader += self.headers
+        self.grader.append(self.headers)
+        if self.data["instrument"]:
+            self.insert_instrumentation()
+
+    # The statement printing text (with printf-like arguments) to the report.
+    def report_line(self, text, *arguments):
+        text = text.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        return "\tfprintf(report, \"{0}\"{1});\n".format(text, "".join(", " + argument for argument in arguments))
+
+    def insert_instrumentation(self):
+        calls = self.data["lowered"].call_names()
+        report = [self.report_line('{"input": %.9f, "calls": [', "gradergen_times[0]")]
+        for index, name in enumerate(calls):
+            separator = ", " if index < len(calls) - 1 else ""
+            report.append(self.report_line('{"name": "' + name + '", "time": %.9f}' + separator, "gradergen_times[{0}]".format(index + 1)))
+        report.append(self.report_line('], "output": %.9f, "include_callable": {', "gradergen_times[{0}]".format(len(calls) + 1)))
+        for index, name in enumerate(self.callable_functions):
+            separator = ", " if index < len(self.callable_functions) - 1 else ""
+            report.append(self.report_line('"' + name + '": %lld' + separator, "gradergen_counts[{0}]".format(index)))
+        report.append(self.report_line('}, "allocated": %lld, "peak_rss": %lld}\n',
+                                       "gradergen_allocated", "(long long)usage.ru_maxrss * 1024"))
+
+        self.grader.append(self.instrumentation % {
+            "phases": len(calls) + 2,
+            "counts": "static long long gradergen_counts[{0}];\n".format(len(self.callable_functions)) if self.callable_functions else "",
+            "report": "".join(report),
+        })
+
+    # Writes the macro (see instrumentation) of the phase, if --instrument.
+    def instrument(self, macro, phase, tabulation = 1):
+        if self.data["instrument"]:
+            self.write_line("GRADERGEN_{0}({1});".format(macro, phase), tabulation)
+
+    # Returns include_callable with a GRADERGEN_COUNT at the beginning of
+    # each function defined in it, and the names of the functions. The
+    # functions are the blocks, outside of any other block, preceded by
+    # name(parameters).
+    def count_calls(self, source):
+        pieces = []
+        names = []
+        depth = 0
+        start = 0 # Where the current declaration begins
+        copied = 0
+        for match in self.source_tokens.finditer(source):
+            token = match.group()
+            if token == "{":
+                declaration = self.comments_and_directives.sub(" ", source[start:match.start()])
+                head = self.function_head.match(declaration.strip())
+                if depth == 0 and head is not None:
+                    pieces.append(source[copied:match.end()])
+                    pieces.append(" GRADERGEN_COUNT({0});".format(len(names)))
+                    copied = match.end()
+                    names.append(head.group(1))
+                depth += 1
+            elif token == "}":
+                depth -= 1
+            if token in ("}", ";") and depth == 0:
+                start = match.end()
+        pieces.append(source[copied:])
+        return "".join(pieces), names
 
     def insert_main(self):
+        # The same runtime is used both by C and C++ graders.
         if self.fast_io:
-            fast_io_file = open(pkg_resources.resource_filename("gradergen.languages", "fast_io." + self.extension), "r")
-            self.grader += "\n" + fast_io_file.read()
-            fast_io_file.close()
-
-        self.grader += self.main_function % {
-            "input": "fr = stdin;" if self.data["input_file"] == "" else "fr = fopen(\"" + self.data["input_file"] + "\", \"r\");",
-            "output": "fw = stdout;" if self.data["output_file"] == "" else "fw = fopen(\"" + self.data["output_file"] + "\", \"w\");",
-        }
+            self.grader.append("\n" + read_runtime_file("fast_io.c"))
+        if self.mmap_io:
+            self.grader.append("\n" + read_runtime_file("mmap_io.c"))
+
+        input_mode = "rb" if self.data["binary_input"] else "r"
+        # The output file has to be readable to be memory mapped.
+        output_mode = "w+" if self.mmap_io else "w"
+        if self.data["binary_output"]:
+            output_mode += "b"
+        self.grader.append(self.main_function % {
+            "input": "fr = stdin;" if self.data["input_file"] == "" else "fr = fopen(\"" + self.data["input_file"] + "\", \"" + input_mode + "\");",
+            "output": "fw = stdout;" if self.data["output_file"] == "" else "fw = fopen(\"" + self.data["output_file"] + "\", \"" + output_mode + "\");",
+        })
+        self.instrument("INIT", "")
+        self.instrument("START", 0)
+
+        if self.mmap_io:
+            self.write_line("mmap_input_init();", 1)
+            self.write_line("mmap_output_init();", 1)
+        elif self.fast_io:
+            self.write_line("fast_input_init();", 1)
+
+    # Indents by one level the lines appended to the grader from start on (e.g.
+    # the body of the loop over the testcases).
+    def indent(self, start):
+        body = "".join(self.grader[start:])
+        self.grader[start:] = [re.sub(r"(?m)^(?=.)", "\t", body)]
 
     def insert_footers(self):
-        self.grader += self.footers
-
-    def write_files(self, grader_name, template_name):
+        # The flush of the output is timed too.
+        if self.data["lowered"].testcases is not None:
+            self.instrument("START", len(self.data["lowered"].call_names()) + 1)
+        if self.mmap_io:
+            self.write_line()
+            self.write_line("mmap_output_close();", 1)
+        elif self.fast_io:
+            self.write_line()
+            self.write_line("fast_output_close();", 1)
+        self.grader.append(self.footers)
+        # The output is complete only when flushed.
+        self.instrument("STOP", len(self.data["lowered"].call_names()) + 1)
+        self.grader.append(self.main_end)
+
+    # Returns the generated files, as a dictionary filename: source.
+    def generate_files(self, grader_name, template_name):
         self.write_grader()
-        self.write(grader_name, self.grader)
-
         self.write_template()
-        self.write(template_name, self.template)
+        return {
+            grader_name: "".join(self.grader),
+            template_name: "".join(self.template),
+        }
+
+    def write_files(self, grader_name, template_name):
+        files = self.generate_files(grader_name, template_name)
+        for filename, source in files.items():
+            self.write(filename, source)
+        return list(files)
 
     def write_grader(self):
-        self.grader = ""
+        self.grader = []
+        self.callable_functions = []
+        if self.data["instrument"] and "include_callable" in self.data:
+            callable_source, self.callable_functions = self.count_calls(self.data["include_callable"])
+        else:
+            callable_source = self.data.get("include_callable")
         self.insert_headers()
 
         self.write_comment("dec_var")
@@ -263,44 +697,83 @@ int main() {
 
         if "include_grader" in self.data:
             self.write_comment("include_grader")
-            self.grader += self.data["include_grader"]
+            self.grader.append(self.data["include_grader"])
             self.write_line()
 
         if "include_callable" in self.data:
             self.write_comment("include_callable")
-            self.grader += self.data["include_callable"]
+            self.grader.append(callable_source)
+
+        if not self.fast_io:
+            if self.data["binary_input"]:
+                self.grader.append(self.read_bytes_function)
+            elif any(type(input_line) == IOArrays and self.is_char_rows(input_line) for input_line in self.data["input"]):
+                self.grader.append(self.read_char_row_function)
+            if self.data["binary_output"]:
+                self.grader.append(self.write_bytes_function)
+
+        lowered = self.data["lowered"]
+        if lowered.testcases is not None:
+            self.grader.append(self.reserve_function % {
+                "allocated": "\tGRADERGEN_ALLOCATED(bytes - *capacity);\n" if self.data["instrument"] else "",
+            })
 
         self.insert_main()
+        if lowered.testcases is not None:
+            self.write_comment("testcases", 1)
+            self.read_variables(lowered.testcases.variables)
+            self.instrument("STOP", 0)
+            self.write_line("for (int {0} = 0; {0} < {1}; {0}++) {{".format(lowered.counter, lowered.testcases.variables[0].name), 1)
+            body = len(self.grader)
+            self.instrument("START", 0)
         self.write_comment("input", 1)
-        for input_line in self.data["input"]:
-            if type(input_line) == IOArrays:
-                for arr in input_line.arrays:
-                    self.allocate_array(arr)
-                    arr.allocated = True
-                self.read_arrays(input_line.arrays)
-
-            elif type(input_line) == IOVariables:
-                self.read_variables(input_line.variables)
+        for step in lowered.input:
+            if type(step) == SetSizes:
+                self.set_sizes(step.sizes)
+            elif type(step) == ArrayPass:
+                self.read_arrays(step)
+            else:
+                self.read_variables(step.variables)
+        self.instrument("STOP", 0)
 
         self.write_comment("call_fun", 1)
-        for fun in self.data["calls"]:
-            for (var, by_ref) in fun.parameters:
-                if type(var) == Array and not var.allocated:
-                    self.allocate_array(var)
-                    var.allocated = True
-
-            self.call_function(fun)
+        phase = 0
+        for step in lowered.calls:
+            if type(step) == SetSizes:
+                self.set_sizes(step.sizes)
+            elif type(step) == Allocate:
+                self.allocate_arrays(step.arrays, step.sizes)
+            else:
+                phase += 1
+                self.instrument("START", phase)
+                if type(step) == RepeatCall:
+                    self.repeat_call(step)
+                else:
+                    self.call_function(step)
+                self.instrument("STOP", phase)
 
         self.write_comment("output", 1)
-        for output_line in self.data["output"]:
-            if type(output_line) == IOArrays:
-                if len(output_line.arrays) > 1:
-                    self.write_many_arrays(output_line.arrays)
+        self.instrument("START", phase + 1)
+        if self.fast_io and self.data["output"]:
+            self.write_line("fast_output_hint({0});".format(self.output_size_hint()), 1)
+        for step in lowered.output:
+            if type(step) == SetSizes:
+                self.set_sizes(step.sizes)
+            elif type(step) == ArrayPass:
+                if self.data["binary_output"]:
+                    for arr in step.arrays:
+                        self.binary_io("write", arr, step.sizes)
+                elif len(step.arrays) > 1:
+                    self.write_many_arrays(step)
                 else:
-                    self.write_single_array(output_line.arrays[0])
-            elif type(output_line) == IOVariables:
-                self.write_variables(output_line.variables)
+                    self.write_single_array(step)
+            else:
+                self.write_variables(step.variables)
 
+        if lowered.testcases is not None:
+            self.instrument("STOP", phase + 1)
+            self.indent(body)
+            self.write_line("}", 1)
         self.insert_footers()
 
     def write_template(self):
@@ -308,21 +781,31 @@ int main() {
             if fun.location == Location.GRADER: # Skipping prototypes defined in include_grader
                 continue
             printed_parameters = self.print_parameters(fun.parameters)
-            self.template += "{0} {1}({2}) {{\n".format(self.types_names[fun.type], fun.name, printed_parameters)
+            self.template.append("{0} {1}({2}) {{\n".format(self.types_names[fun.type], fun.name, printed_parameters))
 
             # Variables passed by ref are filled
             for param in fun.parameters:
                 if param.by_ref:
                     if param.dim == 0:
-                        self.template += "\t{0}{1} = {2};\n".format(self.byref_access, param.name, self.template_values[param.type])
+                        self.template.append("\t{0}{1} = {2};\n".format(self.byref_access, param.name, self.template_values[param.type]))
                     else:
-                        self.template += "\t{0}{1} = {2};\n".format(param.name, "[0]"*param.dim, self.template_values[param.type])
-            self.template += "\treturn {0};\n".format(self.template_values[fun.type])
+                        self.template.append("\t{0}{1} = {2};\n".format(param.name, "[0]"*param.dim, self.template_values[param.type]))
+            self.template.append("\treturn {0};\n".format(self.template_values[fun.type]))
 
-            self.template += "}\n\n"
+            self.template.append("}\n\n")
 
 
     def write(self, filename, source):
+        # A file whose content does not change is not rewritten, so that its
+        # modification time is preserved (and it is not recompiled).
+        if not self.data["force"]:
+            try:
+                with open(filename, "r") as f:
+                    if f.read() == source:
+                        return
+            except (OSError, UnicodeDecodeError):
+                pass
+
         # Unlink is used to avoid following symlink
         try:
             unlink(filename)
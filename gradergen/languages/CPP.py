@@ -1,4 +1,3 @@
-import pkg_resources
 from os import unlink
 from gradergen import structures
 from gradergen.structures import PrimitiveType, Location, Variable, Array, Parameter, Prototype, Call, IOVariables, IOArrays, Expression
@@ -19,3 +18,4 @@ static FILE *fr, *fw;
 	byref_symbol = " &"
 	byref_call = ""
 	byref_access = ""
+	restrict_keyword = "__restrict"
@@ -0,0 +1,8 @@
+import functools
+
+# The runtime libraries (e.g. fast_io.c) are files of this package, read only
+# when a grader using them is generated (and only once per process).
+@functools.lru_cache(maxsize=None)
+def read_runtime_file(name):
+    import importlib.resources
+    return importlib.resources.files(__name__).joinpath(name).read_text()
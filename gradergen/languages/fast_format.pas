@@ -0,0 +1,214 @@
+(* The numbers are formatted directly in memory, as in fast_io.c: the
+   functions write the digits from p on and return the first position after
+   them. Used by fast_output.pas and, for the reals, by the graders with the
+   text output of write/writeln. *)
+const
+    fast_digit_pairs : array[0..199] of char =
+        '0001020304050607080910111213141516171819' +
+        '2021222324252627282930313233343536373839' +
+        '4041424344454647484950515253545556575859' +
+        '6061626364656667686970717273747576777879' +
+        '8081828384858687888990919293949596979899';
+type
+    (* The bits of a double, to test its sign and to mask its mantissa. *)
+    fast_double_bits = record
+        case boolean of
+            False: (value : double);
+            True: (bits : qword);
+    end;
+
+(* Writes the decimal representation of y, two digits at a time. *)
+function fast_format_uint(p : PChar; y : longword) : PChar;
+var digits : array[0..15] of char;
+    q, r : longword;
+begin
+    q := 16;
+    while y >= 100 do
+    begin
+        r := y mod 100;
+        y := y div 100;
+        dec(q, 2);
+        digits[q] := fast_digit_pairs[2*r];
+        digits[q+1] := fast_digit_pairs[2*r+1];
+    end;
+    if y >= 10 then
+    begin
+        dec(q, 2);
+        digits[q] := fast_digit_pairs[2*y];
+        digits[q+1] := fast_digit_pairs[2*y+1];
+    end
+    else
+    begin
+        dec(q);
+        digits[q] := chr(ord('0') + y);
+    end;
+    Move(digits[q], p^, 16 - q);
+    fast_format_uint := p + (16 - q);
+end;
+
+function fast_format_ulonglong(p : PChar; y : qword) : PChar;
+var digits : array[0..23] of char;
+    q, r : longword;
+begin
+    (* Values fitting in 32 bits are formatted with cheaper divisions. *)
+    if y <= high(longword) then
+    begin
+        fast_format_ulonglong := fast_format_uint(p, longword(y));
+        exit;
+    end;
+    q := 24;
+    while y >= 100 do
+    begin
+        r := y mod 100;
+        y := y div 100;
+        dec(q, 2);
+        digits[q] := fast_digit_pairs[2*r];
+        digits[q+1] := fast_digit_pairs[2*r+1];
+    end;
+    if y >= 10 then
+    begin
+        dec(q, 2);
+        digits[q] := fast_digit_pairs[2*y];
+        digits[q+1] := fast_digit_pairs[2*y+1];
+    end
+    else
+    begin
+        dec(q);
+        digits[q] := chr(ord('0') + y);
+    end;
+    Move(digits[q], p^, 24 - q);
+    fast_format_ulonglong := p + (24 - q);
+end;
+
+(* Writes the integer m * 2^e (e > 0), too large for fast_format_ulonglong,
+   with all its digits: the number is kept in limbs of 9 decimal digits (the
+   least significant first) and multiplied by at most 2^28 at a time, so that
+   each limb times the factor plus the carry fits in 64 bits. A double has at
+   most 309 digits, i.e. 35 limbs. *)
+function fast_format_big(p : PChar; m : qword; e : longint) : PChar;
+var limbs : array[0..39] of longword;
+    n, i, k, s : longint;
+    carry : qword;
+    y : longword;
+begin
+    n := 0;
+    while m > 0 do
+    begin
+        limbs[n] := longword(m mod 1000000000);
+        m := m div 1000000000;
+        inc(n);
+    end;
+    while e > 0 do
+    begin
+        s := e;
+        if s > 28 then
+            s := 28;
+        dec(e, s);
+        carry := 0;
+        for i := 0 to n - 1 do
+        begin
+            carry := carry + (qword(limbs[i]) shl s);
+            limbs[i] := longword(carry mod 1000000000);
+            carry := carry div 1000000000;
+        end;
+        while carry > 0 do
+        begin
+            limbs[n] := longword(carry mod 1000000000);
+            carry := carry div 1000000000;
+            inc(n);
+        end;
+    end;
+    p := fast_format_uint(p, limbs[n - 1]);
+    for i := n - 2 downto 0 do
+    begin
+        y := limbs[i];
+        for k := 8 downto 0 do
+        begin
+            p[k] := chr(ord('0') + y mod 10);
+            y := y div 10;
+        end;
+        inc(p, 9);
+    end;
+    fast_format_big := p;
+end;
+
+(* Reals are written with 6 digits after the decimal point, exactly as the
+   C fast output (and "%lf") does: see fast_format_real in fast_io.c for the
+   details of the rounding. The same operations are used (fast_format_big
+   from 2^63 on, "inf" and "nan" for the values that are not finite), so the
+   outputs of the graders are byte-identical. *)
+function fast_format_real(p : PChar; x : double) : PChar;
+var a, frac, prod, rest, frac_high, frac_low, error : double;
+    int_part, frac_part : int64;
+    i, exponent : longint;
+    mantissa : qword;
+    split : fast_double_bits;
+begin
+    split.value := x;
+    exponent := longint((split.bits shr 52) and $7FF);
+    mantissa := split.bits and ((qword(1) shl 52) - 1);
+    if split.bits shr 63 = 1 then (* The sign bit is set, also for -0.0 *)
+    begin
+        p^ := '-';
+        inc(p);
+    end;
+    if exponent = $7FF then
+    begin
+        if mantissa <> 0 then
+        begin
+            p[0] := 'n';
+            p[1] := 'a';
+            p[2] := 'n';
+        end
+        else
+        begin
+            p[0] := 'i';
+            p[1] := 'n';
+            p[2] := 'f';
+        end;
+        fast_format_real := p + 3;
+        exit;
+    end;
+    a := abs(x);
+    if a >= 9223372036854775808.0 then
+    begin
+        p := fast_format_big(p, mantissa or (qword(1) shl 52), exponent - 1075);
+        p^ := '.';
+        for i := 1 to 6 do
+            p[i] := '0';
+        fast_format_real := p + 7;
+        exit;
+    end;
+
+    int_part := trunc(a);
+    frac := a - int_part;
+    prod := frac * 1000000.0;
+    frac_part := trunc(prod);
+    rest := prod - frac_part;
+    if rest > 0.5 then
+        inc(frac_part)
+    else if rest = 0.5 then
+    begin
+        split.value := frac;
+        split.bits := split.bits and not ((qword(1) shl 27) - 1);
+        frac_high := split.value;
+        frac_low := frac - frac_high;
+        error := (frac_high * 1000000.0 - prod) + frac_low * 1000000.0;
+        if (error > 0) or ((error = 0) and odd(frac_part)) then
+            inc(frac_part);
+    end;
+    if frac_part >= 1000000 then
+    begin
+        inc(int_part);
+        dec(frac_part, 1000000);
+    end;
+
+    p := fast_format_ulonglong(p, int_part);
+    p^ := '.';
+    for i := 6 downto 1 do
+    begin
+        p[i] := chr(ord('0') + frac_part mod 10);
+        frac_part := frac_part div 10;
+    end;
+    fast_format_real := p + 7;
+end;
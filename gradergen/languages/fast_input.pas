@@ -1,115 +1,363 @@
-const MAX_IN_BUF = 4096 * 4;
+(* The input is read in blocks of FAST_IN_BLOCK bytes (or all at once, if its
+   size is known) and parsed directly from the buffer, as in fast_io.c.
+   The buffer is always terminated by a #0 sentinel placed right after the
+   last valid byte, so the parsing loops do not have to check the bounds.
+   The input is the file given to init_fast_input or, if the name is empty,
+   the standard input. *)
+const
+    FAST_IN_BLOCK = 1 shl 16;
+    (* Minimum number of bytes guaranteed to be in the buffer (unless EOF has
+       been reached) when a token is parsed: enough for any integer. Reals
+       have no bound on their length, they are parsed after
+       fast_input_whole_token. *)
+    FAST_IN_LOOKAHEAD = 64;
+    (* Maximum number of bytes read by a single call. *)
+    FAST_IN_MAX_READ = 1 shl 30;
 var
-    total_bytes_read, bytes_read : int64;
-    input_buffer : array[0..MAX_IN_BUF-1] of char;
-    idx_input_buffer : longint;
-    input_stream : TFileStream;
+    fast_in_buf, fast_in_ptr, fast_in_end : PChar;
+    fast_in_cap : int64;
+    fast_in_eof : boolean;
+    input_stream : THandleStream;
 
-function fast_read_next_char(): Char;
+(* Moves the unparsed bytes at the beginning of the buffer and fills the rest
+   of it with new input. *)
+procedure fast_input_refill();
+var left, wanted, got : int64;
 begin
-    (* Take one char out of the buffer *)
-    fast_read_next_char := input_buffer[idx_input_buffer];
-    inc(idx_input_buffer);
+    left := fast_in_end - fast_in_ptr;
+    Move(fast_in_ptr^, fast_in_buf^, left);
+    fast_in_ptr := fast_in_buf;
+    fast_in_end := fast_in_buf + left;
 
-    if idx_input_buffer = MAX_IN_BUF then (* I'm at the end of the buffer, read another buffer *)
+    (* The count of Read is a longint. *)
+    wanted := fast_in_cap - left;
+    if wanted > FAST_IN_MAX_READ then
+        wanted := FAST_IN_MAX_READ;
+    got := input_stream.Read(fast_in_end^, longint(wanted));
+    if got <= 0 then
     begin
-        if total_bytes_read <= input_stream.Size then (* We haven't reached EOF *)
+        fast_in_eof := True;
+        got := 0;
+    end;
+    inc(fast_in_end, got);
+    fast_in_end^ := #0;
+end;
+
+(* Skips whitespaces and makes sure that the whole next token is in the buffer. *)
+procedure fast_input_next_token();
+begin
+    while True do
+    begin
+        while fast_in_ptr^ in [#9..#13, ' '] do
+            inc(fast_in_ptr);
+        if (fast_in_ptr <> fast_in_end) or fast_in_eof then
+            break;
+        fast_input_refill();
+    end;
+    (* Reads from a pipe may return less than requested. *)
+    while (fast_in_end - fast_in_ptr < FAST_IN_LOOKAHEAD) and not fast_in_eof do
+        fast_input_refill();
+end;
+
+(* Skips whitespaces and makes sure that the whole next token is in the
+   buffer, however long: the buffer is refilled (and enlarged, if the token
+   fills it) until a whitespace follows the token or EOF has been reached. *)
+procedure fast_input_whole_token();
+var scanned : int64;
+    p, new_buf : PChar;
+begin
+    fast_input_next_token();
+    scanned := 0;
+    while not fast_in_eof do
+    begin
+        p := fast_in_ptr + scanned;
+        while (p <> fast_in_end) and not (p^ in [#9..#13, ' ']) do
+            inc(p);
+        if p <> fast_in_end then
+            exit;
+        scanned := p - fast_in_ptr;
+        if scanned = fast_in_cap then
         begin
-            bytes_read := input_stream.Read(input_buffer, sizeof(input_buffer));
-            inc(total_bytes_read, bytes_read);
+            fast_in_cap := 2 * fast_in_cap;
+            new_buf := GetMem(fast_in_cap + 1);
+            Move(fast_in_buf^, new_buf^, scanned);
+            FreeMem(fast_in_buf);
+            fast_in_buf := new_buf;
+            fast_in_ptr := fast_in_buf;
+            fast_in_end := fast_in_buf + scanned;
         end;
-
-        idx_input_buffer := 0;
+        fast_input_refill();
     end;
 end;
 
 (* Returns first non whitespace character *)
 function fast_read_char() : char;
-var c: Char;
 begin
-    c := fast_read_next_char();
-    while (ord(c) = $0020) or (ord(c) = $0009) or
-          (ord(c) = $000a) or (ord(c) = $000b) or
-          (ord(c) = $000c) or (ord(c) = $000d) do
-        c := fast_read_next_char();
+    fast_input_next_token();
+    fast_read_char := fast_in_ptr^;
+    if fast_in_ptr <> fast_in_end then
+        inc(fast_in_ptr);
+end;
+
+(* Reads a row of n chars (e.g. a string), skipping whitespaces. The chars
+   are copied from the buffer in chunks and then the whitespaces, if any, are
+   squeezed out, as fast_read_char_row of fast_io.c does. *)
+procedure fast_read_char_row(var row : array of char; n : longint);
+var k, i, got : longint;
+    c : char;
+begin
+    k := 0;
+    while k < n do
+    begin
+        fast_input_next_token();
+        got := fast_in_end - fast_in_ptr;
+        if got = 0 then
+        begin
+            FillChar(row[k], n - k, 0);
+            exit;
+        end;
+        if got > n - k then
+            got := n - k;
+        Move(fast_in_ptr^, row[k], got);
+        inc(fast_in_ptr, got);
+        for i := k to k + got - 1 do
+        begin
+            c := row[i];
+            row[k] := c;
+            if not (c in [#9..#13, ' ']) then
+                inc(k);
+        end;
+    end;
+end;
 
-    fast_read_char := c;
+(* Copies the next n bytes of the input (used by the binary format), the
+   missing ones (if any) are zeroed. *)
+procedure fast_read_bytes(var dst; n : int64);
+var p : PChar;
+    available : int64;
+begin
+    p := @dst;
+    while fast_in_end - fast_in_ptr < n do
+    begin
+        available := fast_in_end - fast_in_ptr;
+        Move(fast_in_ptr^, p^, available);
+        inc(fast_in_ptr, available);
+        inc(p, available);
+        dec(n, available);
+        if fast_in_eof then
+        begin
+            FillChar(p^, n, 0);
+            exit;
+        end;
+        fast_input_refill();
+    end;
+    Move(fast_in_ptr^, p^, n);
+    inc(fast_in_ptr, n);
 end;
 
 function fast_read_int() : longint;
-var res : longint;
-    c : char;
+var p : PChar;
+    res : longword;
     negative : boolean;
 begin
-    res := 0;
+    fast_input_next_token();
+    p := fast_in_ptr;
     negative := False;
-
-    repeat
-        c := fast_read_next_char();
-    until (c = '-') or (('0' <= c) and (c <= '9'));
-
-    if c = '-' then
+    if p^ = '-' then
     begin
         negative := True;
-        c := fast_read_next_char();
-    end;
+        inc(p);
+    end
+    else if p^ = '+' then
+        inc(p);
 
-    repeat
-        res := res * 10 + ord(c) - ord('0');
-        c := fast_read_next_char();
-    until not (('0' <= c) and (c <= '9'));
+    res := 0;
+    while p^ in ['0'..'9'] do
+    begin
+        res := res * 10 + longword(ord(p^) - ord('0'));
+        inc(p);
+    end;
 
+    fast_in_ptr := p;
     if negative then
-        fast_read_int := -res
+        fast_read_int := -longint(res)
     else
-        fast_read_int := res;
+        fast_read_int := longint(res);
 end;
 
 function fast_read_longint() : int64;
-var res : int64;
-    c : char;
+var p : PChar;
+    res : qword;
     negative : boolean;
 begin
-    res := 0;
+    fast_input_next_token();
+    p := fast_in_ptr;
     negative := False;
-
-    repeat
-        c := fast_read_next_char();
-    until (c = '-') or (('0' <= c) and (c <= '9'));
-
-    if c = '-' then
+    if p^ = '-' then
     begin
         negative := True;
-        c := fast_read_next_char();
-    end;
+        inc(p);
+    end
+    else if p^ = '+' then
+        inc(p);
 
-    repeat
-        res := res * 10 + ord(c) - ord('0');
-        c := fast_read_next_char();
-    until not (('0' <= c) and (c <= '9'));
+    res := 0;
+    while p^ in ['0'..'9'] do
+    begin
+        res := res * 10 + qword(ord(p^) - ord('0'));
+        inc(p);
+    end;
 
+    fast_in_ptr := p;
     if negative then
-        fast_read_longint := -res
+        fast_read_longint := -int64(res)
     else
-        fast_read_longint := res;
+        fast_read_longint := int64(res);
 end;
 
+const fast_pow10 : array[0..22] of double = (
+    1e0, 1e1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11,
+    1e12, 1e13, 1e14, 1e15, 1e16, 1e17, 1e18, 1e19, 1e20, 1e21, 1e22);
+
+(* The real is parsed as mantissa * 10^exponent, exactly as in the C fast
+   input: when both are exactly representable a single operation gives the
+   correctly rounded result, otherwise the token is parsed by Val. *)
 function fast_read_real() : double;
+var token : ansistring;
+    p, q, token_end : PChar;
+    mant : qword;
+    digits, significant, exponent, e : longint;
+    negative, exp_negative : boolean;
+    res : double;
+    code : word;
 begin
-    (* TODO *)
-    fast_read_real := 42.0;
+    fast_input_whole_token();
+    token_end := fast_in_ptr;
+    if token_end <> fast_in_end then
+        inc(token_end);
+    while token_end^ in ['0'..'9', '+', '-', '.', 'e', 'E'] do
+        inc(token_end);
+
+    p := fast_in_ptr;
+    negative := False;
+    if p^ in ['+', '-'] then
+    begin
+        negative := p^ = '-';
+        inc(p);
+    end;
+
+    mant := 0;
+    digits := 0;
+    significant := 0;
+    exponent := 0;
+    while p^ in ['0'..'9'] do
+    begin
+        if significant < 19 then
+        begin
+            mant := mant * 10 + qword(ord(p^) - ord('0'));
+            if mant <> 0 then inc(significant);
+        end
+        else
+        begin
+            inc(exponent);
+            inc(significant);
+        end;
+        inc(digits);
+        inc(p);
+    end;
+    if p^ = '.' then
+    begin
+        inc(p);
+        while p^ in ['0'..'9'] do
+        begin
+            if significant < 19 then
+            begin
+                mant := mant * 10 + qword(ord(p^) - ord('0'));
+                if mant <> 0 then inc(significant);
+                dec(exponent);
+            end
+            else
+                inc(significant);
+            inc(digits);
+            inc(p);
+        end;
+    end;
+    if (digits > 0) and (p^ in ['e', 'E']) then
+    begin
+        q := p + 1;
+        exp_negative := False;
+        if q^ in ['+', '-'] then
+        begin
+            exp_negative := q^ = '-';
+            inc(q);
+        end;
+        if q^ in ['0'..'9'] then
+        begin
+            e := 0;
+            while q^ in ['0'..'9'] do
+            begin
+                if e < 10000 then
+                    e := e * 10 + ord(q^) - ord('0');
+                inc(q);
+            end;
+            if exp_negative then
+                exponent := exponent - e
+            else
+                exponent := exponent + e;
+            p := q;
+        end;
+    end;
+
+    if (digits = 0) or (p <> token_end) or (significant > 19) or
+       (mant > qword(1) shl 53) or (exponent < -22) or (exponent > 22) then
+    begin
+        SetString(token, fast_in_ptr, token_end - fast_in_ptr);
+        fast_in_ptr := token_end;
+        Val(token, res, code);
+        fast_read_real := res;
+        exit;
+    end;
+
+    fast_in_ptr := p;
+    res := mant;
+    if exponent < 0 then
+        res := res / fast_pow10[-exponent]
+    else
+        res := res * fast_pow10[exponent];
+    if negative then
+        res := -res;
+    fast_read_real := res;
 end;
 
 procedure init_fast_input(file_name : string);
+var position, size : int64;
 begin
-    input_stream := TFileStream.Create(file_name, fmOpenRead);
-    input_stream.Position := 0;
-    bytes_read := input_stream.Read(input_buffer, sizeof(input_buffer));
-    inc(total_bytes_read, bytes_read);
-    idx_input_buffer := 0;
+    if file_name = '' then
+        input_stream := THandleStream.Create(StdInputHandle)
+    else
+        input_stream := TFileStream.Create(file_name, fmOpenRead or fmShareDenyNone);
+
+    (* If the size is known (i.e. the input is a regular file) the whole input
+       is read with a single call. *)
+    fast_in_cap := FAST_IN_BLOCK;
+    position := FileSeek(input_stream.Handle, int64(0), fsFromCurrent);
+    if position >= 0 then
+    begin
+        size := FileSeek(input_stream.Handle, int64(0), fsFromEnd) - position;
+        FileSeek(input_stream.Handle, position, fsFromBeginning);
+        if size >= FAST_IN_BLOCK then
+            fast_in_cap := size + 1;
+    end;
+
+    fast_in_buf := GetMem(fast_in_cap + 1);
+    fast_in_ptr := fast_in_buf;
+    fast_in_end := fast_in_buf;
+    fast_in_eof := False;
+    fast_input_refill();
 end;
 
 procedure close_fast_input;
 begin
     input_stream.Free;
+    FreeMem(fast_in_buf);
 end;
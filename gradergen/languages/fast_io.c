@@ -1,99 +1,507 @@
 // Begin fast input library
 
+#include <string.h>
+#include <sys/stat.h>
+
+// The input is read in blocks of FAST_IN_BLOCK bytes (or all at once, if it
+// is a regular file) and parsed directly from the buffer.
+// The buffer is always terminated by a '\0' sentinel placed right after the
+// last valid byte, so the parsing loops do not have to check the bounds.
+#define FAST_IN_BLOCK (1 << 16)
+// Minimum number of bytes guaranteed to be in the buffer (unless EOF has
+// been reached) when a token is parsed: enough for any integer. Reals have no
+// bound on their length, they are parsed after fast_input_whole_token.
+#define FAST_IN_LOOKAHEAD 64
+
+static char *fast_in_buf, *fast_in_ptr, *fast_in_end;
+static size_t fast_in_cap;
+static int fast_in_eof;
+
+// Moves the unparsed bytes at the beginning of the buffer and fills the rest
+// of it with new input.
+static void fast_input_refill() {
+	size_t left = fast_in_end - fast_in_ptr;
+	memmove(fast_in_buf, fast_in_ptr, left);
+	fast_in_ptr = fast_in_buf;
+	fast_in_end = fast_in_buf + left;
+
+	size_t wanted = fast_in_cap - left;
+	size_t got = fread(fast_in_end, 1, wanted, fr);
+	if (got < wanted) fast_in_eof = 1;
+	fast_in_end += got;
+	*fast_in_end = '\0';
+}
+
+static void fast_input_init() {
+	struct stat st;
+	fast_in_cap = FAST_IN_BLOCK;
+	// If the size is known the whole file is read with a single call.
+	if (fstat(fileno(fr), &st) == 0 && S_ISREG(st.st_mode) && st.st_size >= FAST_IN_BLOCK) {
+		fast_in_cap = (size_t)st.st_size + 1;
+	}
+	fast_in_buf = (char*)malloc(fast_in_cap + 1);
+	fast_in_ptr = fast_in_end = fast_in_buf;
+	fast_in_eof = 0;
+	fast_input_refill();
+}
+
+static inline int fast_is_space(char c) {
+	return c == 0x20 || (unsigned char)(c - 0x09) <= 0x0d - 0x09;
+}
+
+// Skips whitespaces and makes sure that the whole next token is in the buffer.
+static inline void fast_input_next_token() {
+	for (;;) {
+		while (fast_is_space(*fast_in_ptr)) fast_in_ptr++;
+		if (fast_in_ptr != fast_in_end || fast_in_eof) break;
+		fast_input_refill();
+	}
+	if (fast_in_end - fast_in_ptr < FAST_IN_LOOKAHEAD && !fast_in_eof) fast_input_refill();
+}
+
+// Skips whitespaces and makes sure that the whole next token is in the buffer,
+// however long: the buffer is refilled (and enlarged, if the token fills it)
+// until a whitespace follows the token or EOF has been reached.
+static void fast_input_whole_token() {
+	fast_input_next_token();
+	size_t scanned = 0;
+	while (!fast_in_eof) {
+		const char* p = fast_in_ptr + scanned;
+		while (p != fast_in_end && !fast_is_space(*p)) p++;
+		if (p != fast_in_end) return;
+		scanned = p - fast_in_ptr;
+		if (scanned == fast_in_cap) {
+			fast_in_cap *= 2;
+			fast_in_buf = (char*)realloc(fast_in_buf, fast_in_cap + 1);
+			fast_in_ptr = fast_in_buf;
+			fast_in_end = fast_in_buf + scanned;
+		}
+		fast_input_refill();
+	}
+}
+
 static inline char fast_read_char() {
-	char c = fgetc_unlocked(fr);
-	// ignore whitespaces
-	while (	c == 0x20 || c == 0x09 || c == 0x0a 
-			|| c == 0x0b || c == 0x0c || c == 0x0d) c = fgetc_unlocked(fr);
+	fast_input_next_token();
+	char c = *fast_in_ptr;
+	if (fast_in_ptr != fast_in_end) fast_in_ptr++;
 	return c;
 }
 
-static inline int fast_read_int() { // speed x5
-	short int minus = 0;
-	int res = 0;
-	char c = fgetc_unlocked(fr);
-	while (c != '-' && (c < '0' || '9' < c)) c = fgetc_unlocked(fr);
+static inline int fast_read_int() {
+	fast_input_next_token();
+	const char* p = fast_in_ptr;
+	int minus = 0;
+	if (*p == '-') minus = 1, p++;
+	else if (*p == '+') p++;
 
-	if (c == '-') minus = 1, c = fgetc_unlocked(fr);
-	
-	do{
-		res = res * 10 + (c - '0');
-		c = fgetc_unlocked(fr);
-	}
-	while ('0' <= c && c <= '9');
-	
-	if (minus) return -res;
-	else return res;
+	unsigned int res = 0;
+	while ((unsigned char)(*p - '0') < 10) res = res * 10 + (*p++ - '0');
+
+	fast_in_ptr = (char*)p;
+	return minus ? -(int)res : (int)res;
 }
 
 static inline long long int fast_read_longint() {
-	short int minus = 0;
-	long long int res = 0;
-	char c = fgetc_unlocked(fr);
-	while (c != '-' && (c < '0' || '9' < c)) c = fgetc_unlocked(fr);
+	fast_input_next_token();
+	const char* p = fast_in_ptr;
+	int minus = 0;
+	if (*p == '-') minus = 1, p++;
+	else if (*p == '+') p++;
 
-	if (c == '-') minus = 1, c = fgetc_unlocked(fr);
-	
-	do{
-		res = res * 10ll + (long long int)(c - '0');
-		c = fgetc_unlocked(fr);
+	unsigned long long int res = 0;
+	while ((unsigned char)(*p - '0') < 10) res = res * 10 + (*p++ - '0');
+
+	fast_in_ptr = (char*)p;
+	return minus ? -(long long int)res : (long long int)res;
+}
+
+// Reads a row of n chars (e.g. a string), skipping whitespaces.
+// The row is copied from the buffer in chunks and then the whitespaces, if
+// any, are squeezed out: this gives the same result as reading the chars one
+// at a time with fast_read_char.
+static inline void fast_read_char_row(char* row, int n) {
+	int k = 0;
+	while (k < n) {
+		fast_input_next_token();
+		int got = fast_in_end - fast_in_ptr;
+		if (got == 0) {
+			memset(row + k, 0, n - k);
+			return;
+		}
+		if (got > n - k) got = n - k;
+		memcpy(row + k, fast_in_ptr, got);
+		fast_in_ptr += got;
+		for (int end = k + got, i = k; i < end; i++) {
+			char c = row[i];
+			row[k] = c;
+			k += !fast_is_space(c);
+		}
 	}
-	while ('0' <= c && c <= '9');
-	
-	if (minus) return -res;
-	else return res;
 }
 
-static inline double fast_read_real() { //TODO
-	double x;
-	fscanf(fr, "%lf", &x);
-	return x;
+// Copies the next n bytes of the input (used by the binary format), the
+// missing ones (if any) are zeroed.
+static inline void fast_read_bytes(void* dst, size_t n) {
+	char* p = (char*)dst;
+	for (;;) {
+		size_t available = fast_in_end - fast_in_ptr;
+		if (available >= n) break;
+		memcpy(p, fast_in_ptr, available);
+		fast_in_ptr += available;
+		p += available;
+		n -= available;
+		if (fast_in_eof) {
+			memset(p, 0, n);
+			return;
+		}
+		fast_input_refill();
+	}
+	memcpy(p, fast_in_ptr, n);
+	fast_in_ptr += n;
 }
 
-static inline void fast_write_char(char c) {
-	fputc_unlocked(c, fw);
+static const double fast_pow10[] = {
+	1e0, 1e1, 1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9, 1e10, 1e11,
+	1e12, 1e13, 1e14, 1e15, 1e16, 1e17, 1e18, 1e19, 1e20, 1e21, 1e22
+};
+
+// A real is parsed as mantissa * 10^exponent. When the mantissa has at most
+// 53 bits and |exponent| <= 22 both are exactly representable and a single
+// floating point operation gives the correctly rounded result. In all other
+// cases (and for inf/nan) the parsing is left to strtod.
+static inline double fast_read_real() {
+	fast_input_whole_token();
+	const char* p = fast_in_ptr;
+	int minus = 0;
+	if (*p == '-') minus = 1, p++;
+	else if (*p == '+') p++;
+
+	unsigned long long int mant = 0;
+	int digits = 0, significant = 0, exponent = 0;
+	for (; (unsigned char)(*p - '0') < 10; p++, digits++) {
+		if (significant < 19) {
+			mant = mant * 10 + (*p - '0');
+			significant += (mant != 0);
+		}
+		else exponent++, significant++;
+	}
+	if (*p == '.') {
+		for (p++; (unsigned char)(*p - '0') < 10; p++, digits++) {
+			if (significant < 19) {
+				mant = mant * 10 + (*p - '0');
+				significant += (mant != 0);
+				exponent--;
+			}
+			else significant++;
+		}
+	}
+	if (digits > 0 && (*p == 'e' || *p == 'E')) {
+		const char* q = p + 1;
+		int exp_minus = 0, e = 0;
+		if (*q == '-') exp_minus = 1, q++;
+		else if (*q == '+') q++;
+		if ((unsigned char)(*q - '0') < 10) {
+			for (; (unsigned char)(*q - '0') < 10; q++) if (e < 10000) e = e * 10 + (*q - '0');
+			exponent += exp_minus ? -e : e;
+			p = q;
+		}
+	}
+
+	if (digits == 0 || significant > 19 || mant > (1ull << 53) || exponent < -22 || exponent > 22) {
+		char* end;
+		double x = strtod(fast_in_ptr, &end);
+		fast_in_ptr = end;
+		return x;
+	}
+
+	fast_in_ptr = (char*)p;
+	double x = (double)mant;
+	x = exponent < 0 ? x / fast_pow10[-exponent] : x * fast_pow10[exponent];
+	return minus ? -x : x;
+}
+
+// The output is formatted in a buffer that is handed to fast_output_reserve
+// whenever it does not have enough free space. By default the buffer is
+// flushed to fw, but other backends (e.g. memory mapped files) can replace it.
+// The size of the buffer can be suggested with fast_output_hint before the
+// first write; the buffer is flushed with a single fwrite when it is full.
+#define FAST_OUT_MIN_BLOCK (1 << 20)
+#define FAST_OUT_MAX_BLOCK (1 << 26)
+// Maximum number of bytes written by a single call (apart from rows).
+#define FAST_OUT_MAX_TOKEN 512
+
+static char *fast_out_buf, *fast_out_ptr, *fast_out_end;
+static size_t fast_out_hint;
+
+static inline void fast_output_hint(size_t bytes) {
+	if (bytes > fast_out_hint) fast_out_hint = bytes;
 }
 
-static inline void fast_write_int(int x) { // speed x2
-	static short int digits[16];
-	if (x == 0) {
-		fputc_unlocked('0', fw);
-		return;
+static void fast_output_flush() {
+	fwrite(fast_out_buf, 1, fast_out_ptr - fast_out_buf, fw);
+	fast_out_ptr = fast_out_buf;
+}
+
+// Makes sure that at least n (<= FAST_OUT_MAX_TOKEN) bytes are free in the
+// buffer, flushing it only if they are not.
+static void fast_output_flush_reserve(size_t n) {
+	if (fast_out_buf == NULL) {
+		size_t size = fast_out_hint + FAST_OUT_MAX_TOKEN;
+		if (size < FAST_OUT_MIN_BLOCK) size = FAST_OUT_MIN_BLOCK;
+		if (size > FAST_OUT_MAX_BLOCK) size = FAST_OUT_MAX_BLOCK;
+		fast_out_buf = (char*)malloc(size);
+		fast_out_ptr = fast_out_buf;
+		fast_out_end = fast_out_buf + size;
 	}
-	if (x < 0) {
-		fputc_unlocked('-', fw);
-		x = -x;
+	else if ((size_t)(fast_out_end - fast_out_ptr) < n) fast_output_flush();
+}
+
+static void (*fast_output_reserve)(size_t) = fast_output_flush_reserve;
+
+static void fast_output_close() {
+	if (fast_out_buf != NULL) fast_output_flush();
+}
+
+static const char fast_digit_pairs[] =
+	"0001020304050607080910111213141516171819"
+	"2021222324252627282930313233343536373839"
+	"4041424344454647484950515253545556575859"
+	"6061626364656667686970717273747576777879"
+	"8081828384858687888990919293949596979899";
+
+// Writes the decimal representation of y in p, two digits at a time, and
+// returns the first position after it.
+static inline char* fast_format_uint(char* p, unsigned int y) {
+	char digits[16];
+	char* q = digits + sizeof(digits);
+	while (y >= 100) {
+		unsigned int r = y % 100;
+		y /= 100;
+		q -= 2;
+		memcpy(q, fast_digit_pairs + 2*r, 2);
+	}
+	if (y >= 10) {
+		q -= 2;
+		memcpy(q, fast_digit_pairs + 2*y, 2);
+	}
+	else *--q = '0' + y;
+	size_t len = digits + sizeof(digits) - q;
+	memcpy(p, q, len);
+	return p + len;
+}
+
+static inline char* fast_format_ulonglong(char* p, unsigned long long int y) {
+	// Values fitting in 32 bits are formatted with cheaper divisions.
+	if (y < (1ull << 32)) return fast_format_uint(p, (unsigned int)y);
+	char digits[24];
+	char* q = digits + sizeof(digits);
+	while (y >= 100) {
+		unsigned int r = y % 100;
+		y /= 100;
+		q -= 2;
+		memcpy(q, fast_digit_pairs + 2*r, 2);
+	}
+	if (y >= 10) {
+		q -= 2;
+		memcpy(q, fast_digit_pairs + 2*y, 2);
+	}
+	else *--q = '0' + y;
+	size_t len = digits + sizeof(digits) - q;
+	memcpy(p, q, len);
+	return p + len;
+}
+
+static inline char* fast_format_int(char* p, int x) {
+	unsigned int y = x;
+	if (x < 0) *p++ = '-', y = -y;
+	return fast_format_uint(p, y);
+}
+
+static inline char* fast_format_longint(char* p, long long int x) {
+	unsigned long long int y = x;
+	if (x < 0) *p++ = '-', y = -y;
+	return fast_format_ulonglong(p, y);
+}
+
+// Writes the integer m * 2^e (e > 0), too large for fast_format_ulonglong,
+// with all its digits: the number is kept in limbs of 9 decimal digits (the
+// least significant first) and multiplied by at most 2^28 at a time, so that
+// each limb times the factor plus the carry fits in 64 bits. A double has at
+// most 309 digits, i.e. 35 limbs.
+static char* fast_format_big(char* p, unsigned long long int m, int e) {
+	unsigned int limbs[40];
+	int n = 0;
+	for (; m > 0; m /= 1000000000) limbs[n++] = m % 1000000000;
+	while (e > 0) {
+		int s = e < 28 ? e : 28;
+		e -= s;
+		unsigned long long int carry = 0;
+		for (int i = 0; i < n; i++) {
+			carry += (unsigned long long int)limbs[i] << s;
+			limbs[i] = carry % 1000000000;
+			carry /= 1000000000;
+		}
+		for (; carry > 0; carry /= 1000000000) limbs[n++] = carry % 1000000000;
+	}
+	p = fast_format_uint(p, limbs[n - 1]);
+	for (int i = n - 2; i >= 0; i--) {
+		unsigned int y = limbs[i];
+		for (int k = 8; k >= 0; k--) {
+			p[k] = '0' + y % 10;
+			y /= 10;
+		}
+		p += 9;
+	}
+	return p;
+}
+
+// Reals are written with 6 digits after the decimal point, exactly as "%lf"
+// does. The fractional part is multiplied by 10^6 and rounded to the nearest
+// integer; when the product looks like a tie, the sign of its rounding error
+// (computed exactly splitting the factor in two halves, as in Dekker's
+// product) tells in which direction the exact value lies, and true ties are
+// rounded to even. From 2^63 on the values are integers and are written by
+// fast_format_big; infinities and NaNs are written as "inf" and "nan", with
+// the sign. The pascal fast output does the same operations, so the graders
+// give byte-identical outputs.
+static inline char* fast_format_real(char* p, double x) {
+	unsigned long long int bits;
+	memcpy(&bits, &x, sizeof(bits));
+	int exponent = (bits >> 52) & 0x7ff;
+	unsigned long long int mantissa = bits & ((1ull << 52) - 1);
+	if (bits >> 63) *p++ = '-';
+	if (exponent == 0x7ff) {
+		memcpy(p, mantissa ? "nan" : "inf", 3);
+		return p + 3;
+	}
+	double a = (bits >> 63) ? -x : x;
+	if (a >= 9223372036854775808.0) {
+		p = fast_format_big(p, mantissa | (1ull << 52), exponent - 1075);
+		memcpy(p, ".000000", 7);
+		return p + 7;
 	}
-	short int i = -1;
-	while (x) {
-		i++;
-		digits[i] = x%10; 
-		x /= 10;
+
+	unsigned long long int ip = (unsigned long long int)a;
+	double frac = a - (double)ip;
+	double prod = frac * 1000000.0;
+	unsigned long long int fp = (unsigned long long int)prod;
+	double rest = prod - (double)fp;
+	if (rest > 0.5) fp++;
+	else if (rest == 0.5) {
+		double high, low;
+		memcpy(&bits, &frac, sizeof(bits));
+		bits &= ~((1ull << 27) - 1);
+		memcpy(&high, &bits, sizeof(bits));
+		low = frac - high;
+		double error = (high * 1000000.0 - prod) + low * 1000000.0;
+		if (error > 0 || (error == 0 && fp % 2 == 1)) fp++;
+	}
+	if (fp >= 1000000) ip++, fp -= 1000000;
+
+	p = fast_format_ulonglong(p, ip);
+	*p = '.';
+	for (int i = 6; i > 0; i--) {
+		p[i] = '0' + fp % 10;
+		fp /= 10;
+	}
+	return p + 7;
+}
+
+static inline void fast_write_char(char c) {
+	if (fast_out_ptr == fast_out_end) fast_output_reserve(1);
+	*fast_out_ptr++ = c;
+}
+
+static inline void fast_write_int(int x) {
+	if (fast_out_end - fast_out_ptr < 16) fast_output_reserve(16);
+	fast_out_ptr = fast_format_int(fast_out_ptr, x);
+}
+
+static inline void fast_write_longint(long long int x) {
+	if (fast_out_end - fast_out_ptr < 24) fast_output_reserve(24);
+	fast_out_ptr = fast_format_longint(fast_out_ptr, x);
+}
+
+static inline void fast_write_real(double x) {
+	if (fast_out_end - fast_out_ptr < FAST_OUT_MAX_TOKEN) fast_output_reserve(FAST_OUT_MAX_TOKEN);
+	fast_out_ptr = fast_format_real(fast_out_ptr, x);
+}
+
+// A row of chars is written as a string, followed by a newline.
+static inline void fast_write_char_row(const char* row, int n) {
+	size_t left = n;
+	while ((size_t)(fast_out_end - fast_out_ptr) <= left) {
+		size_t available = fast_out_end - fast_out_ptr;
+		memcpy(fast_out_ptr, row, available);
+		fast_out_ptr += available;
+		row += available;
+		left -= available;
+		fast_output_reserve(1);
 	}
-	for (; i >= 0; i--) fputc_unlocked('0' + digits[i], fw);
+	memcpy(fast_out_ptr, row, left);
+	fast_out_ptr += left;
+	*fast_out_ptr++ = '\n';
 }
 
-static inline void fast_write_longint(long long int x) { // speed x2
-	static short int digits[32];
-	if (x == 0) {
-		fputc_unlocked('0', fw);
-		return;
+// Copies n bytes to the output (used by the binary format).
+static inline void fast_write_bytes(const void* src, size_t n) {
+	const char* p = (const char*)src;
+	while ((size_t)(fast_out_end - fast_out_ptr) < n) {
+		size_t available = fast_out_end - fast_out_ptr;
+		if (available > 0) memcpy(fast_out_ptr, p, available);
+		fast_out_ptr += available;
+		p += available;
+		n -= available;
+		fast_output_reserve(1);
 	}
-	if (x < 0) {
-		fputc_unlocked('-', fw);
-		x = -x;
+	memcpy(fast_out_ptr, p, n);
+	fast_out_ptr += n;
+}
+
+// Each value of a row is followed by a space, and the row by a newline.
+static inline void fast_write_int_row(const int* row, int n) {
+	char* p = fast_out_ptr;
+	for (int i = 0; i < n; i++) {
+		if (fast_out_end - p < 17) {
+			fast_out_ptr = p;
+			fast_output_reserve(17);
+			p = fast_out_ptr;
+		}
+		p = fast_format_int(p, row[i]);
+		*p++ = ' ';
 	}
-	short int i = -1;
-	while (x) {
-		i++;
-		digits[i] = x%(10ll); 
-		x /= 10ll;
+	fast_out_ptr = p;
+	fast_write_char('\n');
+}
+
+static inline void fast_write_longint_row(const long long int* row, int n) {
+	char* p = fast_out_ptr;
+	for (int i = 0; i < n; i++) {
+		if (fast_out_end - p < 25) {
+			fast_out_ptr = p;
+			fast_output_reserve(25);
+			p = fast_out_ptr;
+		}
+		p = fast_format_longint(p, row[i]);
+		*p++ = ' ';
 	}
-	for (; i >= 0; i--) fputc_unlocked('0' + digits[i], fw);
+	fast_out_ptr = p;
+	fast_write_char('\n');
 }
 
-static inline void fast_write_real(double x) { //TODO
-	fprintf(fw, "%lf", x);
+static inline void fast_write_real_row(const double* row, int n) {
+	char* p = fast_out_ptr;
+	for (int i = 0; i < n; i++) {
+		if (fast_out_end - p < FAST_OUT_MAX_TOKEN) {
+			fast_out_ptr = p;
+			fast_output_reserve(FAST_OUT_MAX_TOKEN);
+			p = fast_out_ptr;
+		}
+		p = fast_format_real(p, row[i]);
+		*p++ = ' ';
+	}
+	fast_out_ptr = p;
+	fast_write_char('\n');
 }
 
 // End fast input library
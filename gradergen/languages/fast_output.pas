@@ -1,82 +1,131 @@
-const MAX_OUT_BUF = 4096 * 4;
+(* The output is accumulated in a buffer of FAST_OUT_BLOCK bytes, which is
+   written to the file (or to the standard output) only when it is full, and
+   the numbers are formatted directly in the buffer by the functions of
+   fast_format.pas, as in fast_io.c.
+   The output is the file given to init_fast_output or, if the name is empty,
+   the standard output. *)
+const
+    FAST_OUT_BLOCK = 1 shl 20;
+    (* The bytes reserved before writing a real (at most 320 are needed). *)
+    FAST_OUT_MAX_TOKEN = 512;
 var
-    output_buffer : array[0..MAX_OUT_BUF-1] of char;
-    idx_output_buffer : longint;
-    output_stream : TFileStream;
+    fast_out_buf, fast_out_ptr, fast_out_end : PChar;
+    output_stream : THandleStream;
+
+procedure fast_output_flush();
+begin
+    output_stream.WriteBuffer(fast_out_buf^, fast_out_ptr - fast_out_buf);
+    fast_out_ptr := fast_out_buf;
+end;
 
 procedure fast_write_char(x : char);
 begin
-    (* Write one char onto the buffer *)
-    output_buffer[idx_output_buffer] := x;
-    inc(idx_output_buffer);
+    if fast_out_ptr = fast_out_end then
+        fast_output_flush();
+    fast_out_ptr^ := x;
+    inc(fast_out_ptr);
+end;
 
-    if idx_output_buffer = MAX_OUT_BUF then (* I'm at the end of the buffer, flush it *)
+(* Writes a row of n chars (e.g. a string) followed by a newline, moving it
+   onto the buffer in chunks. *)
+procedure fast_write_char_row(const row : array of char; n : longint);
+var done, len : longint;
+begin
+    done := 0;
+    while done < n do
     begin
-        output_stream.WriteBuffer(output_buffer, sizeof(output_buffer));
+        if fast_out_ptr = fast_out_end then
+            fast_output_flush();
+        len := n - done;
+        if len > fast_out_end - fast_out_ptr then
+            len := fast_out_end - fast_out_ptr;
+        Move(row[done], fast_out_ptr^, len);
+        inc(done, len);
+        inc(fast_out_ptr, len);
+    end;
+    fast_write_char(chr(10));
+end;
 
-        idx_output_buffer := 0;
+(* Copies n bytes to the output (used by the binary format). *)
+procedure fast_write_bytes(const src; n : int64);
+var p : PChar;
+    available : int64;
+begin
+    p := @src;
+    while fast_out_end - fast_out_ptr < n do
+    begin
+        available := fast_out_end - fast_out_ptr;
+        Move(p^, fast_out_ptr^, available);
+        inc(fast_out_ptr, available);
+        inc(p, available);
+        dec(n, available);
+        fast_output_flush();
     end;
+    Move(p^, fast_out_ptr^, n);
+    inc(fast_out_ptr, n);
 end;
 
 procedure fast_write_int(x : longint);
+var y : longword;
 begin
-    if x < 0 then (* Write the sign, then the number *)
+    if fast_out_end - fast_out_ptr < 16 then
+        fast_output_flush();
+    y := longword(x);
+    if x < 0 then (* Write the sign, then the absolute value *)
     begin
-        fast_write_char('-');
-        fast_write_int(-x);
-    end
-    else (* Write the number recursively *)
-    begin
-        if x >= 10 then
-            fast_write_int(x div 10);
-        fast_write_char(chr(ord('0') + x mod 10));
+        fast_out_ptr^ := '-';
+        inc(fast_out_ptr);
+        y := not y + 1;
     end;
+    fast_out_ptr := fast_format_uint(fast_out_ptr, y);
 end;
 
 procedure fast_write_longint(x : int64);
+var y : qword;
 begin
-    if x < 0 then (* Write the sign, then the number *)
-    begin
-        fast_write_char('-');
-        fast_write_longint(-x);
-    end
-    else (* Write the number recursively *)
+    if fast_out_end - fast_out_ptr < 24 then
+        fast_output_flush();
+    y := qword(x);
+    if x < 0 then (* Write the sign, then the absolute value *)
     begin
-        if x >= 10 then
-            fast_write_longint(x div 10);
-        fast_write_char(chr(ord('0') + x mod 10));
+        fast_out_ptr^ := '-';
+        inc(fast_out_ptr);
+        y := not y + 1;
     end;
+    fast_out_ptr := fast_format_ulonglong(fast_out_ptr, y);
 end;
 
 procedure fast_write_real(x : double);
 begin
-    (* TODO *)
-    fast_write_char('4');
-    fast_write_char('2');
-    fast_write_char('.');
-    fast_write_char('0');
+    if fast_out_end - fast_out_ptr < FAST_OUT_MAX_TOKEN then
+        fast_output_flush();
+    fast_out_ptr := fast_format_real(fast_out_ptr, x);
 end;
 
 procedure init_fast_output(file_name : string);
 var
     open_flag: word;
 begin
-    open_flag := fmCreate;
-    if FileExists(file_name) then
-        open_flag := fmOpenWrite;
+    if file_name = '' then
+        output_stream := THandleStream.Create(StdOutputHandle)
+    else
+    begin
+        open_flag := fmCreate;
+        if FileExists(file_name) then
+            open_flag := fmOpenWrite;
+
+        output_stream := TFileStream.Create(file_name, open_flag);
+        output_stream.size := 0;
+    end;
 
-    output_stream := TFileStream.Create(file_name, open_flag);
-    output_stream.size := 0;
-    idx_output_buffer := 0;
+    fast_out_buf := GetMem(FAST_OUT_BLOCK);
+    fast_out_ptr := fast_out_buf;
+    fast_out_end := fast_out_buf + FAST_OUT_BLOCK;
 end;
 
 procedure close_fast_output;
 begin
-    if idx_output_buffer > 0 then (* Gotta flush them bytez *)
-    begin
-        (* TODO: check if this is OK also when using unicode data *)
-        output_stream.Write(output_buffer, idx_output_buffer * sizeof(output_buffer[0]))
-    end;
-
+    fast_output_flush();
     output_stream.Free;
+    FreeMem(fast_out_buf);
 end;
@@ -0,0 +1,109 @@
+// Begin memory mapped input/output library
+
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <unistd.h>
+
+// The input file is mapped in memory and parsed without copying it.
+// The mapping is followed by (at least) one zeroed byte which works as the
+// '\0' sentinel needed by the fast input library: either the tail of the last
+// page of the file or an anonymous zero page reserved right after it.
+// If the input cannot be mapped (e.g. it is a pipe) the buffered reads of the
+// fast input library are used.
+static void mmap_input_init() {
+	struct stat st;
+	int fd = fileno(fr);
+	if (fstat(fd, &st) == 0 && S_ISREG(st.st_mode) && st.st_size > 0) {
+		size_t size = st.st_size;
+		size_t page = sysconf(_SC_PAGESIZE);
+		size_t mapped = (size + page) / page * page;
+		char* base = (char*)mmap(NULL, mapped, PROT_READ, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0);
+		if (base != MAP_FAILED) {
+			if (mmap(base, size, PROT_READ, MAP_PRIVATE | MAP_FIXED, fd, 0) != MAP_FAILED) {
+				madvise(base, size, MADV_SEQUENTIAL);
+				fast_in_buf = fast_in_ptr = base;
+				fast_in_end = base + size;
+				fast_in_eof = 1;
+				return;
+			}
+			munmap(base, mapped);
+		}
+	}
+	fast_input_init();
+}
+
+// The output file is preallocated with ftruncate (using the size suggested
+// with fast_output_hint, if larger than MMAP_OUT_INITIAL) and written through
+// a shared mapping, which is enlarged when needed. When the grader exits, the
+// file is truncated to the number of bytes actually written.
+// The mapping is created only at the first write, so that nothing changes
+// for graders that do not use the fast output. If the output cannot be mapped
+// (e.g. it is a pipe or it was not opened for reading) the buffered writes of
+// the fast output library are used.
+#define MMAP_OUT_INITIAL (1 << 24)
+
+static char* mmap_out_base;
+static size_t mmap_out_size;
+
+static int mmap_output_map(size_t size, size_t used) {
+	int fd = fileno(fw);
+	if (ftruncate(fd, size) != 0) return 0;
+	char* base = (char*)mmap(NULL, size, PROT_READ | PROT_WRITE, MAP_SHARED, fd, 0);
+	if (base == MAP_FAILED) {
+		// Restore the previous size, the result does not matter anymore.
+		int ignored = ftruncate(fd, used);
+		(void)ignored;
+		return 0;
+	}
+	mmap_out_base = base;
+	mmap_out_size = size;
+	fast_out_ptr = base + used;
+	fast_out_end = base + size;
+	return 1;
+}
+
+static void mmap_output_reserve(size_t n) {
+	if (mmap_out_base == NULL) {
+		struct stat st;
+		int fd = fileno(fw);
+		size_t size = fast_out_hint + FAST_OUT_MAX_TOKEN;
+		if (size < MMAP_OUT_INITIAL) size = MMAP_OUT_INITIAL;
+		if (fstat(fd, &st) == 0 && S_ISREG(st.st_mode) && lseek(fd, 0, SEEK_CUR) == 0
+				&& (fcntl(fd, F_GETFL) & O_ACCMODE) == O_RDWR
+				&& mmap_output_map(size, 0)) {
+			return;
+		}
+		fast_output_reserve = fast_output_flush_reserve;
+		fast_output_reserve(n);
+		return;
+	}
+
+	size_t used = fast_out_ptr - mmap_out_base;
+	size_t size = mmap_out_size;
+	while (size - used < n) size *= 2;
+	munmap(mmap_out_base, mmap_out_size);
+	if (!mmap_output_map(size, used)) {
+		fprintf(stderr, "Cannot enlarge the memory mapped output file.\n");
+		exit(1);
+	}
+}
+
+static void mmap_output_init() {
+	fast_output_reserve = mmap_output_reserve;
+}
+
+static void mmap_output_close() {
+	if (mmap_out_base == NULL) {
+		fast_output_close();
+		return;
+	}
+	size_t used = fast_out_ptr - mmap_out_base;
+	munmap(mmap_out_base, mmap_out_size);
+	if (ftruncate(fileno(fw), used) != 0) {
+		fprintf(stderr, "Cannot truncate the memory mapped output file.\n");
+		exit(1);
+	}
+	fseek(fw, used, SEEK_SET);
+}
+
+// End memory mapped input/output library
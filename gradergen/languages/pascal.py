@@ -1,20 +1,30 @@
-import pkg_resources
+import re
 from os import unlink
+from gradergen.languages import read_runtime_file
 from gradergen import structures
-from gradergen.structures import PrimitiveType, Location, Variable, Array, Parameter, Prototype, Call, IOVariables, IOArrays, Expression
+from gradergen.structures import PrimitiveType, Location, Variable, Array, Access, LoopIndex, Parameter, Prototype, Call, IOVariables, IOArrays, Expression
+from gradergen.lowering import SetSizes, Allocate, ArrayPass, RepeatCall
 
 
 class LanguagePascal(object):
     def __init__(self, fast_io, data):
         self.data = data
 
-        self.grader = ""
-        self.template = ""
+        self.grader = []
+        self.template = []
         if fast_io == 1:
             self.fast_io = True
         else:
             self.fast_io = False
 
+    # fast_format.pas is also used by the graders with the text output, to
+    # write the reals.
+    @staticmethod
+    def runtime_files(fast_io):
+        if fast_io == 1:
+            return ["fast_input.pas", "fast_format.pas", "fast_output.pas"]
+        return ["fast_format.pas"]
+
     types_names = {
         PrimitiveType.VOID: '', 
         PrimitiveType.INT: 'longint', 
@@ -32,10 +42,15 @@ class LanguagePascal(object):
     }
 
     headers = """\
-uses %(task_name)s;
+uses %(task_name)s%(instrument_units)s;
 
 var
-    fr, fw : text;
+    fr : %(input_type)s;
+    fw : %(output_type)s;
+"""
+
+    # Not needed with the binary format.
+    text_input_functions = """\
 
 { used to read char ignoring whitespaces (space, newline, tab...) }
 function read_char_skip_whitespaces() : char;
@@ -51,11 +66,49 @@ begin
    read_char_skip_whitespaces := c;
 end;
 
+{ used to read a row of n chars (e.g. a string) ignoring whitespaces }
+procedure read_char_row(var row : array of char; n : longint);
+var
+   k : longint;
+begin
+   for k := 0 to n-1 do
+      row[k] := read_char_skip_whitespaces();
+end;
+"""
+
+    text_output_functions = """\
+
+{ used to write a row of n chars (e.g. a string) followed by a newline }
+procedure write_char_row(const row : array of char; n : longint);
+var
+   s : ansistring;
+begin
+   SetString(s, PChar(@row[0]), n);
+   writeln(fw, s);
+end;
+"""
+
+    # Used to write the reals as the C graders do (see fast_format.pas).
+    text_real_functions = """\
+
+{ used to write a real with 6 digits after the decimal point }
+function real_to_string(x : double) : ansistring;
+var
+   buffer : array[0..511] of char;
+   s : ansistring;
+begin
+   SetString(s, PChar(@buffer[0]), fast_format_real(@buffer[0], x) - PChar(@buffer[0]));
+   real_to_string := s;
+end;
+"""
+
+    headers_end = """\
+
 var
 """
 
     headers_fast_io1 = """\
-uses %(task_name)s, Classes, sysutils;
+uses %(task_name)s, Classes, sysutils%(instrument_units)s;
 """
     headers_fast_io2 = """\
 var    \
@@ -65,40 +118,147 @@ var    \
 begin
     %(input)s
     %(output)s
-    reset(fr);
-    rewrite(fw);
+    %(reset)s
+    %(rewrite)s
 """
     main_function_fast_io = """\
 
 begin
-    init_fast_input('input.txt');
-    init_fast_output('output.txt');
+    init_fast_input('%(input)s');
+    init_fast_output('%(output)s');
 """
 
     footers = """\
 
     close(fr);
     close(fw);
-end.
 """
     footers_fast_io = """\
 
     close_fast_input();
     close_fast_output();
+"""
+    main_end = """\
 end.
 """
 
+    # With --instrument the grader times its phases (the input, each call and
+    # the output), counts the calls of the functions of include_callable and
+    # the bytes allocated for the arrays and measures the peak RSS, but only if
+    # compiled with GRADERGEN_INSTRUMENT defined (-dGRADERGEN_INSTRUMENT).
+    instrumentation = """\
+
+{$IFDEF GRADERGEN_INSTRUMENT}
+var
+    gradergen_times : array[0..%(last_phase)d] of double;
+    gradergen_start : double;
+    gradergen_allocated : int64; { The bytes of the arrays }
+
+function gradergen_now() : double;
+var
+    t : timespec;
+begin
+    clock_gettime(CLOCK_MONOTONIC, @t);
+    gradergen_now := t.tv_sec + t.tv_nsec * 1e-9;
+end;
+
+{ The peak RSS, read from /proc/self/status (0 if not available). }
+function gradergen_peak_rss() : int64;
+var
+    status : text;
+    line : ansistring;
+    k : longint;
+    kilobytes : int64;
+begin
+    gradergen_peak_rss := 0;
+    assign(status, '/proc/self/status');
+    {$I-}
+    reset(status);
+    {$I+}
+    if IOResult <> 0 then
+        exit;
+    kilobytes := 0;
+    while not eof(status) do
+    begin
+        readln(status, line);
+        if copy(line, 1, 6) = 'VmHWM:' then
+            for k := 7 to length(line) do
+                if line[k] in ['0'..'9'] then
+                    kilobytes := kilobytes * 10 + ord(line[k]) - ord('0');
+    end;
+    close(status);
+    gradergen_peak_rss := kilobytes * 1024;
+end;
+
+{ The report (in JSON) is written at exit to the file GRADERGEN_REPORT
+  (gradergen_report.json if not set), so the output is not touched. }
+procedure gradergen_report;
+var
+    report : text;
+    path : ansistring;
+begin
+    path := fpGetEnv('GRADERGEN_REPORT');
+    if path = '' then
+        path := 'gradergen_report.json';
+    assign(report, path);
+    {$I-}
+    rewrite(report);
+    {$I+}
+    if IOResult <> 0 then
+        exit;
+%(report)s    close(report);
+end;
+{$ENDIF}
+"""
+
+    # Comments, strings, words and the symbols preceding the procedural types.
+    source_tokens = re.compile(r"\{.*?\}|\(\*.*?\*\)|//[^\n]*|'[^']*'|\w+|[=:]", re.S)
+
+    # The sizes in bytes of the types, of the pointers and of the header of the
+    # dynamic arrays (reference count and high) on 64 bits, used to estimate
+    # the memory of the arrays (see array_bytes).
+    types_bytes = {
+        PrimitiveType.INT: 4,
+        PrimitiveType.LONGINT: 8,
+        PrimitiveType.CHAR: 1,
+        PrimitiveType.REAL: 8,
+    }
+    pointer_bytes = 8
+    dynamic_array_header_bytes = 16
+
+    # The cost of the input and output, as in LanguageC.io_costs. It has not
+    # been measured: the cost model covers only C and C++, so the pascal
+    # graders are left out of --auto and of its estimates.
+    io_costs = None
+
     comments = {
         "dec_var": "Declaring variables",
         "loop_iters": "Declaring iterators used in for loops",
+        "sizes": "Declaring the sizes of the arrays and their rows",
         "prototypes": "",
         "include_grader": "Functions ad-hoc for this grader",
         "include_callable": "Functions called by the contestant solution",
+        "testcases": "Reading the number of testcases, each one is read, solved and written in turn",
         "input": "Reading input",
         "call_fun": "Calling functions",
         "output": "Writing output",
     }
 
+    # Returns the bytes allocated by Setlength for an array of type with the
+    # given sizes (numbers), as a pair: the bytes of the elements and the bytes
+    # of the rows. Each row is a dynamic array, i.e. a header followed by the
+    # elements (the rows of the next level, but for the last one).
+    @classmethod
+    def array_bytes(cls, type, sizes):
+        rows = 0
+        count = 1
+        for i, size in enumerate(sizes):
+            rows += count * cls.dynamic_array_header_bytes
+            count *= size
+            if i < len(sizes) - 1:
+                rows += count * cls.pointer_bytes
+        return cls.types_bytes[type] * count, rows
+
     # Print the string corresponding to a parameter
     def print_parameters(self, params):
         parameters_string = []
@@ -110,7 +270,15 @@ end.
                 j += 1
             
             param = params[i]
-            printed_param = ("var " if param.by_ref else "") + ', '.join([params[k].name for k in range(i, j)]) + ": "
+            # Arrays not passed by reference are read-only, const avoids
+            # copying them.
+            if param.by_ref:
+                modifier = "var "
+            elif param.dim > 0:
+                modifier = "const "
+            else:
+                modifier = ""
+            printed_param = modifier + ', '.join([params[k].name for k in range(i, j)]) + ": "
             # param.dim > 2 is not supported and an error is raised before
             # arriving in this function.
             assert(param.dim <= 2)
@@ -130,58 +298,181 @@ end.
     def at(self, type, dim):
         return "array of "*dim + self.types_names[type]
 
+    # The value as written by write/writeln; reals are written with 6 digits
+    # after the decimal point, as the C graders do (see text_real_functions).
+    def output_value(self, value, type):
+        if type == PrimitiveType.REAL:
+            return "real_to_string(" + value + ")"
+        return value
+
+    def has_real_output(self):
+        for output_line in self.data["output"]:
+            if type(output_line) == IOVariables:
+                values = output_line.variables
+            else:
+                values = output_line.arrays
+            if any(value.type == PrimitiveType.REAL for value in values):
+                return True
+        return False
+
     # write line
     def write_line(self, line = "", tabulation = 0):
-        self.grader += "\t"*tabulation + line + "\n"
+        self.grader.append("\t"*tabulation + line + "\n")
 
     # write comment
     def write_comment(self, short_description, tabulation = 0):
         if len(self.comments[short_description]) > 0:
-            self.grader += "\n" + ("\t"*tabulation) + "{ " + self.comments[short_description] +" }\n"
+            self.grader.append("\n" + ("\t"*tabulation) + "{ " + self.comments[short_description] +" }\n")
 
     def declare_variable(self, var):
         self.write_line("{0} : {1};".format(var.name, self.types_names[var.type]), 1)
-        if var.type == PrimitiveType.REAL and self.fast_io:
-            raise NotImplementedError("In pascal fast input of floating point "
-                                      "variables is not supported.")
 
     def declare_array(self, arr):
         self.write_line("{0} : {1};".format(arr.name, self.at(arr.type, arr.dim)), 1)
-        if arr.type == PrimitiveType.REAL and self.fast_io:
-            raise NotImplementedError("In pascal fast output of floating point "
-                                      "variables is not supported.")
 
     def declare_prototype(self, fun):  # In pascal it is not needed to declare user functions in grader.pas
         pass
 
-    def allocate_array(self, arr):
-        self.write_line("Setlength({0}, {1});".format(arr.name, ", ".join([expr.to_string() for expr in arr.sizes])), 1)
-
-    def read_arrays(self, all_arrs):
-        all_dim = all_arrs[0].dim
-        all_sizes = all_arrs[0].sizes
-        for i in range(all_dim):
-            self.write_line("for {0} := 0 to {1}-1 do".format("i" + str(i), all_sizes[i].to_string()), i+1)
+    # The sizes of the arrays are hoisted in variables (see
+    # gradergen/lowering.py).
+    def set_sizes(self, sizes):
+        for size in sizes:
+            self.write_line("{0} := {1};".format(size.name, size.expression.to_string()), 1)
+
+    def allocate_arrays(self, arrs, sizes):
+        sizes = [size.to_string() for size in sizes]
+        capacities = self.data["lowered"].capacities
+        for arr in arrs:
+            if capacities:
+                self.resize_array(arr, sizes, capacities[arr.name])
+                continue
+            self.write_line("Setlength({0}, {1});".format(arr.name, ", ".join(sizes)), 1)
+            self.instrument("inc(gradergen_allocated, {0});".format(self.allocated_bytes(arr.type, sizes)))
+
+    # With many testcases the arrays are resized to the sizes of each testcase,
+    # so that length and high give them to the solution. capacity (an array)
+    # holds the sizes set last and Setlength is skipped if they do not change;
+    # when the sizes shrink the memory of the array is resized in place.
+    def resize_array(self, arr, sizes, capacity):
+        lengths = ["{0}[{1}]".format(capacity, i) for i in range(len(sizes))]
+        self.write_line("if {0} then".format(" or ".join(
+            "({0} <> {1})".format(size, length) for size, length in zip(sizes, lengths))), 1)
+        self.write_line("begin", 1)
+        self.instrument("if {0} > 0 then dec(gradergen_allocated, {1});".format(lengths[0], self.allocated_bytes(arr.type, lengths)), 2)
+        for size, length in zip(sizes, lengths):
+            self.write_line("{1} := {0};".format(size, length), 2)
+        self.write_line("Setlength({0}, {1});".format(arr.name, ", ".join(lengths)), 2)
+        self.instrument("if {0} > 0 then inc(gradergen_allocated, {1});".format(lengths[0], self.allocated_bytes(arr.type, lengths)), 2)
+        self.write_line("end;", 1)
+
+    # The expression of the bytes allocated by Setlength for an array of type
+    # with the given sizes (expressions, see array_bytes).
+    def allocated_bytes(self, type, sizes):
+        terms = []
+        for i, size in enumerate(sizes):
+            element = self.types_names[type] if i == len(sizes) - 1 else "pointer"
+            rows = "".join(previous + " * " for previous in sizes[:i])
+            terms.append("int64(1) * {0}(2 * SizeOf(SizeInt) + {1} * SizeOf({2}))".format(rows, size, element))
+        return " + ".join(terms)
+
+    # Opens levels loops over the arrays (with the given sizes). If all the
+    # levels are opened, the innermost rows of the arrays are kept in the
+    # variables named in lowered.rows, so that each element is not reached
+    # through all the levels. Returns the name: expression of the innermost
+    # row of each one of the arrays (the array itself if no row is used).
+    def open_loops(self, arrays, sizes, levels):
+        dim = len(sizes)
+        rows = self.data["lowered"].rows
+        access = {arr.name: arr.name for arr in arrays}
+        for i in range(levels):
+            self.write_line("for {0} := 0 to {1}-1 do".format("i" + str(i), sizes[i].to_string()), i+1)
             self.write_line("begin", i+1)
+            if levels == dim and i == dim - 2:
+                for arr in arrays:
+                    row = rows[arr.name][-1]
+                    self.write_line("{0} := {1}{2};".format(row, arr.name, "".join("[i" + str(x) + "]" for x in range(dim - 1))), i+2)
+                    access[arr.name] = row
+
+        if levels < dim:
+            for arr in arrays:
+                access[arr.name] += "".join("[i" + str(x) + "]" for x in range(levels))
+        return access
+
+    def close_loops(self, levels):
+        for i in range(levels):
+            self.write_line("end;", levels - i)
+
+    # In the binary format (see gradergen/binary_format.py) every value is
+    # read and written as it is stored in memory, the arrays one row (the
+    # last dimension) at a time.
+    def binary_io(self, operation, arr, sizes = None):
+        if self.fast_io:
+            procedure = "fast_{0}_bytes(".format(operation)
+        elif operation == "read":
+            procedure = "BlockRead(fr, "
+        else:
+            procedure = "BlockWrite(fw, "
+
+        if type(arr) == Variable:
+            self.write_line("{0}{1}, sizeof({1}));".format(procedure, arr.name), 1)
+            return
+
+        dim = arr.dim - 1
+        access = self.open_loops([arr], sizes, dim)
+        self.write_line("{0}{1}[0], ({2}) * sizeof({3}));".format(procedure, access[arr.name], sizes[dim].to_string(), self.types_names[arr.type]), dim+1)
+        self.close_loops(dim)
+
+    # Reads an array of chars one row (the last dimension) at a time.
+    def read_char_rows(self, step):
+        arr = step.arrays[0]
+        dim = len(step.sizes) - 1
+        access = self.open_loops(step.arrays, step.sizes, dim)
+
+        row = access[arr.name]
+        row_size = step.sizes[dim].to_string()
+        if self.fast_io:
+            self.write_line("fast_read_char_row({0}, {1});".format(row, row_size), dim+1)
+        else:
+            self.write_line("read_char_row({0}, {1});".format(row, row_size), dim+1)
+
+        self.close_loops(dim)
+
+    # Allocates and reads the arrays of an input line (see ArrayPass).
+    def read_arrays(self, step):
+        all_arrs = step.arrays
+        self.allocate_arrays(step.allocate, step.sizes)
+        if self.data["binary_input"]:
+            for arr in all_arrs:
+                self.binary_io("read", arr, step.sizes)
+            return
+
+        if len(all_arrs) == 1 and all_arrs[0].type == PrimitiveType.CHAR:
+            self.read_char_rows(step)
+            return
+
+        all_dim = len(step.sizes)
+        access = self.open_loops(all_arrs, step.sizes, all_dim)
 
-        indexes = "".join("[i" + str(x) + "]" for x in range(all_dim))
+        index = "[i" + str(all_dim - 1) + "]"
         if self.fast_io:
             for arr in all_arrs:
-                self.write_line("{0} := fast_read_{1}();".format(arr.name + indexes, arr.type.value), all_dim+1)
+                self.write_line("{0} := fast_read_{1}();".format(access[arr.name] + index, arr.type.value), all_dim+1)
         else:
             # pointers = ", ".join(arr.name + indexes for arr in all_arrs)
             # self.write_line("read(fr, {0});".format(pointers), all_dim+1)
             for arr in all_arrs:
                 if arr.type == PrimitiveType.CHAR:
-                    self.write_line("{0} := read_char_skip_whitespaces();".format(arr.name + indexes), all_dim+1)
+                    self.write_line("{0} := read_char_skip_whitespaces();".format(access[arr.name] + index), all_dim+1)
                 else:
-                    self.write_line("read(fr, {0});".format(arr.name + indexes), all_dim+1)
+                    self.write_line("read(fr, {0});".format(access[arr.name] + index), all_dim+1)
 
-        for i in range(all_dim):
-            self.write_line("end;", all_dim - i)
+        self.close_loops(all_dim)
 
     def read_variables(self, all_vars):
-        if self.fast_io:
+        if self.data["binary_input"]:
+            for var in all_vars:
+                self.binary_io("read", var)
+        elif self.fast_io:
             for var in all_vars:
                 self.write_line("{0} := fast_read_{1}();".format(var.name, var.type.value), 1)
         else:
@@ -193,113 +484,299 @@ end.
             # pointers = ", ".join(var.name for var in all_vars)
             # self.write_line("readln(fr, {0});".format(pointers), 1)
 
-    def call_function(self, fun):
-        parameters = ', '.join([var.name for (var, by_ref) in fun.parameters])
+    # The argument of a call: a variable, an array, an element (or a row) of
+    # an array or a loop variable.
+    def argument(self, var):
+        if type(var) in (Access, LoopIndex):
+            return var.to_string()
+        return var.name
+
+    def call_function(self, fun, tabulation = 1):
+        parameters = ', '.join([self.argument(var) for (var, by_ref) in fun.parameters])
 
         if fun.return_var is None:
-            self.write_line("{0}({1});".format(fun.name, parameters), 1)
+            self.write_line("{0}({1});".format(fun.name, parameters), tabulation)
         else:
-            self.write_line("{2} := {0}({1});".format(fun.name, parameters, fun.return_var.name), 1)
+            self.write_line("{2} := {0}({1});".format(fun.name, parameters, self.argument(fun.return_var)), tabulation)
+
+    # A repeated call is made by a loop nest, whose variables index the
+    # arguments directly.
+    def repeat_call(self, step):
+        levels = len(step.counts)
+        for i in range(levels):
+            self.write_line("for {0} := 0 to {1}-1 do".format("i" + str(i), step.counts[i].to_string()), i+1)
+            self.write_line("begin", i+1)
+        self.call_function(step.call, levels + 1)
+        self.close_loops(levels)
 
-    def write_single_array(self, arr):
-        dim = arr.dim
+    def write_single_array(self, step):
+        arr = step.arrays[0]
+        dim = len(step.sizes)
 
-        for i in range(dim):
-            self.write_line("for {0} := 0 to {1}-1 do".format("i" + str(i), arr.sizes[i].to_string()), i+1)
-            self.write_line("begin", i+1)
+        if arr.type == PrimitiveType.CHAR:
+            # Written one row (the last dimension) at a time.
+            access = self.open_loops(step.arrays, step.sizes, dim - 1)
+
+            row = access[arr.name]
+            row_size = step.sizes[dim - 1].to_string()
+            if self.fast_io:
+                self.write_line("fast_write_char_row({0}, {1});".format(row, row_size), dim)
+            else:
+                self.write_line("write_char_row({0}, {1});".format(row, row_size), dim)
+
+            self.close_loops(dim - 1)
+            return
+
+        access = self.open_loops(step.arrays, step.sizes, dim)
 
-        indexes = "".join("[i" + str(x) + "]" for x in range(dim))
+        element = access[arr.name] + "[i" + str(dim - 1) + "]"
         if self.fast_io:
-            self.write_line("fast_write_{0}({1});".format(arr.type.value, arr.name + indexes), dim + 1)
-            if arr.type != PrimitiveType.CHAR:
-                self.write_line("fast_write_char(' ');", dim + 1)
-            self.write_line("end;", dim - i)
-            self.write_line("fast_write_char(chr(10));", dim - i)
+            self.write_line("fast_write_{0}({1});".format(arr.type.value, element), dim + 1)
+            self.write_line("fast_write_char(' ');", dim + 1)
+            self.write_line("end;", dim)
+            self.write_line("fast_write_char(chr(10));", dim)
         else:
-            antipointers = arr.name + indexes
-            if arr.type != PrimitiveType.CHAR:
-                self.write_line("write(fw, {0}, ' ');".format(antipointers), dim+1)
-            else:
-                self.write_line("write(fw, {0});".format(antipointers), dim+1)
-            self.write_line("end;", dim - i)
-            self.write_line("writeln(fw);", dim - i)
+            antipointers = self.output_value(element, arr.type)
+            self.write_line("write(fw, {0}, ' ');".format(antipointers), dim+1)
+            self.write_line("end;", dim)
+            self.write_line("writeln(fw);", dim)
 
-        for i in range(1, dim):
-            self.write_line("end;", dim - i)
+        self.close_loops(dim - 1)
     
-    def write_many_arrays(self, all_arrs):
-        all_dim = all_arrs[0].dim
-        all_sizes = all_arrs[0].sizes
-
-        for i in range(all_dim):
-            self.write_line("for {0} := 0 to {1}-1 do".format("i" + str(i), all_sizes[i].to_string()), i+1)
-            self.write_line("begin", i+1)
+    def write_many_arrays(self, step):
+        all_arrs = step.arrays
+        all_dim = len(step.sizes)
+        access = self.open_loops(all_arrs, step.sizes, all_dim)
 
-        indexes = "".join("[i" + str(x) + "]" for x in range(all_dim))
+        index = "[i" + str(all_dim - 1) + "]"
         if self.fast_io:
             for arr in all_arrs:
-                self.write_line("fast_write_{0}({1});".format(arr.type.value, arr.name + indexes), all_dim + 1)
+                self.write_line("fast_write_{0}({1});".format(arr.type.value, access[arr.name] + index), all_dim + 1)
                 if arr != all_arrs[-1]:
                     self.write_line("fast_write_char(' ');", all_dim + 1)
             self.write_line("fast_write_char(chr(10));", all_dim + 1)
         else:
-            antipointers = ", ' ', ".join(arr.name + indexes for arr in all_arrs)
+            antipointers = ", ' ', ".join(self.output_value(access[arr.name] + index, arr.type) for arr in all_arrs)
             self.write_line("writeln(fw, {0});".format(antipointers), all_dim+1)
 
-        for i in range(all_dim):
-            self.write_line("end;", all_dim - i)
+        self.close_loops(all_dim)
 
     def write_variables(self, all_vars):
-        if self.fast_io:
+        if self.data["binary_output"]:
+            for var in all_vars:
+                self.binary_io("write", var)
+        elif self.fast_io:
             for var in all_vars:
                 self.write_line("fast_write_{0}({1});".format(var.type.value, var.name), 1)
                 if var != all_vars[-1]:
                     self.write_line("fast_write_char(' ');", 1)
             self.write_line("fast_write_char(chr(10));", 1)
         else:
-            antipointers = ", ' ', ".join(var.name for var in all_vars)
+            antipointers = ", ' ', ".join(self.output_value(var.name, var.type) for var in all_vars)
             self.write_line("writeln(fw, {0});".format(antipointers), 1)
 
+    # The statement (or the statements) compiled only with GRADERGEN_INSTRUMENT,
+    # if --instrument.
+    def instrument(self, statement, tabulation = 1):
+        if self.data["instrument"]:
+            self.write_line("{$IFDEF GRADERGEN_INSTRUMENT}" + statement + "{$ENDIF}", tabulation)
+
+    def start_timer(self):
+        self.instrument("gradergen_start := gradergen_now();")
+
+    def stop_timer(self, phase):
+        self.instrument("gradergen_times[{0}] := gradergen_times[{0}] + gradergen_now() - gradergen_start;".format(phase))
+
+    # The statement writing the values (pascal expressions, or strings if in
+    # quotes) to the report.
+    def report_line(self, *values):
+        return "    write(report, {0});\n".format(", ".join(values))
+
+    def quoted(self, text):
+        return "'" + text.replace("'", "''") + "'"
+
+    def insert_instrumentation(self):
+        calls = self.data["lowered"].call_names()
+        report = [self.report_line(self.quoted('{"input": '), "gradergen_times[0]:0:9", self.quoted(', "calls": ['))]
+        for index, name in enumerate(calls):
+            separator = ", " if index < len(calls) - 1 else ""
+            report.append(self.report_line(self.quoted('{"name": "' + name + '", "time": '),
+                                           "gradergen_times[{0}]:0:9".format(index + 1), self.quoted("}" + separator)))
+        report.append(self.report_line(self.quoted('], "output": '), "gradergen_times[{0}]:0:9".format(len(calls) + 1),
+                                       self.quoted(', "include_callable": {')))
+        for index, name in enumerate(self.callable_functions):
+            separator = ", " if index < len(self.callable_functions) - 1 else ""
+            report.append(self.report_line(self.quoted('"' + name + '": '), "gradergen_counts[{0}]".format(index), self.quoted(separator)))
+        report.append(self.report_line(self.quoted('}, "allocated": '), "gradergen_allocated",
+                                       self.quoted(', "peak_rss": '), "gradergen_peak_rss()"))
+        report.append("    writeln(report, '}');\n")
+
+        self.grader.append(self.instrumentation % {
+            "last_phase": len(calls) + 1,
+            "report": "".join(report),
+        })
+
+    # Returns the unit include_callable with a counter incremented at the
+    # beginning of each procedure and function defined in its implementation
+    # (not the nested ones), and their names. The counters are declared at the
+    # end of the interface, so that the grader can read them.
+    def count_calls(self, source):
+        pieces = []
+        names = []
+        copied = 0
+        in_implementation = False
+        depth = 0 # Of the blocks closed by end
+        pending = [] # The names of the routines declared but not begun yet
+        expecting_name = False
+        previous = None
+        for match in self.source_tokens.finditer(source):
+            token = match.group()
+            word = token.lower()
+            if token[0] in "{(/'":
+                continue
+            if expecting_name:
+                pending.append(token if len(pending) == 0 else None)
+                expecting_name = False
+            elif word == "implementation" and not in_implementation:
+                pieces.append(source[copied:match.start()])
+                counters = len(pieces)
+                pieces.append(None) # The declaration, when the routines are known
+                copied = match.start()
+                in_implementation = True
+            elif not in_implementation:
+                pass
+            elif word in ("initialization", "finalization") and depth == 0:
+                break
+            elif word in ("procedure", "function") and depth == 0 and previous not in ("=", ":"):
+                expecting_name = True
+            elif word in ("forward", "external") and pending:
+                pending.pop()
+            elif word == "begin" and depth == 0 and pending:
+                name = pending.pop()
+                if name is not None:
+                    pieces.append(source[copied:match.end()])
+                    pieces.append(" {$IFDEF GRADERGEN_INSTRUMENT}inc(gradergen_counts[" + str(len(names)) + "]);{$ENDIF}")
+                    copied = match.end()
+                    names.append(name)
+                depth += 1
+            elif word in ("begin", "case", "try", "record", "asm"):
+                depth += 1
+            elif word == "end" and depth > 0:
+                depth -= 1
+            previous = word
+        pieces.append(source[copied:])
+        if in_implementation:
+            pieces[counters] = ("{$IFDEF GRADERGEN_INSTRUMENT}\nvar gradergen_counts : array[0.."
+                                + str(max(len(names), 1) - 1) + "] of int64;\n{$ENDIF}\n\n")
+        return "".join(pieces), names
+
     def insert_headers(self):
+        # The units used to time the phases, and the unit include_callable to
+        # read its counters.
+        instrument_units = ""
+        if self.data["instrument"]:
+            instrument_units = "{$IFDEF GRADERGEN_INSTRUMENT}, Linux, UnixType, BaseUnix"
+            if "include_callable" in self.data:
+                instrument_units += ", " + self.data["task_name"] + "lib"
+            instrument_units += "{$ENDIF}"
+
         if self.fast_io:
-            self.grader += self.headers_fast_io1 % {"task_name": self.data["task_name"]}
-            fast_io_file = open(pkg_resources.resource_filename("gradergen.languages", "fast_input.pas"), "r")
-            self.grader += "\n" + fast_io_file.read()
-            fast_io_file.close()
-            fast_io_file = open(pkg_resources.resource_filename("gradergen.languages", "fast_output.pas"), "r")
-            self.grader += "\n" + fast_io_file.read()
-            fast_io_file.close()
-            self.grader += self.headers_fast_io2
+            self.grader.append(self.headers_fast_io1 % {
+                "task_name": self.data["task_name"],
+                "instrument_units": instrument_units,
+            })
+            self.grader.append("\n" + read_runtime_file("fast_input.pas"))
+            self.grader.append("\n" + read_runtime_file("fast_format.pas"))
+            self.grader.append("\n" + read_runtime_file("fast_output.pas"))
+            self.grader.append(self.headers_fast_io2)
         else:
-            self.grader += self.headers % {"task_name": self.data["task_name"]}
+            # The binary format is read and written with untyped files.
+            self.grader.append(self.headers % {
+                "task_name": self.data["task_name"],
+                "instrument_units": instrument_units,
+                "input_type": "file" if self.data["binary_input"] else "text",
+                "output_type": "file" if self.data["binary_output"] else "text",
+            })
+            if not self.data["binary_input"]:
+                self.grader.append(self.text_input_functions)
+            if not self.data["binary_output"]:
+                self.grader.append(self.text_output_functions)
+                if self.has_real_output():
+                    self.grader.append("\n" + read_runtime_file("fast_format.pas"))
+                    self.grader.append(self.text_real_functions)
+            self.grader.append(self.headers_end)
 
     def insert_main(self):
         if self.fast_io:
-            self.grader += self.main_function_fast_io
+            # An empty file name means the standard input (output).
+            self.grader.append(self.main_function_fast_io % {
+                "input": self.data["input_file"],
+                "output": self.data["output_file"],
+            })
         else:
-            self.grader += self.main_function % {
-                "input": "fr := input;" if self.data["input_file"] == "" else "assign(fr, '" + self.data["input_file"] + "');",
-                "output": "fw := output;" if self.data["output_file"] == "" else "assign(fw, '" + self.data["output_file"] + "');",
-            }
+            # Untyped files (used by the binary format) assigned to '' are the
+            # standard input (output) when opened read-only (write-only).
+            if self.data["binary_input"] or self.data["input_file"] != "":
+                input_ = "assign(fr, '" + self.data["input_file"] + "');"
+            else:
+                input_ = "fr := input;"
+            if self.data["binary_output"] or self.data["output_file"] != "":
+                output = "assign(fw, '" + self.data["output_file"] + "');"
+            else:
+                output = "fw := output;"
+
+            self.grader.append(self.main_function % {
+                "input": input_,
+                "output": output,
+                "reset": "FileMode := 0;\n    reset(fr, 1);" if self.data["binary_input"] else "reset(fr);",
+                "rewrite": "rewrite(fw, 1);" if self.data["binary_output"] else "rewrite(fw);",
+            })
+        self.instrument("AddExitProc(@gradergen_report);")
+        self.start_timer()
+
+    # Indents by one level the lines appended to the grader from start on (e.g.
+    # the body of the loop over the testcases).
+    def indent(self, start):
+        body = "".join(self.grader[start:])
+        self.grader[start:] = [re.sub(r"(?m)^(?=.)", "\t", body)]
 
     def insert_footers(self):
+        # The flush of the output is timed too.
+        if self.data["lowered"].testcases is not None:
+            self.start_timer()
         if self.fast_io:
-            self.grader += self.footers_fast_io
+            self.grader.append(self.footers_fast_io)
         else:
-            self.grader += self.footers
+            self.grader.append(self.footers)
+        # The output is complete only when flushed.
+        self.stop_timer(len(self.data["lowered"].call_names()) + 1)
+        self.grader.append(self.main_end)
 
-    def write_files(self, grader_name, template_name):
+    # Returns the generated files, as a dictionary filename: source.
+    def generate_files(self, grader_name, template_name):
         self.write_grader()
-        self.write(grader_name, self.grader)
-
         self.write_template()
-        self.write(template_name, self.template)
-
+        files = {
+            grader_name: "".join(self.grader),
+            template_name: "".join(self.template),
+        }
         if "include_callable" in self.data:
-            self.write(self.data["task_name"] + "lib.pas", self.data["include_callable"])
+            files[self.data["task_name"] + "lib.pas"] = self.callable_source
+        return files
+
+    def write_files(self, grader_name, template_name):
+        files = self.generate_files(grader_name, template_name)
+        for filename, source in files.items():
+            self.write(filename, source)
+        return list(files)
 
     def write_grader(self):
-        self.grader = ""
+        self.grader = []
+        self.callable_functions = []
+        if self.data["instrument"] and "include_callable" in self.data:
+            self.callable_source, self.callable_functions = self.count_calls(self.data["include_callable"])
+        else:
+            self.callable_source = self.data.get("include_callable")
         self.insert_headers()
 
         self.write_comment("dec_var")
@@ -310,56 +787,99 @@ end.
                 self.declare_array(var)
 
         # Declaring iterator used in for loops
-        max_dim = max(arr.dim for arr in self.data["variables"] if type(arr) == Array)
+        # The repeated calls use them too.
+        max_dim = max([arr.dim for arr in self.data["variables"] if type(arr) == Array] +
+                      [len(call.repeat) for call in self.data["calls"]] + [0])
         if max_dim > 0:
             self.write_comment("loop_iters")
             self.write_line(", ".join("i" + str(x) for x in range(max_dim)) + ": longint;", 1)
 
+        lowered = self.data["lowered"]
+        if lowered.sizes or any(len(rows) > 0 for rows in lowered.rows.values()) or lowered.testcases is not None:
+            self.write_comment("sizes")
+        for size in lowered.sizes:
+            self.write_line("{0} : {1};".format(size.name, self.types_names[size.type]), 1)
+        for var in self.data["variables"]:
+            if type(var) == Array and var.dim > 1:
+                self.write_line("{0} : {1};".format(lowered.rows[var.name][-1], self.at(var.type, 1)), 1)
+        if lowered.testcases is not None:
+            self.write_line("{0} : longint;".format(lowered.counter), 1)
+        for var in self.data["variables"]:
+            if var.name in lowered.capacities:
+                self.write_line("{0} : array[0..{1}] of int64;".format(lowered.capacities[var.name], var.dim - 1), 1)
+
         self.write_comment("prototypes")
         for fun in self.data["prototypes"]:
             self.declare_prototype(fun)
 
         if "include_grader" in self.data:
             self.write_comment("include_grader")
-            self.grader += self.data["include_grader"]
+            self.grader.append(self.data["include_grader"])
             self.write_line()
 
+        if self.data["instrument"]:
+            self.insert_instrumentation()
+
         self.insert_main()
+        if lowered.testcases is not None:
+            self.write_comment("testcases", 1)
+            self.read_variables(lowered.testcases.variables)
+            self.stop_timer(0)
+            self.write_line("for {0} := 1 to {1} do".format(lowered.counter, lowered.testcases.variables[0].name), 1)
+            self.write_line("begin", 1)
+            body = len(self.grader)
+            self.start_timer()
         self.write_comment("input", 1)
-        for input_line in self.data["input"]:
-            if type(input_line) == IOArrays:
-                for arr in input_line.arrays:
-                    self.allocate_array(arr)
-                    arr.allocated = True
-                self.read_arrays(input_line.arrays)
-
-            elif type(input_line) == IOVariables:
-                self.read_variables(input_line.variables)
+        for step in lowered.input:
+            if type(step) == SetSizes:
+                self.set_sizes(step.sizes)
+            elif type(step) == ArrayPass:
+                self.read_arrays(step)
+            else:
+                self.read_variables(step.variables)
+        self.stop_timer(0)
 
         self.write_comment("call_fun", 1)
-        for fun in self.data["calls"]:
-            for (var, by_ref) in fun.parameters:
-                if type(var) == Array and var.allocated == False:
-                    self.allocate_array(var)
-                    var.allocated = True
-
-            self.call_function(fun)
+        phase = 0
+        for step in lowered.calls:
+            if type(step) == SetSizes:
+                self.set_sizes(step.sizes)
+            elif type(step) == Allocate:
+                self.allocate_arrays(step.arrays, step.sizes)
+            else:
+                phase += 1
+                self.start_timer()
+                if type(step) == RepeatCall:
+                    self.repeat_call(step)
+                else:
+                    self.call_function(step)
+                self.stop_timer(phase)
 
         self.write_comment("output", 1)
-        for output_line in self.data["output"]:
-            if type(output_line) == IOArrays:
-                if len(output_line.arrays) > 1:
-                    self.write_many_arrays(output_line.arrays)
+        self.start_timer()
+        for step in lowered.output:
+            if type(step) == SetSizes:
+                self.set_sizes(step.sizes)
+            elif type(step) == ArrayPass:
+                if self.data["binary_output"]:
+                    for arr in step.arrays:
+                        self.binary_io("write", arr, step.sizes)
+                elif len(step.arrays) > 1:
+                    self.write_many_arrays(step)
                 else:
-                    self.write_single_array(output_line.arrays[0])
-            elif type(output_line) == IOVariables:
-                self.write_variables(output_line.variables)
+                    self.write_single_array(step)
+            else:
+                self.write_variables(step.variables)
 
+        if lowered.testcases is not None:
+            self.stop_timer(phase + 1)
+            self.indent(body)
+            self.write_line("end;", 1)
         self.insert_footers()
 
     def write_template(self):
-        self.template = "unit {0};\n\n".format(self.data["task_name"])
-        self.template += "interface\n\n"
+        self.template = ["unit {0};\n\n".format(self.data["task_name"])]
+        self.template.append("interface\n\n")
 
         
         # Checking multidimensional arrays, as they have to be defined ad-hoc.
@@ -368,7 +888,7 @@ end.
             if fun.location == Location.GRADER: # Skipping prototypes defined in include_grader
                 continue
             for param in fun.parameters:
-                if param.dim == 2:
+                if param.dim == 2 and param.type not in matrix_types:
                     matrix_types.append(param.type)
                 elif param.dim > 2:
                     raise NotImplementedError(
@@ -377,10 +897,10 @@ end.
 
         # Defining ad-hoc matrices
         if len(matrix_types) > 0:
-            self.template += "type\n"
+            self.template.append("type\n")
             for matrix_type in matrix_types:
-                self.template += "\t{0}matrix = array of array of {0};\n".format(self.types_names[matrix_type])
-            self.template += "\n"
+                self.template.append("\t{0}matrix = array of array of {0};\n".format(self.types_names[matrix_type]))
+            self.template.append("\n")
         
         # Declarations
         for fun in self.data["prototypes"]:
@@ -388,14 +908,14 @@ end.
                 continue
             printed_parameters = self.print_parameters(fun.parameters)
             if fun.type == PrimitiveType.VOID:
-                self.template += "procedure {0}({1});\n\n".format(fun.name, printed_parameters)
+                self.template.append("procedure {0}({1});\n\n".format(fun.name, printed_parameters))
             else:
-                self.template += "function {0}({1}): {2};\n\n".format(fun.name, printed_parameters, self.types_names[fun.type])
+                self.template.append("function {0}({1}): {2};\n\n".format(fun.name, printed_parameters, self.types_names[fun.type]))
 
-        self.template += "implementation\n\n"
+        self.template.append("implementation\n\n")
 
         if "include_callable" in self.data:
-            self.template += "uses {0}lib;\n\n".format(self.data["task_name"])
+            self.template.append("uses {0}lib;\n\n".format(self.data["task_name"]))
 
         # Definitions
         for fun in self.data["prototypes"]:
@@ -403,31 +923,41 @@ end.
                 continue
             printed_parameters = self.print_parameters(fun.parameters)
             if fun.type == PrimitiveType.VOID:
-                self.template += "procedure {0}({1});\n".format(fun.name, printed_parameters)
+                self.template.append("procedure {0}({1});\n".format(fun.name, printed_parameters))
             else:
-                self.template += "function {0}({1}): {2};\n".format(fun.name, printed_parameters, self.types_names[fun.type])
+                self.template.append("function {0}({1}): {2};\n".format(fun.name, printed_parameters, self.types_names[fun.type]))
 
-            self.template += "begin\n"
+            self.template.append("begin\n")
 
             # Variables passed by ref are filled in the template
             for param in fun.parameters:
                 if param.by_ref:
                     if param.dim == 0:
-                        self.template += "\t{0} := {1};\n".format(param.name, self.template_values[param.type])
+                        self.template.append("\t{0} := {1};\n".format(param.name, self.template_values[param.type]))
                     else:
-                        self.template += "\t{0}{1} := {2};\n".format(param.name, "[0]"*param.dim, self.template_values[param.type])
+                        self.template.append("\t{0}{1} := {2};\n".format(param.name, "[0]"*param.dim, self.template_values[param.type]))
 
             if fun.type == PrimitiveType.VOID:
-                self.template += "\t\n"
+                self.template.append("\t\n")
             else:
-                self.template += "\t{0} := {1};\n".format(fun.name, self.template_values[fun.type])
+                self.template.append("\t{0} := {1};\n".format(fun.name, self.template_values[fun.type]))
 
-            self.template += "end;\n\n"
+            self.template.append("end;\n\n")
 
 
-        self.template += "end.\n"
+        self.template.append("end.\n")
 
     def write(self, filename, source):
+        # A file whose content does not change is not rewritten, so that its
+        # modification time is preserved (and it is not recompiled).
+        if not self.data["force"]:
+            try:
+                with open(filename, "r") as f:
+                    if f.read() == source:
+                        return
+            except (OSError, UnicodeDecodeError):
+                pass
+
         # Unlink is used to avoid following symlink
         try:
             unlink(filename)
@@ -0,0 +1,206 @@
+from gradergen.structures import Frozen, Variable, Array, Access, Call, IOVariables, IOArrays
+
+# The lowering pass, between the parsed task.spec and the languages. The input
+# lines, the calls and the output lines are turned in a list of steps (the same
+# for all the languages) where:
+#  - the sizes of the arrays (e.g. 2*N+1) are hoisted into constants (Size),
+#    set once (SetSizes) and reused until their variable changes, instead of
+#    being evaluated again at every iteration of every loop;
+#  - the allocation of the arrays of an input line is fused with the loop
+#    reading them, which sets their row pointers while filling them;
+#  - the arrays of adjacent input lines with identical sizes are allocated
+#    together, by the loop reading the first line, and so are the arrays with
+#    identical sizes passed to a call;
+#  - the numbers of repetitions of the repeated calls are hoisted as the sizes;
+#  - a name is chosen for the row pointers of each array, so that the inner
+#    loops do not index the array through every level at each element;
+#  - if the input contains many testcases, the steps are repeated for each one
+#    and the arrays are not allocated again: each one is grown only when a
+#    testcase needs more memory than the previous ones (or, in pascal,
+#    resized to the sizes of each testcase), a name is chosen for the loop
+#    variable (counter) and for the sizes allocated of each array
+#    (capacities).
+# The sizes of the steps are Size or (if constant) Expression objects, both
+# have to_string.
+
+# A size hoisted into a constant, named name.
+class Size(Frozen):
+    __slots__ = ("name", "expression", "type")
+
+    def __init__(self, name, expression):
+        self.name = name
+        self.expression = expression
+        self.type = expression.var.type
+
+    def to_string(self):
+        return self.name
+
+# Sets the sizes, used by the steps following it.
+class SetSizes(Frozen):
+    __slots__ = ("sizes",)
+
+    def __init__(self, sizes):
+        self.sizes = tuple(sizes)
+
+# Allocates the arrays (all with the same sizes) passed to a call.
+class Allocate(Frozen):
+    __slots__ = ("arrays", "sizes")
+
+    def __init__(self, arrays, sizes):
+        self.arrays = tuple(arrays)
+        self.sizes = sizes
+
+# Reads (in the input) or writes (in the output) the arrays of an IO line with
+# a single loop nest. The arrays in allocate are allocated before the loop nest
+# and their row pointers are set by it.
+class ArrayPass(Frozen):
+    __slots__ = ("arrays", "sizes", "allocate")
+
+    def __init__(self, arrays, sizes, allocate):
+        self.arrays = tuple(arrays)
+        self.sizes = sizes
+        self.allocate = tuple(allocate)
+
+# Repeats the call, the loop over the i-th loop variable is repeated counts[i]
+# times.
+class RepeatCall(Frozen):
+    __slots__ = ("call", "counts")
+
+    def __init__(self, call, counts):
+        self.call = call
+        self.counts = counts
+
+# The steps of input, calls and output (IOVariables and Call objects are steps
+# too), all the sizes hoisted and the names of the row pointers of each array
+# (name: a name for each level but the last). If the input contains many
+# testcases, testcases is the line reading their number, before the steps
+# of each one, and capacities the name of the sizes allocated of each array
+# (name: name); otherwise they are None and empty.
+class Lowered(Frozen):
+    __slots__ = ("input", "calls", "output", "sizes", "rows", "testcases", "counter", "capacities")
+
+    def __init__(self, input_, calls, output, sizes, rows, testcases = None, counter = None, capacities = None):
+        self.input = tuple(input_)
+        self.calls = tuple(calls)
+        self.output = tuple(output)
+        self.sizes = tuple(sizes)
+        self.rows = rows
+        self.testcases = testcases
+        self.counter = counter
+        self.capacities = capacities if capacities is not None else {}
+
+    # The names of the functions called by the steps of the calls, in order.
+    def call_names(self):
+        return [step.call.name if type(step) == RepeatCall else step.name
+                for step in self.calls if type(step) in (Call, RepeatCall)]
+
+# Returns a name starting with prefix and different from the used names, which
+# are compared ignoring the case (as pascal does), and adds it to them.
+def fresh_name(prefix, used_names):
+    index = 0
+    while (prefix + str(index)).lower() in used_names:
+        index += 1
+    name = prefix + str(index)
+    used_names.add(name.lower())
+    return name
+
+def lower(variables, prototypes, input_lines, calls, output_lines, testcases = None):
+    used_names = set(var.name.lower() for var in variables)
+    used_names.update(fun.name.lower() for fun in prototypes)
+
+    # A variable changes (its version is increased) when it is read or
+    # assigned by a call, the sizes depending on it are hoisted again.
+    versions = {}
+    hoisted = {} # (expression, version of its variable): Size
+    sizes = []
+
+    def changed(var):
+        versions[var.name] = versions.get(var.name, 0) + 1
+
+    # Returns the hoisted expressions (e.g. the sizes of an array), appending
+    # to steps the SetSizes of the ones not hoisted yet.
+    def lower_sizes(expressions, steps):
+        arr_sizes = []
+        new_sizes = []
+        for expr in expressions:
+            if expr.var is None:
+                arr_sizes.append(expr)
+                continue
+            key = (expr, versions.get(expr.var.name, 0))
+            if key not in hoisted:
+                hoisted[key] = Size(fresh_name("size", used_names), expr)
+                new_sizes.append(hoisted[key])
+            arr_sizes.append(hoisted[key])
+        if new_sizes:
+            steps.append(SetSizes(new_sizes))
+            sizes.extend(new_sizes)
+        return tuple(arr_sizes)
+
+    allocated = set()
+
+    input_steps = []
+    for index, line in enumerate(input_lines):
+        if type(line) == IOVariables:
+            input_steps.append(line)
+            for var in line.variables:
+                changed(var)
+            continue
+
+        line_sizes = lower_sizes(line.sizes, input_steps)
+        allocate = []
+        for other_line in input_lines[index:]:
+            if type(other_line) != IOArrays or other_line.sizes != line.sizes:
+                break
+            for arr in other_line.arrays:
+                if arr.name not in allocated:
+                    allocated.add(arr.name)
+                    allocate.append(arr)
+        input_steps.append(ArrayPass(line.arrays, line_sizes, allocate))
+
+    call_steps = []
+    for call in calls:
+        groups = {} # sizes: arrays
+        arguments = [var for var, by_ref in call.parameters]
+        if call.return_var is not None:
+            arguments.append(call.return_var)
+        for var in arguments:
+            if type(var) == Access:
+                var = var.array
+            if type(var) == Array and var.name not in allocated:
+                allocated.add(var.name)
+                groups.setdefault(var.sizes, []).append(var)
+        for arrays in groups.values():
+            call_steps.append(Allocate(arrays, lower_sizes(arrays[0].sizes, call_steps)))
+
+        if call.repeat:
+            call_steps.append(RepeatCall(call, lower_sizes(call.repeat, call_steps)))
+        else:
+            call_steps.append(call)
+        for var, by_ref in call.parameters:
+            if by_ref and type(var) == Variable:
+                changed(var)
+        if type(call.return_var) == Variable:
+            changed(call.return_var)
+
+    output_steps = []
+    for line in output_lines:
+        if type(line) == IOVariables:
+            output_steps.append(line)
+        else:
+            output_steps.append(ArrayPass(line.arrays, lower_sizes(line.sizes, output_steps), ()))
+
+    rows = {}
+    for arr in variables:
+        if type(arr) == Array:
+            rows[arr.name] = tuple(fresh_name(arr.name + "_row", used_names)
+                                   for level in range(arr.dim - 1))
+
+    if testcases is None:
+        return Lowered(input_steps, call_steps, output_steps, sizes, rows)
+
+    counter = fresh_name("testcase", used_names)
+    capacities = {}
+    for arr in variables:
+        if arr.name in allocated:
+            capacities[arr.name] = fresh_name(arr.name + "_capacity", used_names)
+    return Lowered(input_steps, call_steps, output_steps, sizes, rows, testcases, counter, capacities)
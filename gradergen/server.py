@@ -0,0 +1,117 @@
+import os
+import sys
+import json
+import stat
+import signal
+import argparse # to parse command line arguments
+import threading
+import socketserver
+import concurrent.futures
+
+from gradergen.api import generate
+from gradergen.grader_generator import LANGUAGES_LIST, load_language
+
+# gradergen serve stays resident and generates graders and templates for the
+# jobs it receives, so that the interpreter starts only once and the parsed
+# task.spec files, the runtime libraries and the backends are loaded once.
+# Each job is a JSON object on a single line:
+#     {"id": ..., "spec": "...", "task_yaml": {...}, "languages": [...],
+#      "includes": {...}, "restrict": false, "binary_input": false,
+#      "binary_output": false, "instrument": false}
+# where the fields are the arguments of gradergen.api.generate (id, includes
+# and the options are optional). For each job a line is answered, either
+#     {"id": ..., "files": {filename: source}}
+# or
+#     {"id": ..., "error": {"type": "SyntaxError", "message": "..."}}
+# Jobs are processed concurrently, so the answers can be in a different order
+# (the id of the job is used to match them).
+
+def handle_job(line):
+    job_id = None
+    try:
+        job = json.loads(line)
+        if not isinstance(job, dict):
+            raise ValueError("Each job must be a JSON object.")
+        job_id = job.get("id")
+        files = generate(
+            job["spec"], job["task_yaml"], job["languages"], job.get("includes"),
+            restrict = job.get("restrict", False),
+            binary_input = job.get("binary_input", False),
+            binary_output = job.get("binary_output", False),
+            instrument = job.get("instrument", False),
+        )
+    except Exception as e:
+        return {"id": job_id, "error": {"type": type(e).__name__, "message": str(e)}}
+    return {"id": job_id, "files": files}
+
+# Reads the jobs from the lines of stream and writes each answer, as soon as
+# it is ready, with write(line). Returns when all the jobs are answered.
+def serve_stream(stream, write, pool):
+    lock = threading.Lock()
+
+    def answer(line):
+        response = json.dumps(handle_job(line)) + "\n"
+        with lock:
+            write(response)
+
+    futures = [pool.submit(answer, line) for line in stream if line.strip()]
+    for future in futures:
+        future.result()
+
+# gradergen serve
+def serve_main(argv):
+    parser = argparse.ArgumentParser(
+        prog = "gradergen serve",
+        description = "Generate graders and templates for the jobs (JSON "
+                      "objects, one per line) read from stdin or from a Unix "
+                      "socket, answering one line for each job")
+    parser.add_argument(\
+        "--socket",
+        metavar = "path", action = "store",
+        help = "listen on the Unix socket path instead of reading stdin, "
+               "each connection sends jobs and receives the answers"
+    )
+    parser.add_argument(\
+        "-j", "--jobs",
+        type = int,
+        metavar = "jobs",
+        help = "the number of jobs processed concurrently"
+    )
+    args = parser.parse_args(argv)
+
+    # The backends are loaded now, not while answering the first jobs.
+    for lang in LANGUAGES_LIST:
+        load_language(lang)
+
+    pool = concurrent.futures.ThreadPoolExecutor(args.jobs)
+
+    if args.socket is None:
+        def write(response):
+            sys.stdout.write(response)
+            sys.stdout.flush()
+        serve_stream(sys.stdin, write, pool)
+        pool.shutdown()
+        return
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            def write(response):
+                self.wfile.write(response.encode())
+                self.wfile.flush()
+            serve_stream((line.decode() for line in self.rfile), write, pool)
+
+    # A socket left by a previous server is removed.
+    if os.path.exists(args.socket) and stat.S_ISSOCK(os.stat(args.socket).st_mode):
+        os.unlink(args.socket)
+
+    server = socketserver.ThreadingUnixStreamServer(args.socket, Handler)
+    # Terminated (e.g. by kill) as if interrupted, so that the socket is removed.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+        pool.shutdown()
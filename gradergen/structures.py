@@ -1,16 +1,20 @@
 import enum
 import sys
 
-# Here the lines matched by regex (defined as property of RegexParser) are 
+# Here the lines parsed by SpecParser (see its parse_<rule> methods) are 
 # transformed in objects. 
 # Lots of compilation-like checks are done before creating the objects as: an 
 # array must be allocated before being written, the size of an array must be
 # an integer, etc...
 # Moreover, the constructors does not receive as parameters only the match_tree
-# generated by RegexParser.MatchTree, but can receive also the data_manager (the
+# generated by SpecParser.match_tree, but can receive also the data_manager (the
 # class containing all the data already parsed and exposing utility methods). 
 # The data_manager instance passed by parameter is not modified here and can 
 # be considered as if it had a const identifier.
+# The objects are immutable (and use __slots__), so that the parsed task.spec
+# can be shared by all the languages, sent to other processes and pickled
+# without copying it. What changes while the task.spec is parsed (e.g. whether
+# a variable is known) is kept by the data_manager.
 
 class PrimitiveType(enum.Enum):
     VOID = ""
@@ -23,25 +27,73 @@ class Location(enum.Enum):
     SOLUTION = "solution"
     GRADER = "grader"
 
-class Variable:
+# Each attribute can be set only once, in the constructor.
+class Frozen:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError("{0} objects are immutable."
+                                     .format(type(self).__name__))
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError("{0} objects are immutable."
+                                 .format(type(self).__name__))
+
+# Variables, arrays and expressions are equal if their keys are equal (so
+# they can be compared, and used in sets, even after being pickled).
+class Keyed(Frozen):
+    __slots__ = ()
+
+    def __eq__(self, other):
+        return type(self) == type(other) and self.key() == other.key()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.key())
+
+class Variable(Keyed):
+    __slots__ = ("name", "type")
+
     def __init__(self, match_tree):
         self.name = match_tree["name"]
         self.type = PrimitiveType(match_tree["type"])
-        self.known = False # This is not used in any single language class, but only in the main parser.
 
-class Array:
+    def key(self):
+        return (self.name, self.type)
+
+class Array(Keyed):
+    __slots__ = ("name", "type", "dim", "sizes")
+
     def __init__(self, match_tree, data_manager):
         self.name = match_tree["name"]
         self.type = PrimitiveType(match_tree["type"])
         self.dim = len(match_tree["sizes"])
-        self.sizes = [Expression(size, data_manager) for size in match_tree["sizes"]]
-        self.allocated = False # Handled only by single language classes. It is used to know when to allocate an array.
-        self.known = False # This is not used in any single language class, but only in the main parser.
+        self.sizes = tuple(Expression(size, data_manager) for size in match_tree["sizes"])
+
+    def key(self):
+        return (self.name, self.type, tuple(size.key() for size in self.sizes))
     
-    def is_allocable(self):
-        return all(size.is_known() for size in self.sizes)
+    def is_allocable(self, data_manager):
+        return all(size.is_known(data_manager) for size in self.sizes)
+
+    # The sizes of the array, given the values (name: value) of the variables.
+    def evaluate_sizes(self, values):
+        for size in self.sizes:
+            if size.var is not None and size.var.name not in values:
+                raise ValueError("The value of {0} is needed to know the size "
+                                 "of {1}.".format(size.var.name, self.name))
+        sizes = [size.evaluate(values) for size in self.sizes]
+        if any(size < 0 for size in sizes):
+            raise ValueError("The size of {0} is negative.".format(self.name))
+        return sizes
         
-class Parameter:
+class Parameter(Frozen):
+    __slots__ = ("name", "type", "dim", "by_ref")
+
     def __init__(self, match_tree):
         self.name = match_tree["name"]
         self.type = PrimitiveType(match_tree["type"])
@@ -51,11 +103,13 @@ class Parameter:
         # match_tree["by_ref"] can be ' ', ' &', '& '.
         self.by_ref = "&" in match_tree["by_ref"]
         
-class Prototype:
+class Prototype(Frozen):
+    __slots__ = ("name", "type", "parameters", "location")
+
     def __init__(self, match_tree, using_include_grader):
         self.name = match_tree["name"]
         self.type = PrimitiveType(match_tree["return_type"]) # One of the primitive types (array not supported)
-        self.parameters = [Parameter(param) for param in match_tree["params"]]
+        self.parameters = tuple(Parameter(param) for param in match_tree["params"])
         # Where this prototype should be defined. 
         # Can be SOLUTION, if this prototype has to be defined by the contestant
         # in his solution, or GRADER if this prototype should be defined in
@@ -67,13 +121,62 @@ class Prototype:
             raise ValueError("The location of a prototype cannot be 'grader' if"
                              "you are not providing the include_grader file.")
 
-class Call:
+# The loop variable i<level> of a repeated call (see Call).
+class LoopIndex(Keyed):
+    __slots__ = ("level", "name", "type")
+
+    def __init__(self, level):
+        self.level = level
+        self.name = "i" + str(level)
+        self.type = PrimitiveType.INT
+
+    def key(self):
+        return (self.level,)
+
+    def to_string(self):
+        return self.name
+
+# An element of an array (or a row, if there are less indexes than
+# dimensions) indexed by loop variables of a repeated call, e.g. A[i0][i1].
+# name is the name of the array, so that the data_manager knows it as the
+# array.
+class Access(Keyed):
+    __slots__ = ("array", "indexes", "name", "type", "dim")
+
+    def __init__(self, array, indexes):
+        self.array = array
+        self.indexes = tuple(indexes)
+        self.name = array.name
+        self.type = array.type
+        self.dim = array.dim - len(self.indexes)
+
+    def key(self):
+        return (self.array.key(), tuple(index.level for index in self.indexes))
+
+    def to_string(self):
+        return self.name + "".join("[" + index.name + "]" for index in self.indexes)
+
+class Call(Frozen):
+    __slots__ = ("name", "return_var", "prototype", "parameters", "repeat")
+
     def __init__(self, match_tree, data_manager):
         self.name = match_tree["name"]
-        self.return_var = data_manager.get_variable(match_tree["return_var"]) if "return_var" in match_tree else None
+        # The call is repeated by nested loops, the i-th one (whose variable
+        # is i<i>) repeated repeat[i] times. Empty if the call is not repeated.
+        self.repeat = tuple(Expression(count, data_manager) for count in match_tree.get("repeat", []))
+        if not all(count.is_known(data_manager) for count in self.repeat):
+            raise ValueError("The number of repetitions of a call must be "
+                             "known.")
+        for level in range(len(self.repeat)):
+            if "i" + str(level) in data_manager.variables:
+                raise ValueError("The variable i{0} cannot be used together "
+                                 "with repeat, it is the name of a loop "
+                                 "variable.".format(level))
+
+        self.return_var = self.argument(match_tree["return_var"], data_manager) if "return_var" in match_tree else None
         
-        # Cannot be an Array, must be a simple Variable.
-        if self.return_var is not None and type(self.return_var) == Array:
+        # Cannot be an Array, must be a simple Variable (or an element of an array).
+        if self.return_var is not None and (type(self.return_var) in (Array, LoopIndex) or getattr(self.return_var, "dim", 0) != 0):
             raise ValueError("The variable assigned to the return value of a "
                              "call cannot be an array.")
         
@@ -87,11 +190,11 @@ class Call:
             if self.prototype.type != self.return_var.type:
                 self.prototype_not_matched()
         elif self.return_var is not None:
-            return False
+            self.prototype_not_matched()
         
-        # List of pairs (Variable/Array, by_ref). 
+        # List of pairs (Variable/Array/Access/LoopIndex, by_ref). 
         # by_ref is not parsed but deduced from the matched prototype.
-        self.parameters = []
+        parameters = []
         
         # Checking the matching of all parameters.
         # If everything matched the parameters are inserted in self.parameters.
@@ -100,45 +203,83 @@ class Call:
         
         for i in range(len(match_tree["params"])):
             proto_param = self.prototype.parameters[i]
-            call_param = data_manager.get_variable(match_tree["params"][i])
+            call_param = self.argument(match_tree["params"][i], data_manager)
             
-            if call_param.type != proto_param.type:
+            # A loop variable is an int, which can be converted to longint.
+            if call_param.type != proto_param.type and not (type(call_param) == LoopIndex and proto_param.type == PrimitiveType.LONGINT):
                 self.prototype_not_matched()
                 
-            if type(call_param) == Array:
-                if proto_param.dim != call_param.dim:
-                    self.prototype_not_matched()
-            elif proto_param.dim != 0:
+            if getattr(call_param, "dim", 0) != proto_param.dim:
                 self.prototype_not_matched()
             
-            if type(call_param) == Array and not call_param.is_allocable():
+            if type(call_param) == Array and not call_param.is_allocable(data_manager):
+                raise ValueError("The sizes of the array passed by parameter "
+                                 "must be known.")
+            if type(call_param) == Access and not call_param.array.is_allocable(data_manager):
                 raise ValueError("The sizes of the array passed by parameter "
                                  "must be known.")
-            if not proto_param.by_ref and not call_param.known:
+            if type(call_param) == LoopIndex:
+                if proto_param.by_ref:
+                    raise ValueError("A loop variable cannot be passed by "
+                                     "reference.")
+            elif not proto_param.by_ref and not data_manager.is_known(call_param):
                 raise ValueError("The parameters not passed by reference must "
                                  "be known.")
                 
-            self.parameters.append((call_param, proto_param.by_ref))
+            parameters.append((call_param, proto_param.by_ref))
+        self.parameters = tuple(parameters)
+
+    # The variable, the array, the element of an array or the loop variable
+    # named by the match tree (see SpecParser.parse_indexed_name).
+    def argument(self, match_tree, data_manager):
+        loop_index = self.loop_index(match_tree["name"])
+        if loop_index is not None:
+            if match_tree["indexes"]:
+                raise ValueError("A loop variable cannot be indexed.")
+            return loop_index
+
+        var = data_manager.get_variable(match_tree["name"])
+        if not match_tree["indexes"]:
+            return var
+        if type(var) != Array or len(match_tree["indexes"]) > var.dim:
+            raise ValueError("Only arrays can be indexed, with at most an "
+                             "index for each dimension.")
+        indexes = [self.loop_index(index) for index in match_tree["indexes"]]
+        if None in indexes:
+            raise ValueError("The indexes of an array in a call must be loop "
+                             "variables of repeat (i0, i1, ...).")
+        return Access(var, indexes)
+
+    # The loop variable named name, None if there is no such loop variable.
+    def loop_index(self, name):
+        for level in range(len(self.repeat)):
+            if name == "i" + str(level):
+                return LoopIndex(level)
+        return None
         
-    def prototype_not_matched():
+    def prototype_not_matched(self):
         raise NameError("One of the calls does not match any prototype.")
 
-class IOVariables:
+class IOVariables(Frozen):
+    __slots__ = ("variables",)
+
     def __init__(self, match_tree, data_manager, is_input_or_output):
-        self.variables = [data_manager.get_variable(var) for var in match_tree['variables']]
+        self.variables = tuple(data_manager.get_variable(var) for var in match_tree['variables'])
         if not all(type(var) == Variable for var in self.variables):
             raise SyntaxError("It is not possible to have both arrays and "
                               "variables on the same IO line. Furthermore, "
                               "arrays have to be denoted using the square "
                               "bracket notation.")
         
-        if is_input_or_output == "output" and not all(var.known for var in self.variables):
+        if is_input_or_output == "output" and not all(data_manager.is_known(var) for var in self.variables):
             raise ValueError("Before writing a variable to output it must "
                              "have been assigned a value.")
 
-class IOArrays:
+class IOArrays(Frozen):
+    __slots__ = ("arrays", "sizes")
+
     def __init__(self, match_tree, data_manager, is_input_or_output):
-        self.arrays = [data_manager.get_variable(arr["name"]) for arr in match_tree['arrays']]
+        self.arrays = tuple(data_manager.get_variable(arr["name"]) for arr in match_tree['arrays'])
         if not all(type(arr) == Array for arr in self.arrays):
             raise SyntaxError("It is not possible to have both arrays and "
                               "variables on the same IO line. Furthermore, "
@@ -151,17 +292,19 @@ class IOArrays:
             raise ValueError("Arrays read on the same line must have the same "
                              "type.")
             
-        if not all(expr.is_known() for expr in self.sizes):
+        if not all(expr.is_known(data_manager) for expr in self.sizes):
             raise ValueError("Before reading/writing an arrays, theirs sizes "
                              "must be known.")
             
-        if is_input_or_output == "output" and not all(arr.known for arr in self.arrays):
+        if is_input_or_output == "output" and not all(data_manager.is_known(arr) for arr in self.arrays):
             raise ValueError("Before writing an array to output it must have "
                              "been filled with values.")
 
 
 # coef * var + const
-class Expression:
+class Expression(Keyed):
+    __slots__ = ("coef", "var", "const")
+
     def __init__(self, match_tree, data_manager):
         if "const1" in match_tree: # Constant expression, just a number
             self.coef = 0
@@ -195,11 +338,15 @@ class Expression:
                 res+=str(self.const)
         return res
     
-    def is_known(self):
-        return self.var is None or self.var.known
-    
-    def __eq__(self, expr2):
-        return (self.coef == expr2.coef and self.const == expr2.const and self.var == expr2.var)
+    def key(self):
+        return (self.coef, None if self.var is None else self.var.name, self.const)
+
+    # The value of the expression, given the values (name: value) of the
+    # variables.
+    def evaluate(self, values):
+        if self.var is None:
+            return self.const
+        return self.coef * values[self.var.name] + self.const
 
-    def __ne__(self, expr2):
-        return not self.__eq__(expr2)
+    def is_known(self, data_manager):
+        return self.var is None or data_manager.is_known(self.var)
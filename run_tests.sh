@@ -18,8 +18,8 @@ NC="\033[0m" # No Color
 OK="$GREEN✓\033[0m"
 NOTOK="$RED✗\033[0m"
 
-LANGUAGES=(C fast_C CPP fast_CPP pascal fast_pascal)
-FILES=(c fast_c cpp fast_cpp pascal fast_pascal)
+LANGUAGES=(C fast_C mmap_C CPP fast_CPP mmap_CPP pascal fast_pascal)
+FILES=(c fast_c mmap_c cpp fast_cpp mmap_cpp pascal fast_pascal)
 
 CHECK() {
     (chronic "$@" && echo -e $OK) || (echo -e $NOTOK && exit 1)
@@ -44,47 +44,60 @@ CHECK pip install -t ./pip_modules -r ../requirements.txt
 echo -n "Creation of 'gradergen' binary inside 'testing' folder... "
 CHECK python ../setup.py install --home ./pip_modules --install-scripts .
 
+echo -n "Checking the start-up time of gradergen... "
+CHECK python check_startup.py
+
 compile_stuff() {
     echo "Compiling solutions and templates... "
 
     if [ -f grader.c ]; then
         echo -n "Compiling C "
-        CHECK gcc -Wall -DEVAL -O2 grader.c soluzione.c -o c
-        chronic gcc -Wall -DEVAL -O2 grader.c template_C.c -o template_C || touch template_c.errors
+        CHECK gcc -Wall -DEVAL $C_DEFINES -O2 grader.c soluzione.c -o c
+        chronic gcc -Wall -DEVAL $C_DEFINES -O2 grader.c template_C.c -o template_C || touch template_c.errors
     fi
     if [ -f fast_grader.c ]; then
         echo -n "Compiling fast_C "
-        CHECK gcc -Wall -DEVAL -O2 fast_grader.c soluzione.c -o fast_c
-        chronic gcc -Wall -DEVAL -O2 fast_grader.c template_fast_C.c -o template_fast_C || touch template_fast_c.errors
+        CHECK gcc -Wall -DEVAL $C_DEFINES -O2 fast_grader.c soluzione.c -o fast_c
+        chronic gcc -Wall -DEVAL $C_DEFINES -O2 fast_grader.c template_fast_C.c -o template_fast_C || touch template_fast_c.errors
+    fi
+    if [ -f mmap_grader.c ]; then
+        echo -n "Compiling mmap_C "
+        CHECK gcc -Wall -DEVAL $C_DEFINES -O2 mmap_grader.c soluzione.c -o mmap_c
+        chronic gcc -Wall -DEVAL $C_DEFINES -O2 mmap_grader.c template_mmap_C.c -o template_mmap_C || touch template_mmap_c.errors
     fi
     if [ -f grader.cpp ]; then
         echo -n "Compiling CPP "
-        CHECK g++ -Wall -DEVAL -O2 grader.cpp soluzione.cpp -o cpp
-        chronic g++ -Wall -DEVAL -O2 grader.cpp template_CPP.cpp -o template_cpp || touch template_cpp.errors
+        CHECK g++ -Wall -DEVAL $C_DEFINES -O2 grader.cpp soluzione.cpp -o cpp
+        chronic g++ -Wall -DEVAL $C_DEFINES -O2 grader.cpp template_CPP.cpp -o template_cpp || touch template_cpp.errors
     fi
     if [ -f fast_grader.cpp ]; then
         echo -n "Compiling fast_CPP "
-        CHECK g++ -Wall -DEVAL -O2 fast_grader.cpp soluzione.cpp -o fast_cpp
-        chronic g++ -Wall -DEVAL -O2 fast_grader.cpp template_fast_CPP.cpp -o template_fast_CPP || touch template_fast_cpp.errors
+        CHECK g++ -Wall -DEVAL $C_DEFINES -O2 fast_grader.cpp soluzione.cpp -o fast_cpp
+        chronic g++ -Wall -DEVAL $C_DEFINES -O2 fast_grader.cpp template_fast_CPP.cpp -o template_fast_CPP || touch template_fast_cpp.errors
+    fi
+    if [ -f mmap_grader.cpp ]; then
+        echo -n "Compiling mmap_CPP "
+        CHECK g++ -Wall -DEVAL $C_DEFINES -O2 mmap_grader.cpp soluzione.cpp -o mmap_cpp
+        chronic g++ -Wall -DEVAL $C_DEFINES -O2 mmap_grader.cpp template_mmap_CPP.cpp -o template_mmap_CPP || touch template_mmap_cpp.errors
     fi
     if [ -f grader.pas ]; then
         echo -n "Compiling pascal "
         cp soluzione.pas $taskname.pas
-        CHECK fpc -dEVAL grader.pas -opascal
+        CHECK fpc -dEVAL $PAS_DEFINES grader.pas -opascal
         rm *.o *.ppu # Otherwise fpc seems to be non-deterministic.
         
         cp template_pascal.pas $taskname.pas
-        chronic fpc -dEVAL grader.pas -otemplate_pascal || touch template_pascal.errors
+        chronic fpc -dEVAL $PAS_DEFINES grader.pas -otemplate_pascal || touch template_pascal.errors
         rm *.o *.ppu # Otherwise fpc seems to be non-deterministic.
     fi
     if [ -f fast_grader.pas ]; then
         echo -n "Compiling fast_pascal "
         cp soluzione.pas $taskname.pas
-        CHECK fpc -dEVAL fast_grader.pas -ofast_pascal
+        CHECK fpc -dEVAL $PAS_DEFINES fast_grader.pas -ofast_pascal
         rm *.o *.ppu # Otherwise fpc seems to be non-deterministic.
 
         cp template_pascal.pas $taskname.pas
-        chronic fpc -dEVAL fast_grader.pas -otemplate_fast_pascal || touch template_fast_pascal.errors
+        chronic fpc -dEVAL $PAS_DEFINES fast_grader.pas -otemplate_fast_pascal || touch template_fast_pascal.errors
         rm *.o *.ppu # Otherwise fpc seems to be non-deterministic.
     fi
     
@@ -103,12 +116,28 @@ run_test() {
     outfile=$(grep "outfile" task.yaml | cut -d":" -f2)
     outfile=${outfile:1}
 
-    for index in {0..5}
+    # Additional options of gradergen used by the test (e.g. the binary format)
+    flags=""
+    if [ -f flags.txt ]; then
+        flags=$(cat flags.txt)
+    fi
+
+    # The graders generated with --instrument are compiled with the
+    # instrumentation, which writes a report checked against
+    # expected_report.json
+    C_DEFINES=""
+    PAS_DEFINES=""
+    if [[ $flags == *--instrument* ]]; then
+        C_DEFINES="-DGRADERGEN_INSTRUMENT"
+        PAS_DEFINES="-dGRADERGEN_INSTRUMENT"
+    fi
+
+    for index in ${!LANGUAGES[@]}
     do
         language=${LANGUAGES[$index]}
         name=${FILES[$index]}
         echo $language $name
-        chronic ../gradergen --lang $language 2> $name.out
+        chronic ../gradergen --lang $language $flags 2> $name.out
         if [ $? != "0" ]
         then
             md5sum $name.out | awk '{print $1}' > $name.out.md5
@@ -138,6 +167,13 @@ run_test() {
           && ./input > input.txt
     fi
 
+    # The graders with binary input read the input converted by gradergen
+    if [[ $flags == *--binary_input* ]]; then
+        echo -n "Converting the input to binary... "
+        CHECK ../gradergen convert input.txt input.bin
+        mv input.bin input.txt
+    fi
+
     compile_stuff
     # echo -n "Compiling stuff... "
     # cp soluzione.pas $taskname.pas
@@ -167,10 +203,13 @@ run_test() {
     do
         if [ -f $name ]; then
             echo -n "Running $name... "
+            export GRADERGEN_REPORT=$name.report.json
 
+            # The standard input is a pipe, so that the graders read it in
+            # blocks (a regular file is read all at once).
             if [ $infile = '""' ];
             then
-                (./$name < input.txt > output.txt && echo -e $OK) || echo -e $NOTOK
+                (cat input.txt | ./$name > output.txt && echo -e $OK) || echo -e $NOTOK
                 mv output.txt $name.out
             elif [ $infile = "input.txt" ];
             then
@@ -184,6 +223,11 @@ run_test() {
             fi
 
             md5sum $name.out | awk '{print $1}' > $name.out.md5
+
+            if [ -f expected_report.json ]; then
+                echo -n "Checking the report of $name... "
+                CHECK python ../check_report.py expected_report.json $name.report.json || touch $name.report.errors
+            fi
         fi
     done
 
@@ -274,6 +318,18 @@ do
             echo -n "template"
             printf "${NC}"
         fi
+
+        if [ -f "$test/expected_report.json" ]
+        then
+            if [ -f "$test/$name.report.json" ] && [ ! -f "$test/$name.report.errors" ]
+            then
+                printf "${GREEN}"
+            else
+                printf "${RED}"
+            fi
+            echo -n " report"
+            printf "${NC}"
+        fi
         echo
     done
 done
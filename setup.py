@@ -1,12 +1,19 @@
+import os
+import re
 from setuptools import setup, find_packages
 
+# The version is defined only in gradergen/__init__.py (it is part of the key
+# of the cache of the generated files).
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "gradergen", "__init__.py")) as f:
+    version = re.search(r'__version__ = "(.*)"', f.read()).group(1)
+
 setup(
     name='gradergen',
-    version='0.4',
+    version=version,
     description='Grader generator',
     packages=find_packages(exclude=['testing']),
     package_data={
-        'gradergen.languages': ['fast_io.c', 'fast_io.cpp', 'fast_input.pas', 'fast_output.pas'],
+        'gradergen.languages': ['fast_io.c', 'mmap_io.c', 'fast_input.pas', 'fast_format.pas', 'fast_output.pas'],
     },
     entry_points={
         'console_scripts': [
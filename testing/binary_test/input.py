@@ -0,0 +1,12 @@
+# The input in text format, it is converted by gradergen convert before
+# running the graders (see flags.txt).
+print("3 4 -123456789012 0.5")
+print("1 2 3 4")
+print("-5 6 -7 8")
+print("2147483647 -2147483648 0 9")
+print("9000000000000000000 1.25")
+print("-1 -0.001")
+print("42 3e10")
+print("abcd")
+print("efgh")
+print("ijkl")
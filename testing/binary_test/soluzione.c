@@ -0,0 +1,14 @@
+long long int elabora(int N, int M, long long int K, double X, const int* const* A, const long long int* L, const double* R, const char* const* S, double* Y, int** B, char** C) {
+	long long int T = K;
+	*Y = X;
+	for (int i = 0; i < N; i++) {
+		for (int j = 0; j < M; j++) {
+			B[i][j] = A[i][j] / 2 - j;
+			C[i][j] = S[N-1-i][j] - 'a' + 'A';
+			T += A[i][j];
+		}
+		T += L[i];
+		*Y += R[i];
+	}
+	return T;
+}
@@ -0,0 +1,32 @@
+unit nome_sorgente_contestant;
+
+interface
+
+type
+	longintmatrix = array of array of longint;
+	charmatrix = array of array of char;
+
+function elabora(N, M: Longint; K: Int64; X: Double; const A: longintmatrix; const L: array of Int64; const R: array of Double; const S: charmatrix; var Y: Double; var B: longintmatrix; var C: charmatrix): Int64;
+
+implementation
+function elabora(N, M: Longint; K: Int64; X: Double; const A: longintmatrix; const L: array of Int64; const R: array of Double; const S: charmatrix; var Y: Double; var B: longintmatrix; var C: charmatrix): Int64;
+var i, j: Longint;
+	T: Int64;
+begin
+	T := K;
+	Y := X;
+	for i := 0 to N-1 do
+	begin
+		for j := 0 to M-1 do
+		begin
+			B[i][j] := A[i][j] div 2 - j;
+			C[i][j] := chr(ord(S[N-1-i][j]) - ord('a') + ord('A'));
+			T := T + A[i][j];
+		end;
+		T := T + L[i];
+		Y := Y + R[i];
+	end;
+	elabora := T;
+end;
+
+end.
@@ -0,0 +1,37 @@
+# Le righe che iniziano con # sono commenti.
+# La stringa ***sezione*** indica l'inizio di una nuova sezione.
+# Le sezioni devono essere sempre presenti tutte, l'ordine non conta ma è
+# meglio se sono nell'ordine: variables, functions, input, output
+
+
+***variables***
+int N
+int M
+longint K
+real X
+int A[N][M]
+longint L[N]
+real R[N]
+char S[N][M]
+longint T
+real Y
+int B[N][M]
+char C[N][M]
+
+***prototypes***
+longint elabora(int N, int M, longint K, real X, int A[][], longint L[], real R[], char S[][], real &Y, int &B[][], char &C[][])
+
+***input***
+N M K X
+A[][]
+L[] R[]
+S[][]
+
+***calls***
+T = elabora(N, M, K, X, A, L, R, S, Y, B, C)
+
+***output***
+T Y
+B[][]
+C[][]
+L[] R[]
@@ -0,0 +1,62 @@
+# Checks the report written at exit by a grader generated with --instrument
+# and compiled with GRADERGEN_INSTRUMENT defined (see README.md):
+#  - the times of the input, of the calls and of the output are not negative;
+#  - the names of the calls and the counts of the calls of the functions of
+#    include_callable are the expected ones;
+#  - at least the expected bytes are allocated (the overhead of the layout
+#    depends on the language) and the peak resident memory is positive.
+# usage: check_report.py expected_report.json report.json
+
+import sys
+import json
+
+def is_number(value):
+    return type(value) in (int, float)
+
+def check(expected, report):
+    errors = []
+    for phase in ("input", "output"):
+        if not is_number(report.get(phase)) or report[phase] < 0:
+            errors.append("The time of the {0} is {1!r}.".format(phase, report.get(phase)))
+
+    calls = report.get("calls")
+    if type(calls) != list or any(type(call) != dict for call in calls):
+        errors.append("The calls are {0!r}.".format(calls))
+    else:
+        names = [call.get("name") for call in calls]
+        if names != expected["calls"]:
+            errors.append("The calls are {0}, not {1}.".format(names, expected["calls"]))
+        for call in calls:
+            if not is_number(call.get("time")) or call["time"] < 0:
+                errors.append("The time of {0} is {1!r}.".format(call.get("name"), call.get("time")))
+
+    if report.get("include_callable") != expected["include_callable"]:
+        errors.append("The calls of include_callable are {0!r}, not {1!r}."
+                          .format(report.get("include_callable"), expected["include_callable"]))
+
+    if type(report.get("allocated")) != int or report["allocated"] < expected["allocated"]:
+        errors.append("The bytes allocated are {0!r}, less than {1}."
+                          .format(report.get("allocated"), expected["allocated"]))
+    if type(report.get("peak_rss")) != int or report["peak_rss"] <= 0:
+        errors.append("The peak resident memory is {0!r}.".format(report.get("peak_rss")))
+    return errors
+
+def main():
+    with open(sys.argv[1]) as f:
+        expected = json.load(f)
+    try:
+        with open(sys.argv[2]) as f:
+            report = json.load(f)
+    except (IOError, ValueError) as e:
+        print("The report cannot be read: {0}".format(e))
+        sys.exit(1)
+
+    errors = check(expected, report)
+    for error in errors:
+        print(error)
+    if errors:
+        sys.exit(1)
+    print("The report is correct.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Checks that starting gradergen stays cheap, as it is run many times (e.g. by
+# hooks and scripts importing tasks):
+#  - importing gradergen.grader_generator must not import pkg_resources nor any
+#    of the languages;
+#  - loading a language must import only its module;
+#  - the import must take less than BUDGET seconds (the best of RUNS runs, each
+#    one in a new interpreter).
+
+import sys
+import json
+import subprocess
+
+BUDGET = 0.15
+RUNS = 5
+
+MEASURE = """
+import sys, time, json
+start = time.perf_counter()
+import gradergen.grader_generator as grader_generator
+elapsed = time.perf_counter() - start
+imported = sorted(m for m in sys.modules if m == "pkg_resources" or m.startswith("gradergen.languages."))
+grader_generator.load_language("C")
+with_C = sorted(m for m in sys.modules if m.startswith("gradergen.languages."))
+print(json.dumps({"elapsed": elapsed, "imported": imported, "with_C": with_C}))
+"""
+
+def main():
+    results = []
+    for i in range(RUNS):
+        output = subprocess.check_output([sys.executable, "-c", MEASURE])
+        results.append(json.loads(output.decode()))
+
+    errors = []
+    if results[0]["imported"]:
+        errors.append("Importing gradergen imports " + ", ".join(results[0]["imported"]) + ".")
+    if results[0]["with_C"] != ["gradergen.languages.C"]:
+        errors.append("Loading C imports " + ", ".join(results[0]["with_C"]) + ".")
+    elapsed = min(result["elapsed"] for result in results)
+    print("Importing gradergen takes {0:.3f}s (the budget is {1:.3f}s).".format(elapsed, BUDGET))
+    if elapsed > BUDGET:
+        errors.append("Importing gradergen is too slow.")
+
+    for error in errors:
+        print(error)
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
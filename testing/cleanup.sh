@@ -14,13 +14,13 @@ rm -rf pip_modules
 #### Other cleanup ####
 taskname='nome_sorgente_contestant'
 
-FILES='c fast_c cpp fast_cpp pascal fast_pascal'
+FILES='c fast_c mmap_c cpp fast_cpp mmap_cpp pascal fast_pascal'
 
 clean_test() {
     pushd $1 > /dev/null
 
     mkdir ../TempDir
-    cp task.spec task.yaml soluzione.* include_grader.* include_callable.* correct.md5 comments.txt ../TempDir/ > /dev/null 2> /dev/null
+    cp task.spec task.yaml soluzione.* include_grader.* include_callable.* correct.md5 comments.txt flags.txt expected_report.json ../TempDir/ > /dev/null 2> /dev/null
 
     # Save input or input generator
     if [ -f input.py ]
@@ -34,7 +34,7 @@ clean_test() {
         cp input.txt ../TempDir/input.txt
     fi
 
-    rm -rf *
+    rm -rf * .gradergen_cache
 
     cp ../TempDir/* .
     rm -r ../TempDir
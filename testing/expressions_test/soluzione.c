@@ -1,3 +1,3 @@
-void moltiplica(int N, int* A, int* B, int* C) {
+void moltiplica(int N, const int* A, const int* B, int* C) {
 	for (int i = 0; i < 3*N-5; i++) C[i] = A[i]*B[i];
 }
@@ -1,6 +1,6 @@
 #include <stdlib.h>
 
-int contapersone(int M, int* from, int* too) {
+int contapersone(int M, const int* from, const int* too) {
 	int xxx = from[M-2] + from[M-1] + too[1];
 	if (xxx > 10000) return 10000;
 	return xxx;
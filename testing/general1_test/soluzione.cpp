@@ -2,7 +2,7 @@
 #include <algorithm>
 
 
-int contapersone(int M, int* from, int* too) {
+int contapersone(int M, const int* from, const int* too) {
 	return std::min(10000, from[M-2] + from[M-1] + too[1]);
 }
 
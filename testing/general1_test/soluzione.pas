@@ -1,13 +1,13 @@
 unit nome_sorgente_contestant;
 
 interface
-function contapersone(M: Longint; from, too: array of Longint): Longint;
+function contapersone(M: Longint; const from, too: array of Longint): Longint;
 
 procedure sceglicolori(res: Longint; var scelti: array of Longint; var colore: array of Double);
 
 implementation
 
-function contapersone(M: Longint; from, too: array of Longint): Longint;
+function contapersone(M: Longint; const from, too: array of Longint): Longint;
 var
 	xxx: Longint;
 
@@ -1,6 +1,6 @@
 void Abbatti(int, int);
 
-void Pianifica(int N, int H[]) {
+void Pianifica(int N, const int H[]) {
 	for (int i=0; i<N/2; i++) {
 		if (H[i] > 10) {
 			Abbatti(i, 0);
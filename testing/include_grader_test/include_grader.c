@@ -1,4 +1,4 @@
-void AggiungiTutti(int N, long long int* X) {
+void AggiungiTutti(int N, const long long int* X) {
 	for (int i = 0; i < N; i++) {
 		aggiungi(X[i]);
 	}
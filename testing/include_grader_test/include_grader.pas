@@ -1,4 +1,4 @@
-procedure AggiungiTutti(N: Longint; X: array of Int64);
+procedure AggiungiTutti(N: Longint; const X: array of Int64);
 var
 	i: Longint;
 begin
@@ -0,0 +1,3 @@
+void Abbatti(int indice, int direzione) {
+    fprintf(fw, "%d %d\n", indice, direzione);
+}
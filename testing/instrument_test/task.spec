@@ -0,0 +1,24 @@
+# Le righe che iniziano con # sono commenti.
+# La stringa ***sezione*** indica l'inizio di una nuova sezione.
+# Le sezioni devono essere sempre presenti tutte, l'ordine non conta ma è
+# meglio se sono nell'ordine: variables, functions, input, output
+
+
+***variables***
+int N
+int altezza[N]
+
+int indice
+int direzione
+
+***prototypes***
+Pianifica(int N, int altezza[])
+
+***input***
+N
+altezza[]
+
+***calls***
+Pianifica(N, altezza)
+
+***output***
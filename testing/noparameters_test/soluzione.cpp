@@ -4,7 +4,7 @@ void inizializza(long long int s) {
 	S = s;
 }
 
-void aggiungi(int N, long long int* X) {
+void aggiungi(int N, const long long int* X) {
 	for (int i = 0; i < N; i++) S += X[i];
 }
 
@@ -4,7 +4,7 @@ interface
 
 procedure inizializza(first: Int64);
 
-procedure aggiungi(N: Longint; X: array of Int64);
+procedure aggiungi(N: Longint; const X: array of Int64);
 
 function risultato(): Int64;
 
@@ -18,7 +18,7 @@ begin
 	S := first;
 end;
 
-procedure aggiungi(N: Longint; X: array of Int64);
+procedure aggiungi(N: Longint; const X: array of Int64);
 var
 	i: Longint;
 begin
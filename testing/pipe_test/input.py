@@ -0,0 +1,34 @@
+from sys import stdout
+
+# The graders with fast input read a pipe in blocks of 1 << 16 bytes: for
+# each k from 1 to 20, a longint of 20 bytes is placed so that it starts k
+# bytes before the end of a block, i.e. it is split after its k-th byte.
+BLOCK = 1 << 16
+LONG = ["-9223372036854775808", "-1234567890123456789"]
+
+def values_after(header):
+    values = []
+    written = header
+    for k in range(1, 21):
+        # The gap before the longint is filled by "7 " (2 bytes), "-12 "
+        # (4 bytes) and, if it is odd, one "45 " (3 bytes).
+        gap = k * BLOCK - k - written
+        if gap % 2 == 1:
+            values.append("45")
+            gap -= 3
+        values += ["-12"] * (gap // 4) + ["7"] * (gap % 4 // 2)
+        values.append(LONG[k % 2])
+        written = k * BLOCK - k + len(LONG[k % 2]) + 1
+    return values + ["9223372036854775807", "0", "-1"]
+
+def run():
+    # The length of the first line depends on the number of values.
+    for header in range(2, 10):
+        values = values_after(header)
+        if len("%d\n" % len(values)) == header:
+            break
+    stdout.write("%d\n" % len(values))
+    stdout.write(" ".join(values) + "\n")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,3 @@
+void resto(int N, const long long int* A, int* B) {
+	for (int i = 0; i < N; i++) B[i] = A[i] % 1000;
+}
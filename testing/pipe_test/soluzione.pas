@@ -0,0 +1,15 @@
+unit nome_sorgente_contestant;
+
+interface
+
+procedure resto(N: Longint; const A: array of Int64; var B: array of Longint);
+
+implementation
+procedure resto(N: Longint; const A: array of Int64; var B: array of Longint);
+var i: Longint;
+begin
+	for i := 0 to N-1 do
+		B[i] := A[i] mod 1000;
+end;
+
+end.
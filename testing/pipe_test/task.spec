@@ -0,0 +1,23 @@
+# Le righe che iniziano con # sono commenti.
+# La stringa ***sezione*** indica l'inizio di una nuova sezione.
+# Le sezioni devono essere sempre presenti tutte, l'ordine non conta ma è
+# meglio se sono nell'ordine: variables, functions, input, output
+
+
+***variables***
+int N
+longint A[N]
+int B[N]
+
+***prototypes***
+resto(int N, longint A[], int &B[])
+
+***input***
+N
+A[]
+
+***calls***
+resto(N, A, B)
+
+***output***
+A[] B[]
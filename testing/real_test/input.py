@@ -0,0 +1,33 @@
+from sys import stdout
+
+# The graders with fast input read a pipe in blocks of 1 << 16 bytes: a long
+# real is placed so that it starts 80 bytes before the end of the first block
+# and is split between two blocks.
+BLOCK = 1 << 16
+LONG_REAL = "1.0" + "5" * 99
+
+def run(X):
+    first = ["1.5", "-0.25", "3e2", "1E-3", "123456.789", "-0", "0.0000005",
+             "2.5e-7", "+42", ".75", "17.", "-1e6", "98765.4321", "0.1",
+             "3.14159265358979", "100000000000.25"]
+    # Values written by fast_format_big and values at least 1e15 with a
+    # fractional part.
+    last = ["2.5", LONG_REAL[:40], "-7.125", "1e300", "-1e20", "9223372036854775808",
+            "123456789012345678", "1000000000000000.5", "4503599627370495.5", "-5e-324"]
+
+    # Fillers "0.5 " (4 bytes) and "0.25 " (5 bytes) move the long real.
+    for quarters in range(4):
+        before = first + ["0.25"] * quarters
+        size = sum(len(v) + 1 for v in before)
+        halves = (BLOCK - 80 - size - len("16384 0.5\n")) // 4
+        before += ["0.5"] * halves
+        N = len(before) + 1 + len(last)
+        head = "%d %s\n" % (N, X)
+        if len(head) + sum(len(v) + 1 for v in before) == BLOCK - 80:
+            break
+
+    stdout.write(head)
+    stdout.write(" ".join(before + [LONG_REAL] + last) + "\n")
+
+if __name__ == "__main__":
+    run("0.5")
@@ -0,0 +1,8 @@
+double raddoppia(int N, double X, const double* A, double* B) {
+	double S = 0;
+	for (int i = 0; i < N; i++) {
+		B[i] = 2*A[i];
+		S += X*A[i];
+	}
+	return S;
+}
@@ -0,0 +1,21 @@
+unit nome_sorgente_contestant;
+
+interface
+
+function raddoppia(N: Longint; X: Double; const A: array of Double; var B: array of Double): Double;
+
+implementation
+function raddoppia(N: Longint; X: Double; const A: array of Double; var B: array of Double): Double;
+var i: Longint;
+	S: Double;
+begin
+	S := 0;
+	for i := 0 to N-1 do
+	begin
+		B[i] := 2*A[i];
+		S := S + X*A[i];
+	end;
+	raddoppia := S;
+end;
+
+end.
@@ -0,0 +1,27 @@
+# Le righe che iniziano con # sono commenti.
+# La stringa ***sezione*** indica l'inizio di una nuova sezione.
+# Le sezioni devono essere sempre presenti tutte, l'ordine non conta ma è
+# meglio se sono nell'ordine: variables, functions, input, output
+
+
+***variables***
+int N
+real X
+real A[N]
+real B[N]
+real S
+
+***prototypes***
+real raddoppia(int N, real X, real A[], real &B[])
+
+***input***
+N X
+A[]
+
+***calls***
+S = raddoppia(N, X, A, B)
+
+***output***
+S
+A[] B[]
+B[]
@@ -0,0 +1,9 @@
+long long int somma(int N, int M, const int* const* A, long long int S[]) {
+	long long int totale = 0;
+	for (int i = 0; i < N; i++) {
+		S[i] = 0;
+		for (int j = 0; j < M; j++) S[i] += A[i][j];
+		totale += S[i];
+	}
+	return totale;
+}
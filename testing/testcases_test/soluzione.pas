@@ -0,0 +1,29 @@
+unit nome_sorgente_contestant;
+
+interface
+
+type
+	longintmatrix = array of array of longint;
+
+function somma(N, M: longint; const A: longintmatrix; var S: array of int64): int64;
+
+implementation
+
+function somma(N, M: longint; const A: longintmatrix; var S: array of int64): int64;
+var
+	i, j: longint;
+	totale: int64;
+begin
+	{ The arrays have the sizes of the current testcase. }
+	totale := 0;
+	for i := 0 to high(S) do
+	begin
+		S[i] := 0;
+		for j := 0 to high(A[i]) do
+			S[i] := S[i] + A[i][j];
+		totale := totale + S[i];
+	end;
+	somma := totale;
+end;
+
+end.
@@ -0,0 +1,32 @@
+# Le righe che iniziano con # sono commenti.
+# La stringa ***sezione*** indica l'inizio di una nuova sezione.
+# La sezione testcases indica la variabile con il numero di testcase,
+# ognuno dei quali è letto, risolto e scritto a turno.
+
+
+***variables***
+int T
+int N
+int M
+int A[N][M]
+longint S[N]
+longint K
+
+
+***prototypes***
+longint somma(int N, int M, int A[][], longint &S[])
+
+***testcases***
+T
+
+***input***
+N M
+A[][]
+
+***calls***
+K = somma(N, M, A, S)
+
+
+***output***
+K
+S[]